@@ -4,8 +4,9 @@ from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from app.config import Config
+from app.utils.routing_session import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 cors = CORS()
@@ -19,6 +20,33 @@ def create_app(config_class=Config):
     jwt.init_app(app)
     cors.init_app(app)
 
+    from app.services.search_index import init_search_index
+    init_search_index(app)
+
+    from app.services.view_counter import init_view_counter
+    init_view_counter(app)
+
+    from app.services.response_cache import init_response_cache
+    init_response_cache(app)
+
+    from app.services.recommendation_service import init_recommendations
+    init_recommendations(app)
+
+    from app.services.email_outbox import init_email_outbox
+    init_email_outbox(app)
+
+    from app.services.password_hasher import init_password_hasher
+    init_password_hasher(app)
+
+    from app.services.identity_service import init_identity
+    init_identity(app)
+
+    from app.services.metrics import init_metrics
+    init_metrics(app)
+
+    from app.services.read_replicas import init_read_replicas
+    init_read_replicas(app)
+
     from app.routes.auth import auth_bp
     from app.routes.vacancies import vacancies_bp
     from app.routes.companies import companies_bp
@@ -31,4 +59,7 @@ def create_app(config_class=Config):
     app.register_blueprint(profiles_bp, url_prefix='/profile')
     app.register_blueprint(api_bp, url_prefix='/api/v1')
 
+    from app.cli import register_cli
+    register_cli(app)
+
     return app
@@ -0,0 +1,212 @@
+﻿"""ASGI serving mode.
+
+The hot public reads (vacancy list and detail, company list, platform
+stats) run on the event loop: the unchanged Flask view runs through the
+full request pipeline inside ``AsyncSession.run_sync``, so its queries
+go through an async driver (asyncpg, aiosqlite) and connection pool and
+an in-flight request waiting on the database holds no thread. Every
+other route is handed to the WSGI app on a thread pool as before.
+
+Run with ``uvicorn asgi:app``; one process can then keep thousands of
+reads in flight, bounded by the async pool (``ASYNC_DATABASE_POOL_*``)
+rather than by worker threads.
+
+Anything else such a view does also runs on the loop thread. Replica
+health is probed off it (see ReadReplicas), and views that would call
+the Redis response cache or view counter, whose clients block, are left
+on the thread pool.
+"""
+import io
+import sys
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from werkzeug.exceptions import HTTPException
+from app import db
+from app.services.fulltext_service import FullTextService
+from app.services.response_cache import MemoryCacheBackend
+from app.services.view_counter import MemoryViewBuffer
+from app.utils.routing_session import AsyncRoutingSession
+
+ASYNC_ENDPOINTS = {'vacancies.get_vacancies', 'vacancies.get_vacancy', 'companies.get_companies', 'api.get_stats'}
+CACHED_ENDPOINTS = {'vacancies.get_vacancies', 'vacancies.get_vacancy', 'companies.get_companies'}
+COUNTING_ENDPOINTS = {'vacancies.get_vacancy'}
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'postgresql+asyncpg': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+    'sqlite+aiosqlite': 'sqlite+aiosqlite'
+}
+
+def async_url(url):
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.drivername)
+    if driver is None:
+        raise ValueError(f'No async driver for {url.drivername} databases')
+    return url.set(drivername=driver)
+
+def async_endpoints(app):
+    """ASYNC_ENDPOINTS less those whose cache or counter calls would block the loop."""
+    endpoints = set(ASYNC_ENDPOINTS)
+    cache = app.extensions.get('response_cache')
+    if cache is not None and not isinstance(cache, MemoryCacheBackend):
+        endpoints -= CACHED_ENDPOINTS
+    if not isinstance(app.extensions['view_counter'].buffer, MemoryViewBuffer):
+        endpoints -= COUNTING_ENDPOINTS
+    return endpoints
+
+def wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+class AsyncReads:
+    """Async engines for the primary and each read replica, and the dispatch into Flask.
+
+    ``@read_replica`` keeps working: it still sets ``g.replica_engine``
+    to a sync replica engine, which AsyncRoutingSession swaps for that
+    replica's async engine, and errors on the async engines mark the
+    shared replica down so the view's failover retry goes to the primary.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.engines = None
+        self.adapter = app.url_map.bind('localhost')
+        self.endpoints = async_endpoints(app)
+
+    def start(self):
+        with self.app.app_context():
+            primary_url = db.engine.url
+            # Probed once per engine with a blocking query; do it before
+            # the loop starts serving.
+            FullTextService.backend()
+        engines = {None: create_async_engine(
+            async_url(self.app.config.get('ASYNC_DATABASE_URL') or primary_url),
+            **self.app.config.get('ASYNC_ENGINE_OPTIONS', {})
+        )}
+        replicas = self.app.extensions.get('read_replicas')
+        for replica in replicas.replicas if replicas is not None else []:
+            engine = create_async_engine(
+                async_url(replica.engine.url), **self.app.config.get('READ_REPLICA_ENGINE_OPTIONS', {})
+            )
+            event.listen(engine.sync_engine, 'handle_error', replicas.error_handler(replica))
+            engines[replica.engine] = engine
+        self.engines = engines
+
+    async def stop(self):
+        for engine in self.engines.values():
+            await engine.dispose()
+
+    def handles(self, scope):
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+            return False
+        try:
+            endpoint, _ = self.adapter.match(scope['path'], method=scope['method'])
+        except HTTPException:
+            return False
+        return endpoint in self.endpoints
+
+    def dispatch(self):
+        try:
+            return self.app.full_dispatch_request()
+        except Exception as e:
+            return self.app.make_response(self.app.handle_exception(e))
+
+    async def respond(self, environ):
+        ctx = self.app.request_context(environ)
+        ctx.push()
+        session = AsyncSession(sync_session_class=AsyncRoutingSession, info={'async_engines': self.engines})
+        try:
+            db.session.registry.set(session.sync_session)
+            response = await session.run_sync(lambda sync_session: self.dispatch())
+        finally:
+            # Cleared first so the app context teardown does not try to
+            # close the async session synchronously.
+            db.session.registry.clear()
+            await session.close()
+            ctx.pop()
+        return response
+
+    async def __call__(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        environ = wsgi_environ(scope, body)
+        response = await self.respond(environ)
+        try:
+            app_iter, status, headers = response.get_wsgi_response(environ)
+            await send({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            })
+            await send({'type': 'http.response.body', 'body': b''.join(app_iter)})
+        finally:
+            response.close()
+
+class AsgiApp:
+    def __init__(self, app):
+        self.reads = AsyncReads(app)
+        self.wsgi = WSGIMiddleware(app, workers=app.config.get('ASGI_WSGI_THREADS', 10))
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    self.reads.start()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.reads.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif self.reads.handles(scope):
+            await self.reads(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+def create_asgi_app(app):
+    asgi_app = AsgiApp(app)
+    app.extensions['async_reads'] = asgi_app.reads
+    return asgi_app
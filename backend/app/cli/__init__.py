@@ -0,0 +1,26 @@
+﻿from .email import email_cli
+from .export import export_cli
+from .locations import locations_cli
+from .recommendations import recommendations_cli
+from .replicas import replicas_cli
+from .salaries import salaries_cli
+from .search import search_cli
+from .stats import stats_cli
+from .users import users_cli
+from .vacancies import vacancies_cli
+from .views import views_cli
+
+def register_cli(app):
+    app.cli.add_command(email_cli)
+    app.cli.add_command(export_cli)
+    app.cli.add_command(locations_cli)
+    app.cli.add_command(recommendations_cli)
+    app.cli.add_command(replicas_cli)
+    app.cli.add_command(salaries_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(vacancies_cli)
+    app.cli.add_command(views_cli)
+
+__all__ = ['register_cli']
@@ -0,0 +1,38 @@
+﻿import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func
+from app import db
+from app.models.outbox_email import OutboxEmail
+
+email_cli = AppGroup('email', help='Deliver and inspect the email outbox.')
+
+@email_cli.command('deliver')
+def deliver():
+    """Send every message that is due, then exit."""
+    try:
+        sent = current_app.extensions['email_outbox'].deliver_pending()
+    except OSError as e:
+        raise click.ClickException(f'Delivery stopped, mail server unavailable: {str(e)}')
+    click.echo(f'Sent {sent} emails')
+
+@email_cli.command('work')
+def work():
+    """Run the delivery worker pool in the foreground."""
+    outbox = current_app.extensions['email_outbox']
+    outbox.workers = max(outbox.workers, 1)
+    click.echo(f'Delivering with {outbox.workers} workers, Ctrl+C to stop')
+    outbox.wake()
+    try:
+        while any(thread.is_alive() for thread in outbox.threads):
+            for thread in outbox.threads:
+                thread.join(1)
+    except KeyboardInterrupt:
+        outbox.stop()
+
+@email_cli.command('status')
+def status():
+    """Show outbox message counts by status."""
+    counts = db.session.query(OutboxEmail.status, func.count(OutboxEmail.id)).group_by(OutboxEmail.status)
+    for name, count in counts:
+        click.echo(f'{name}: {count}')
@@ -0,0 +1,26 @@
+﻿import sys
+import click
+from flask.cli import AppGroup
+from app.services.export_service import EXPORT_KINDS, ExportService
+from app.utils.export import EXPORT_FORMATS, export_stream
+
+export_cli = AppGroup('export', help='Stream vacancies or applications to a file.')
+
+@export_cli.command('run')
+@click.argument('kind', type=click.Choice(EXPORT_KINDS))
+@click.option('--format', 'format', type=click.Choice(EXPORT_FORMATS), default='csv', show_default=True)
+@click.option('--gzip', 'gzip', is_flag=True, help='Compress the output with gzip.')
+@click.option('--company-id', type=int, default=None, help='Only export rows of this company.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Output file; stdout by default.')
+def run_export(kind, format, gzip, company_id, output):
+    """Export all vacancies or applications as CSV or NDJSON."""
+    rows = ExportService.rows(kind, company_id=company_id)
+    chunks = export_stream(ExportService.columns(kind), rows, format=format, gzip=gzip)
+    target = open(output, 'wb') if output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            target.write(chunk)
+    finally:
+        if output:
+            target.close()
@@ -0,0 +1,12 @@
+﻿import click
+from flask.cli import AppGroup
+from app.services.location_service import LocationService
+
+locations_cli = AppGroup('locations', help='Manage normalized vacancy locations.')
+
+@locations_cli.command('backfill')
+@click.option('--batch-size', default=1000, show_default=True)
+def backfill_locations(batch_size):
+    """Link existing vacancies to normalized locations."""
+    updated = LocationService.backfill(batch_size=batch_size)
+    click.echo(f'Linked {updated} vacancies to normalized locations')
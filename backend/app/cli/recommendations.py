@@ -0,0 +1,13 @@
+﻿import click
+from flask.cli import AppGroup
+from app.services.recommendation_service import RecommendationService
+
+recommendations_cli = AppGroup('recommendations', help='Manage the vacancy recommendation matrix.')
+
+@recommendations_cli.command('rebuild')
+def rebuild_recommendations():
+    """Rebuild the TF-IDF matrix and report its size."""
+    if not RecommendationService.enabled():
+        raise click.ClickException('Recommendations are disabled (RECOMMENDATIONS_ENABLED=false)')
+    engine = RecommendationService.rebuild()
+    click.echo(f'Indexed {engine.size} vacancies, {len(engine.vocabulary)} terms')
@@ -0,0 +1,17 @@
+﻿import click
+from flask import current_app
+from flask.cli import AppGroup
+
+replicas_cli = AppGroup('replicas', help='Inspect read replicas.')
+
+@replicas_cli.command('status')
+def replica_status():
+    """Probe every configured read replica and show its health and lag."""
+    replicas = current_app.extensions.get('read_replicas')
+    if replicas is None:
+        click.echo('No read replicas configured (set READ_REPLICA_URLS)')
+        return
+    for replica in replicas.status():
+        lag = 'n/a' if replica['lag'] is None else f'{replica["lag"]:.1f}s'
+        state = 'healthy' if replica['healthy'] else 'down'
+        click.echo(f'{replica["name"]}  {state}  lag {lag}  {replica["url"]}')
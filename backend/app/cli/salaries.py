@@ -0,0 +1,20 @@
+﻿import click
+from flask.cli import AppGroup
+from app.services.salary_service import SalaryService, base_currency
+
+salaries_cli = AppGroup('salaries', help='Manage exchange rates and normalized salaries.')
+
+@salaries_cli.command('set-rate')
+@click.argument('currency')
+@click.argument('rate', type=float)
+def set_rate(currency, rate):
+    """Store RATE base-currency units per CURRENCY unit and recompute salaries."""
+    updated = SalaryService.set_rate(currency, rate)
+    click.echo(f'1 {currency.upper()} = {rate} {base_currency()}; recomputed {updated} vacancies')
+
+@salaries_cli.command('recompute')
+@click.option('--currency', default=None, help='Only recompute vacancies in this currency.')
+def recompute(currency):
+    """Recompute normalized salaries from the exchange-rate table."""
+    updated = SalaryService.recompute(currency)
+    click.echo(f'Recomputed {updated} vacancies')
@@ -0,0 +1,17 @@
+﻿import click
+from flask.cli import AppGroup
+from app.services.fulltext_service import FullTextService
+
+search_cli = AppGroup('search', help='Manage the vacancy full-text index.')
+
+@search_cli.command('install')
+def install_index():
+    """Create the full-text index for the current database and fill it."""
+    backend = FullTextService.install()
+    click.echo(f'Installed {backend.name} full-text index')
+
+@search_cli.command('rebuild')
+def rebuild_index():
+    """Rebuild the full-text index from the vacancies table."""
+    backend = FullTextService.rebuild()
+    click.echo(f'Rebuilt {backend.name} full-text index')
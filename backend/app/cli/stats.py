@@ -0,0 +1,13 @@
+﻿import click
+from flask.cli import AppGroup
+from app.services.stats_service import StatsService
+
+stats_cli = AppGroup('stats', help='Manage platform statistics counters.')
+
+@stats_cli.command('reconcile')
+def reconcile_stats():
+    """Recount every statistics counter from the source tables."""
+    drift = StatsService.reconcile()
+    for key, difference in sorted(drift.items()):
+        click.echo(f'{key}: {difference:+d}')
+    click.echo(f'Reconciled statistics, {len(drift)} counters corrected')
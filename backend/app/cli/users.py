@@ -0,0 +1,48 @@
+﻿import json
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app.models.user import User
+from app.services.identity_service import IdentityService
+from app.services.import_service import IMPORT_FORMATS, parse_rows
+from app.services.provisioning_service import UserProvisioningService
+
+users_cli = AppGroup('users', help='Bulk user provisioning.')
+
+@users_cli.command('provision')
+@click.argument('source', type=click.File('rb'))
+@click.option('--format', 'format', type=click.Choice(IMPORT_FORMATS), default=None,
+              help='Input format; guessed from the file extension by default.')
+@click.option('--welcome', is_flag=True, help='Queue a welcome email for every created user.')
+@click.option('--batch-size', default=500, show_default=True)
+@click.option('--processes', type=int, default=None,
+              help='Hashing processes; PROVISIONING_HASH_PROCESSES by default.')
+def provision_users(source, format, welcome, batch_size, processes):
+    """Create users from an NDJSON or CSV file (- for stdin)."""
+    format = format or ('csv' if source.name.endswith('.csv') else 'ndjson')
+    if processes:
+        # Nothing else hashes in this process, so it may take more cores.
+        current_app.extensions['password_hasher'].bulk_workers = processes
+    result = UserProvisioningService.provision(
+        parse_rows(source, format), send_welcome=welcome, batch_size=batch_size
+    )
+    click.echo(json.dumps(result.to_dict(), ensure_ascii=False, indent=2))
+
+@users_cli.command('deactivate')
+@click.argument('email')
+def deactivate_user(email):
+    """Deactivate a user; their tokens stop working within IDENTITY_SYNC_INTERVAL."""
+    set_active(email, False)
+
+@users_cli.command('activate')
+@click.argument('email')
+def activate_user(email):
+    """Reactivate a user; they need to log in again."""
+    set_active(email, True)
+
+def set_active(email, active):
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        raise click.ClickException(f'No user with email {email}')
+    IdentityService.set_active(user, active)
+    click.echo(f'{email} is now {"active" if active else "deactivated"}')
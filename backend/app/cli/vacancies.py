@@ -0,0 +1,25 @@
+﻿import json
+import click
+from flask.cli import AppGroup
+from app.models.user import User
+from app.services.import_service import IMPORT_FORMATS, VacancyImportService, parse_rows
+
+vacancies_cli = AppGroup('vacancies', help='Bulk vacancy import.')
+
+@vacancies_cli.command('import')
+@click.argument('source', type=click.File('rb'))
+@click.option('--employer', 'email', required=True, help='Email of the employer that owns the vacancies.')
+@click.option('--format', 'format', type=click.Choice(IMPORT_FORMATS), default=None,
+              help='Input format; guessed from the file extension by default.')
+@click.option('--upsert', is_flag=True, help='Update vacancies whose external_id already exists.')
+@click.option('--batch-size', default=1000, show_default=True)
+def import_vacancies(source, email, format, upsert, batch_size):
+    """Import vacancies from an NDJSON or CSV file (- for stdin)."""
+    user = User.query.filter_by(email=email).first()
+    if user is None or user.company is None:
+        raise click.ClickException(f'No employer with a company for {email}')
+    format = format or ('csv' if source.name.endswith('.csv') else 'ndjson')
+    result = VacancyImportService.import_vacancies(
+        user, user.company, parse_rows(source, format), upsert=upsert, batch_size=batch_size
+    )
+    click.echo(json.dumps(result.to_dict(), ensure_ascii=False, indent=2))
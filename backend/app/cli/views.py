@@ -0,0 +1,11 @@
+﻿import click
+from flask.cli import AppGroup
+from app.services.view_counter import ViewCounterService
+
+views_cli = AppGroup('views', help='Manage buffered vacancy view counts.')
+
+@views_cli.command('flush')
+def flush_views():
+    """Write pending view increments to the database."""
+    flushed = ViewCounterService.flush()
+    click.echo(f'Flushed view counts for {flushed} vacancies')
@@ -1,10 +1,23 @@
 ﻿import os
 from datetime import timedelta
 
+def engine_options(prefix):
+    """Pool settings for one engine from ``<prefix>_POOL_*`` variables; unset ones keep SQLAlchemy's defaults."""
+    options = {}
+    for option, name in (('pool_size', 'POOL_SIZE'), ('max_overflow', 'MAX_OVERFLOW'),
+                         ('pool_timeout', 'POOL_TIMEOUT'), ('pool_recycle', 'POOL_RECYCLE')):
+        value = os.environ.get(f'{prefix}_{name}')
+        if value:
+            options[option] = int(value)
+    if os.environ.get(f'{prefix}_POOL_PRE_PING'):
+        options['pool_pre_ping'] = os.environ[f'{prefix}_POOL_PRE_PING'].lower() == 'true'
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///careerfinder.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options('DATABASE')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), '../../uploads')
@@ -12,10 +25,57 @@ class Config:
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
-    MAIL_USE_TLS = True
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() == 'true'
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', MAIL_USERNAME or 'no-reply@careerfinder.local')
+    MAIL_SUPPRESS_SEND = os.environ.get('MAIL_SUPPRESS_SEND', 'false' if MAIL_USERNAME else 'true').lower() == 'true'
+    MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT', 30))
+    EMAIL_WORKERS = int(os.environ.get('EMAIL_WORKERS', 2))
+    EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 50))
+    EMAIL_POLL_INTERVAL = int(os.environ.get('EMAIL_POLL_INTERVAL', 5))
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 6))
+    EMAIL_RETRY_BACKOFF = int(os.environ.get('EMAIL_RETRY_BACKOFF', 30))
+    EMAIL_CLAIM_TIMEOUT = int(os.environ.get('EMAIL_CLAIM_TIMEOUT', 300))
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+    SEARCH_TS_CONFIG = os.environ.get('SEARCH_TS_CONFIG', 'simple')
+    SEARCH_IN_MEMORY_INDEX = os.environ.get('SEARCH_IN_MEMORY_INDEX', 'false').lower() == 'true'
+    SEARCH_INDEX_SYNC_INTERVAL = int(os.environ.get('SEARCH_INDEX_SYNC_INTERVAL', 30))
+    LOCATION_SIMILARITY_THRESHOLD = float(os.environ.get('LOCATION_SIMILARITY_THRESHOLD', 0.5))
+    FACETS_CACHE_TTL = int(os.environ.get('FACETS_CACHE_TTL', 60))
+    VIEW_COUNTER_BACKEND = os.environ.get('VIEW_COUNTER_BACKEND', 'memory')
+    VIEW_COUNTER_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL', 10))
+    # 'memory' only invalidates within one process: use 'redis' with more than one worker.
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 60))
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 2048))
+    RECOMMENDATIONS_ENABLED = os.environ.get('RECOMMENDATIONS_ENABLED', 'true').lower() == 'true'
+    RECOMMENDATION_SYNC_INTERVAL = int(os.environ.get('RECOMMENDATION_SYNC_INTERVAL', 60))
+    RECOMMENDATION_COMPACT_THRESHOLD = int(os.environ.get('RECOMMENDATION_COMPACT_THRESHOLD', 2000))
+    APPLICANT_SCORES_CACHE_SIZE = int(os.environ.get('APPLICANT_SCORES_CACHE_SIZE', 256))
+    APPLICANT_SCORES_CACHE_TTL = int(os.environ.get('APPLICANT_SCORES_CACHE_TTL', 3600))
+    SALARY_BASE_CURRENCY = os.environ.get('SALARY_BASE_CURRENCY', 'RUB')
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 16))
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+    PROVISIONING_TOKEN = os.environ.get('PROVISIONING_TOKEN')
+    PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 10000))
+    PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', 30))
+    IDENTITY_SYNC_INTERVAL = int(os.environ.get('IDENTITY_SYNC_INTERVAL', 10))
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.environ.get('METRICS_N_PLUS_ONE_THRESHOLD', 10))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    PROVISIONING_HASH_PROCESSES = int(os.environ.get('PROVISIONING_HASH_PROCESSES', 0)) or None
+    READ_REPLICA_URLS = [url.strip() for url in os.environ.get('READ_REPLICA_URLS', '').split(',') if url.strip()]
+    READ_REPLICA_ENGINE_OPTIONS = engine_options('READ_REPLICA')
+    READ_REPLICA_STICKY_SECONDS = float(os.environ.get('READ_REPLICA_STICKY_SECONDS', 5))
+    READ_REPLICA_HEALTH_INTERVAL = float(os.environ.get('READ_REPLICA_HEALTH_INTERVAL', 5))
+    READ_REPLICA_MAX_LAG = float(os.environ.get('READ_REPLICA_MAX_LAG', 10))
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+    ASYNC_ENGINE_OPTIONS = engine_options('ASYNC_DATABASE')
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 10))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -26,3 +86,9 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    VIEW_COUNTER_FLUSH_INTERVAL = 0
+    MAIL_SUPPRESS_SEND = True
+    EMAIL_WORKERS = 0
+    PASSWORD_HASH_WORKERS = 0
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    READ_REPLICA_URLS = []
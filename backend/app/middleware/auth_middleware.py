@@ -1,7 +1,7 @@
 ﻿from functools import wraps
 from flask import request, jsonify
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from app.models.user import User
+from flask_jwt_extended import verify_jwt_in_request
+from app.services.identity_service import IdentityService
 
 def token_required(f):
     @wraps(f)
@@ -18,10 +18,9 @@ def employer_required(f):
     def decorated(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            principal = IdentityService.current()
             
-            if not user or user.user_type != 'employer':
+            if not principal or principal.user_type != 'employer':
                 return jsonify({'message': 'Employer access required'}), 403
                 
         except:
@@ -35,10 +34,9 @@ def job_seeker_required(f):
     def decorated(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
+            principal = IdentityService.current()
             
-            if not user or user.user_type != 'job_seeker':
+            if not principal or principal.user_type != 'job_seeker':
                 return jsonify({'message': 'Job seeker access required'}), 403
                 
         except:
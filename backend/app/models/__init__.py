@@ -3,5 +3,10 @@ from .company import Company
 from .vacancy import Vacancy
 from .profile import Profile
 from .application import Application
+from .location import Location
+from .platform_stat import PlatformStat
+from .exchange_rate import ExchangeRate
+from .outbox_email import OutboxEmail
 
-__all__ = ['User', 'Company', 'Vacancy', 'Profile', 'Application']
+__all__ = ['User', 'Company', 'Vacancy', 'Profile', 'Application', 'Location', 'PlatformStat', 'ExchangeRate',
+           'OutboxEmail']
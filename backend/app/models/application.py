@@ -14,6 +14,13 @@ class Application(db.Model):
     vacancy_id = db.Column(db.Integer, db.ForeignKey('vacancies.id'), nullable=False)
     applicant_id = db.Column(db.Integer, db.ForeignKey('profiles.id'), nullable=False)
     
+    __table_args__ = (
+        db.Index('ix_applications_vacancy_status_applied', 'vacancy_id', 'status', 'applied_at'),
+        # "My applications", newest first.
+        db.Index('ix_applications_applicant_applied', 'applicant_id', 'applied_at'),
+        db.UniqueConstraint('vacancy_id', 'applicant_id', name='uq_applications_vacancy_applicant'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
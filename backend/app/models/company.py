@@ -16,12 +16,12 @@ class Company(db.Model):
     company_size = db.Column(db.String(50))
     founded_year = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     is_verified = db.Column(db.Boolean, default=False)
     
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
-    def to_dict(self):
+    def to_dict(self, vacancies_count=None):
         return {
             'id': self.id,
             'name': self.name,
@@ -38,7 +38,7 @@ class Company(db.Model):
             'updated_at': self.updated_at.isoformat(),
             'is_verified': self.is_verified,
             'user_id': self.user_id,
-            'vacancies_count': self.vacancies.count()
+            'vacancies_count': self.vacancies.count() if vacancies_count is None else vacancies_count
         }
     
     def __repr__(self):
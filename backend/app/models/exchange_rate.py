@@ -0,0 +1,20 @@
+﻿from app import db
+from datetime import datetime
+
+class ExchangeRate(db.Model):
+    __tablename__ = 'exchange_rates'
+    
+    currency = db.Column(db.String(3), primary_key=True)
+    # Units of the base currency for one unit of ``currency``.
+    rate = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'currency': self.currency,
+            'rate': self.rate,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ExchangeRate {self.currency}={self.rate}>'
@@ -0,0 +1,20 @@
+﻿from app import db
+from datetime import datetime
+
+class Location(db.Model):
+    __tablename__ = 'locations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    search_key = db.Column(db.String(200), unique=True, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'search_key': self.search_key
+        }
+    
+    def __repr__(self):
+        return f'<Location {self.name}>'
@@ -0,0 +1,19 @@
+﻿from app import db
+from datetime import datetime
+
+class PlatformStat(db.Model):
+    __tablename__ = 'platform_stats'
+    
+    key = db.Column(db.String(120), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'value': self.value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<PlatformStat {self.key}={self.value}>'
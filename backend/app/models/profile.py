@@ -24,16 +24,20 @@ class Profile(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     applications = db.relationship('Application', backref='applicant', lazy='dynamic', cascade='all, delete-orphan')
     
+    @property
+    def full_name(self):
+        return f'{self.first_name or ""} {self.last_name or ""}'.strip()
+    
     def to_dict(self):
         return {
             'id': self.id,
             'first_name': self.first_name,
             'last_name': self.last_name,
-            'full_name': f'{self.first_name or ""} {self.last_name or ""}'.strip(),
+            'full_name': self.full_name,
             'phone': self.phone,
             'location': self.location,
             'bio': self.bio,
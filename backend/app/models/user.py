@@ -1,5 +1,5 @@
-﻿from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+﻿from flask import current_app
+from app import db
 from datetime import datetime
 import jwt
 from time import time
@@ -21,13 +21,22 @@ class User(db.Model):
     profile = db.relationship('Profile', backref='user', uselist=False, cascade='all, delete-orphan')
     company = db.relationship('Company', backref='user', uselist=False, cascade='all, delete-orphan')
     vacancies = db.relationship('Vacancy', backref='employer', lazy='dynamic')
-    applications = db.relationship('Application', backref='user', lazy='dynamic')
+    applications = db.relationship(
+        'Application', secondary='profiles',
+        primaryjoin='User.id == Profile.user_id',
+        secondaryjoin='Profile.id == Application.applicant_id',
+        viewonly=True, lazy='dynamic'
+    )
+    
+    __table_args__ = (
+        db.Index('ix_users_active_updated', 'is_active', 'updated_at'),
+    )
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = current_app.extensions['password_hasher'].hash(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return current_app.extensions['password_hasher'].verify(self.password_hash, password)
     
     def get_reset_password_token(self, expires_in=600):
         return jwt.encode(
@@ -41,7 +50,7 @@ class User(db.Model):
             id = jwt.decode(token, Config.SECRET_KEY, algorithms=['HS256'])['reset_password']
         except:
             return
-        return User.query.get(id)
+        return db.session.get(User, id)
     
     def to_dict(self):
         return {
@@ -1,6 +1,10 @@
 ﻿from app import db
 from datetime import datetime
 
+# Stored as salary_max_base when a vacancy has no upper bound, so range
+# filters stay plain comparisons on an indexed column.
+SALARY_UNBOUNDED = 2 ** 31 - 1
+
 class Vacancy(db.Model):
     __tablename__ = 'vacancies'
     
@@ -11,21 +15,38 @@ class Vacancy(db.Model):
     salary_from = db.Column(db.Integer)
     salary_to = db.Column(db.Integer)
     currency = db.Column(db.String(3), default='RUB')
+    # Salary range converted to the base currency; both are NULL when no
+    # salary is given. See SalaryService.
+    salary_min_base = db.Column(db.Integer)
+    salary_max_base = db.Column(db.Integer)
     location = db.Column(db.String(100))
     employment_type = db.Column(db.String(50))
     experience_level = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     is_active = db.Column(db.Boolean, default=True)
     views_count = db.Column(db.Integer, default=0)
+    # Identifier in the employer's own system, used by bulk imports.
+    external_id = db.Column(db.String(100))
     
     employer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.id'), index=True)
     
     company = db.relationship('Company', backref=db.backref('vacancies', lazy='dynamic'))
     applications = db.relationship('Application', backref='vacancy', lazy='dynamic', cascade='all, delete-orphan')
+    normalized_location = db.relationship('Location')
+    
+    __table_args__ = (
+        # Listings: active vacancies, newest first, with (created_at, id)
+        # as the keyset.
+        db.Index('ix_vacancies_active_created', 'is_active', 'created_at', 'id'),
+        # "Pays at least N" is the common filter, so the upper bound leads.
+        db.Index('ix_vacancies_salary_range', 'is_active', 'salary_max_base', 'salary_min_base'),
+        db.UniqueConstraint('company_id', 'external_id', name='uq_vacancies_company_external_id'),
+    )
     
-    def to_dict(self):
+    def to_dict(self, company=None, applications_count=None):
         return {
             'id': self.id,
             'title': self.title,
@@ -34,17 +55,21 @@ class Vacancy(db.Model):
             'salary_from': self.salary_from,
             'salary_to': self.salary_to,
             'currency': self.currency,
+            'salary_min_base': self.salary_min_base,
+            'salary_max_base': self.salary_max_base if self.salary_max_base != SALARY_UNBOUNDED else None,
             'location': self.location,
+            'location_id': self.location_id,
             'employment_type': self.employment_type,
             'experience_level': self.experience_level,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'is_active': self.is_active,
             'views_count': self.views_count,
+            'external_id': self.external_id,
             'employer_id': self.employer_id,
             'company_id': self.company_id,
-            'company': self.company.to_dict() if self.company else None,
-            'applications_count': self.applications.count()
+            'company': company if company is not None else (self.company.to_dict() if self.company else None),
+            'applications_count': self.applications.count() if applications_count is None else applications_count
         }
     
     def __repr__(self):
@@ -1,24 +1,50 @@
-﻿from flask import Blueprint, jsonify
-from app.models.vacancy import Vacancy
-from app.models.company import Company
+﻿import secrets
+from flask import Blueprint, Response, current_app, jsonify, request
+from app.services.read_replicas import read_replica
+from app.services.stats_service import StatsNotSeeded, StatsService, ACTIVE_VACANCIES, TOTAL_COMPANIES
 
 api_bp = Blueprint('api', __name__)
 
 @api_bp.route('/stats', methods=['GET'])
+@read_replica
 def get_stats():
     try:
-        total_vacancies = Vacancy.query.filter_by(is_active=True).count()
-        total_companies = Company.query.count()
+        stats = StatsService.values([ACTIVE_VACANCIES, TOTAL_COMPANIES])
         
-        return jsonify({
-            'total_vacancies': total_vacancies,
-            'total_companies': total_companies,
+        response = {
+            'total_vacancies': stats[ACTIVE_VACANCIES],
+            'total_companies': stats[TOTAL_COMPANIES],
             'status': 'success'
-        }), 200
+        }
         
+        if request.args.get('extended', 'false').lower() == 'true':
+            response['vacancies_per_industry'] = StatsService.vacancies_per_industry()
+            response['applications_per_day'] = StatsService.applications_per_day()
+        
+        return jsonify(response), 200
+        
+    except StatsNotSeeded as e:
+        current_app.logger.error(f'Get stats error: {str(e)}')
+        return jsonify({'message': 'Statistics are not available yet'}), 503
     except Exception as e:
+        current_app.logger.error(f'Get stats error: {str(e)}')
         return jsonify({'message': 'Internal server error'}), 500
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'service': 'CareerFinder API'}), 200
+
+@api_bp.route('/metrics', methods=['GET'])
+def metrics():
+    # Scrapers send METRICS_TOKEN as a bearer token (Prometheus'
+    # ``authorization`` scrape setting); with none configured the
+    # endpoint is off.
+    token = current_app.config.get('METRICS_TOKEN')
+    scheme, _, given = request.headers.get('Authorization', '').partition(' ')
+    if not token or scheme.lower() != 'bearer' or not secrets.compare_digest(given, token):
+        return jsonify({'message': 'Valid metrics token is required'}), 403
+    
+    return Response(
+        current_app.extensions['metrics'].render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -1,13 +1,26 @@
-﻿from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+﻿import secrets
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
 from app import db
 from app.models.user import User
 from app.models.profile import Profile
 from app.models.company import Company
 from app.utils.validators import validate_email, validate_password
 from app.services.auth_service import AuthService
+from app.services.email_service import EmailService
+from app.services.identity_service import IdentityService, Principal
+from app.services.password_hasher import HashingBusy
+from app.services.provisioning_service import UserProvisioningService
 
 auth_bp = Blueprint('auth', __name__)
+# Hashing is slow, so a request stays well inside proxy and worker
+# timeouts; bigger imports go through ``flask users provision``.
+MAX_PROVISIONED_USERS = 200
+
+def busy_response(error):
+    response = jsonify({'message': 'Too many sign-in requests, please retry shortly'})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -29,6 +42,10 @@ def register():
         if User.query.filter_by(username=data.get('username', '')).first():
             return jsonify({'message': 'Username already taken'}), 409
         
+        # Duplicates are turned away before hashing so they cannot use up
+        # hashing slots; the rollback returns the pooled connection so
+        # none is held while the hash runs.
+        db.session.rollback()
         user = AuthService.create_user(
             username=data.get('username', data['email'].split('@')[0]),
             email=data['email'],
@@ -49,9 +66,10 @@ def register():
             )
             db.session.add(company)
         
+        EmailService.send_welcome_email(user)
         db.session.commit()
         
-        access_token = create_access_token(identity=user.id)
+        access_token = IdentityService.create_token(Principal.from_user(user))
         
         return jsonify({
             'message': 'User registered successfully',
@@ -59,11 +77,43 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except HashingBusy as e:
+        return busy_response(e)
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f'Registration error: {str(e)}')
         return jsonify({'message': 'Internal server error'}), 500
 
+@auth_bp.route('/provision', methods=['POST'])
+def provision_users():
+    try:
+        token = current_app.config.get('PROVISIONING_TOKEN')
+        given = request.headers.get('X-Provisioning-Token', '')
+        if not token or not secrets.compare_digest(given, token):
+            return jsonify({'message': 'Valid provisioning token is required'}), 403
+        
+        data = request.get_json() or {}
+        users = data.get('users')
+        if not isinstance(users, list) or not users:
+            return jsonify({'message': 'users must be a non-empty list'}), 400
+        if len(users) > MAX_PROVISIONED_USERS:
+            return jsonify({
+                'message': f'At most {MAX_PROVISIONED_USERS} users per request; '
+                           'use the users provision command for larger imports'
+            }), 400
+        
+        records = (
+            (number, user, None) if isinstance(user, dict) else (number, None, 'Expected a JSON object')
+            for number, user in enumerate(users, start=1)
+        )
+        result = UserProvisioningService.provision(records, send_welcome=bool(data.get('send_welcome')))
+        return jsonify(result.to_dict()), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Provisioning error: {str(e)}')
+        return jsonify({'message': 'Internal server error'}), 500
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     try:
@@ -72,13 +122,13 @@ def login():
         if not data.get('email') or not data.get('password'):
             return jsonify({'message': 'Email and password are required'}), 400
         
-        user = User.query.filter_by(email=data['email']).first()
+        user = AuthService.verify_user(data['email'], data['password'])
         
-        if user and user.check_password(data['password']):
+        if user:
             if not user.is_active:
                 return jsonify({'message': 'Account is deactivated'}), 403
                 
-            access_token = create_access_token(identity=user.id)
+            access_token = IdentityService.create_token(Principal.from_user(user))
             return jsonify({
                 'access_token': access_token,
                 'user': user.to_dict()
@@ -86,6 +136,8 @@ def login():
         
         return jsonify({'message': 'Invalid email or password'}), 401
         
+    except HashingBusy as e:
+        return busy_response(e)
     except Exception as e:
         current_app.logger.error(f'Login error: {str(e)}')
         return jsonify({'message': 'Internal server error'}), 500
@@ -94,8 +146,7 @@ def login():
 @jwt_required()
 def get_current_user():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = db.session.get(User, IdentityService.current().user_id)
         
         if not user:
             return jsonify({'message': 'User not found'}), 404
@@ -110,8 +161,13 @@ def get_current_user():
 @jwt_required()
 def refresh_token():
     try:
-        user_id = get_jwt_identity()
-        access_token = create_access_token(identity=user_id)
+        # Re-read rather than copy the claims, so a refresh picks up changes.
+        principal = IdentityService.principal(IdentityService.current().user_id)
+        
+        if not principal or not principal.is_active:
+            return jsonify({'message': 'Account is deactivated'}), 403
+        
+        access_token = IdentityService.create_token(principal)
         return jsonify({'access_token': access_token}), 200
         
     except Exception as e:
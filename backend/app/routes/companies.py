@@ -1,43 +1,103 @@
 ﻿from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app import db
 from app.models.company import Company
-from app.models.user import User
+from app.services.identity_service import IdentityService
+from app.services.inbox_service import InboxService, parse_date
+from app.services.read_replicas import read_replica
+from app.services.response_cache import ResponseCache, COMPANY_LIST, company_tag
+from app.services.search_service import SearchService
+from app.services.serialization_service import SerializationService
+from app.services.validator_service import ValidatorService
+from app.utils.conditional import Validators
 
 companies_bp = Blueprint('companies', __name__)
 
+MAX_PER_PAGE = 100
+LIST_PARAMS = ('page', 'per_page', 'search', 'cursor', 'include_total')
+
 @companies_bp.route('/', methods=['GET'])
+@read_replica
 def get_companies():
     try:
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
         search = request.args.get('search', '')
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
         
-        query = Company.query
+        cache_key = ResponseCache.key(COMPANY_LIST, request.args, LIST_PARAMS)
+        cached = ResponseCache.get(cache_key)
+        if cached is not None:
+            validators = Validators.from_dict(cached['validators'])
+            if validators.matches():
+                return validators.not_modified()
+            return validators.apply(jsonify(cached['body'])), 200
         
-        if search:
-            query = query.filter(Company.name.ilike(f'%{search}%'))
+        versions = ResponseCache.versions([COMPANY_LIST])
+        validators = ValidatorService.listing(cache_key, versions)
+        if validators is not None and validators.matches():
+            return validators.not_modified()
         
-        companies = query.order_by(Company.name).paginate(
-            page=page, per_page=per_page, error_out=False
+        companies = SearchService.search_companies(
+            query=search, page=page, per_page=per_page,
+            cursor=cursor, include_total=include_total
         )
         
-        return jsonify({
-            'companies': [company.to_dict() for company in companies.items],
-            'total': companies.total,
-            'pages': companies.pages,
-            'current_page': page
-        }), 200
+        if cursor is not None:
+            response = {
+                'companies': SerializationService.serialize_companies(companies.items),
+                'next_cursor': companies.next_cursor
+            }
+            if include_total:
+                response['total'] = companies.total
+        else:
+            response = {
+                'companies': SerializationService.serialize_companies(companies.items),
+                'total': companies.total,
+                'pages': companies.pages,
+                'current_page': page
+            }
+        
+        if validators is None:
+            return jsonify(response), 200
+        ResponseCache.set(cache_key, {'body': response, 'validators': validators.to_dict()}, versions)
+        
+        return validators.apply(jsonify(response)), 200
         
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f'Get companies error: {str(e)}')
         return jsonify({'message': 'Internal server error'}), 500
 
 @companies_bp.route('/<int:company_id>', methods=['GET'])
+@read_replica
 def get_company(company_id):
     try:
-        company = Company.query.get_or_404(company_id)
-        return jsonify({'company': company.to_dict()}), 200
+        cache_key = ResponseCache.key(company_tag(company_id))
+        cached = ResponseCache.get(cache_key)
+        
+        if cached is None:
+            versions = ResponseCache.versions([company_tag(company_id)])
+            validators = ValidatorService.company(company_id)
+            
+            if validators is None:
+                return jsonify({'message': 'Company not found'}), 404
+            
+            if validators.matches():
+                return validators.not_modified()
+            
+            company = db.session.get(Company, company_id)
+            data = SerializationService.serialize_company(company)
+            ResponseCache.set(cache_key, {'body': data, 'validators': validators.to_dict()}, versions)
+        else:
+            data = cached['body']
+            validators = Validators.from_dict(cached['validators'])
+            if validators.matches():
+                return validators.not_modified()
+        
+        return validators.apply(jsonify({'company': data})), 200
         
     except Exception as e:
         current_app.logger.error(f'Get company error: {str(e)}')
@@ -47,30 +107,58 @@ def get_company(company_id):
 @jwt_required()
 def get_my_company():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        company_id = IdentityService.current().company_id
+        company = db.session.get(Company, company_id) if company_id else None
         
-        if not user.company:
+        if not company:
             return jsonify({'message': 'Company not found'}), 404
         
-        return jsonify({'company': user.company.to_dict()}), 200
+        return jsonify({'company': SerializationService.serialize_company(company)}), 200
         
     except Exception as e:
         current_app.logger.error(f'Get my company error: {str(e)}')
         return jsonify({'message': 'Internal server error'}), 500
 
+@companies_bp.route('/my-company/applications', methods=['GET'])
+@jwt_required()
+def get_company_applications():
+    try:
+        company_id = IdentityService.current().company_id
+        company = db.session.query(Company.id, Company.name).filter(Company.id == company_id).first()
+        
+        if not company:
+            return jsonify({'message': 'Company not found'}), 404
+        
+        status = request.args.get('status', '')
+        inbox = InboxService.applications(
+            company,
+            statuses=[value.strip() for value in status.split(',') if value.strip()],
+            vacancy_id=request.args.get('vacancy_id', type=int),
+            applied_from=parse_date(request.args.get('applied_from'), 'applied_from'),
+            applied_to=parse_date(request.args.get('applied_to'), 'applied_to'),
+            cursor=request.args.get('cursor'),
+            per_page=min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
+        )
+        
+        return jsonify(inbox), 200
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f'Get company applications error: {str(e)}')
+        return jsonify({'message': 'Internal server error'}), 500
+
 @companies_bp.route('/my-company', methods=['PUT'])
 @jwt_required()
 def update_company():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        company_id = IdentityService.current().company_id
+        company = db.session.get(Company, company_id) if company_id else None
         
-        if not user.company:
+        if not company:
             return jsonify({'message': 'Company not found'}), 404
         
         data = request.get_json()
-        company = user.company
         
         # Update fields
         if 'name' in data:
@@ -96,7 +184,7 @@ def update_company():
         
         return jsonify({
             'message': 'Company updated successfully',
-            'company': company.to_dict()
+            'company': SerializationService.serialize_company(company)
         }), 200
         
     except Exception as e:
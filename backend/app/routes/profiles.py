@@ -1,22 +1,34 @@
 ﻿from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app import db
 from app.models.profile import Profile
-from app.models.user import User
+from app.models.application import Application
+from app.services.identity_service import IdentityService
+from app.services.recommendation_service import RecommendationService
+from app.services.search_service import SearchService
+from app.services.serialization_service import SerializationService
+from app.services.validator_service import ValidatorService
 
 profiles_bp = Blueprint('profiles', __name__)
 
+MAX_RECOMMENDATIONS = 100
+
 @profiles_bp.route('/my-profile', methods=['GET'])
 @jwt_required()
 def get_my_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user_id = IdentityService.current().user_id
+        validators = ValidatorService.profile(user_id)
         
-        if not user.profile:
+        if validators is None:
             return jsonify({'message': 'Profile not found'}), 404
         
-        return jsonify({'profile': user.profile.to_dict()}), 200
+        if validators.matches():
+            return validators.not_modified(private=True)
+        
+        profile = Profile.query.filter_by(user_id=user_id).first()
+        
+        return validators.apply(jsonify({'profile': profile.to_dict()}), private=True), 200
         
     except Exception as e:
         current_app.logger.error(f'Get profile error: {str(e)}')
@@ -26,14 +38,13 @@ def get_my_profile():
 @jwt_required()
 def update_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        profile_id = IdentityService.current().profile_id
+        profile = db.session.get(Profile, profile_id) if profile_id else None
         
-        if not user.profile:
+        if not profile:
             return jsonify({'message': 'Profile not found'}), 404
         
         data = request.get_json()
-        profile = user.profile
         
         # Update fields
         if 'first_name' in data:
@@ -83,20 +94,54 @@ def update_profile():
 @jwt_required()
 def get_my_applications():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user_id = IdentityService.current().user_id
+        validators = ValidatorService.applications(user_id)
         
-        if not user.profile:
+        if validators is None:
             return jsonify({'message': 'Profile not found'}), 404
         
-        applications = user.profile.applications.order_by(
-            db.desc('applied_at')
-        ).all()
+        if validators.matches():
+            return validators.not_modified(private=True)
+        
+        applications = Application.query.join(Profile).filter(
+            Profile.user_id == user_id
+        ).options(
+            *SerializationService.application_load_options()
+        ).order_by(Application.applied_at.desc()).all()
+        
+        return validators.apply(jsonify({
+            'applications': SerializationService.serialize_applications(applications)
+        }), private=True), 200
+        
+    except Exception as e:
+        current_app.logger.error(f'Get applications error: {str(e)}')
+        return jsonify({'message': 'Internal server error'}), 500
+
+@profiles_bp.route('/recommendations', methods=['GET'])
+@jwt_required()
+def get_recommendations():
+    try:
+        profile_id = IdentityService.current().profile_id
+        profile = db.session.get(Profile, profile_id) if profile_id else None
+        
+        if not profile:
+            return jsonify({'message': 'Profile not found'}), 404
+        
+        if not RecommendationService.enabled():
+            return jsonify({'message': 'Recommendations are disabled'}), 503
+        
+        limit = min(request.args.get('limit', 20, type=int), MAX_RECOMMENDATIONS)
+        matches = RecommendationService.recommend_for_profile(profile, limit=max(limit, 1))
+        vacancies = SearchService.load_vacancies([vacancy_id for vacancy_id, _ in matches])
+        serialized = {item['id']: item for item in SerializationService.serialize_vacancies(vacancies)}
         
         return jsonify({
-            'applications': [app.to_dict() for app in applications]
+            'recommendations': [
+                {'score': round(score, 4), 'vacancy': serialized[vacancy_id]}
+                for vacancy_id, score in matches if vacancy_id in serialized
+            ]
         }), 200
         
     except Exception as e:
-        current_app.logger.error(f'Get applications error: {str(e)}')
+        current_app.logger.error(f'Get recommendations error: {str(e)}')
         return jsonify({'message': 'Internal server error'}), 500
@@ -1,66 +1,152 @@
-﻿from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_
+﻿from flask import Blueprint, Response, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from sqlalchemy.exc import IntegrityError
 from app import db
+from app.models.company import Company
 from app.models.vacancy import Vacancy
 from app.models.user import User
 from app.models.application import Application
+from app.services.email_service import EmailService
+from app.services.export_service import ExportService
+from app.services.facet_service import FacetService
+from app.services.identity_service import IdentityService
+from app.services.import_service import IMPORT_FORMATS, VacancyImportService, parse_rows
+from app.services.ranking_service import RankingService
+from app.services.read_replicas import read_replica
+from app.services.response_cache import ResponseCache, VACANCY_LIST, company_tag, vacancy_tag
+from app.services.salary_service import SalaryService
+from app.services.search_service import SearchService
+from app.services.serialization_service import SerializationService
+from app.services.validator_service import ValidatorService
+from app.services.view_counter import ViewCounterService
+from app.utils.conditional import Validators
+from app.utils.export import EXPORT_FORMATS, export_stream
 
 vacancies_bp = Blueprint('vacancies', __name__)
 
+MAX_PER_PAGE = 100
+IMPORT_BATCH_SIZE = 1000
+LIST_PARAMS = (
+    'page', 'per_page', 'search', 'location', 'employment_type', 'experience_level', 'cursor',
+    'include_total', 'facets', 'salary_currency', 'min_salary', 'max_salary'
+)
+
 @vacancies_bp.route('/', methods=['GET'])
+@read_replica
 def get_vacancies():
     try:
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
         search = request.args.get('search', '')
         location = request.args.get('location', '')
         employment_type = request.args.get('employment_type', '')
+        experience_level = request.args.get('experience_level', '')
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
+        with_facets = request.args.get('facets', 'false').lower() == 'true'
+        salary_currency = request.args.get('salary_currency')
+        min_salary = SalaryService.to_base(request.args.get('min_salary', type=int), salary_currency)
+        max_salary = SalaryService.to_base(request.args.get('max_salary', type=int), salary_currency)
         
-        query = Vacancy.query.filter_by(is_active=True)
-        
-        if search:
-            query = query.filter(
-                or_(
-                    Vacancy.title.ilike(f'%{search}%'),
-                    Vacancy.description.ilike(f'%{search}%'),
-                    Vacancy.requirements.ilike(f'%{search}%')
-                )
-            )
+        cache_key = ResponseCache.key(VACANCY_LIST, request.args, LIST_PARAMS)
+        cached = ResponseCache.get(cache_key)
+        if cached is not None:
+            validators = Validators.from_dict(cached['validators'])
+            if validators.matches():
+                return validators.not_modified()
+            return validators.apply(jsonify(cached['body'])), 200
         
-        if location:
-            query = query.filter(Vacancy.location.ilike(f'%{location}%'))
-            
-        if employment_type:
-            query = query.filter(Vacancy.employment_type == employment_type)
+        versions = ResponseCache.versions([VACANCY_LIST])
+        validators = ValidatorService.listing(cache_key, versions)
+        if validators is not None and validators.matches():
+            return validators.not_modified()
         
-        vacancies = query.order_by(Vacancy.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+        vacancies = SearchService.search_vacancies(
+            query=search,
+            location=location,
+            employment_type=employment_type,
+            experience_level=experience_level,
+            page=page,
+            per_page=per_page,
+            cursor=cursor,
+            include_total=include_total,
+            min_salary=min_salary,
+            max_salary=max_salary
         )
         
-        return jsonify({
-            'vacancies': [vacancy.to_dict() for vacancy in vacancies.items],
-            'total': vacancies.total,
-            'pages': vacancies.pages,
-            'current_page': page
-        }), 200
+        if cursor is not None:
+            response = {
+                'vacancies': SerializationService.serialize_vacancies(vacancies.items),
+                'next_cursor': vacancies.next_cursor
+            }
+            if include_total:
+                response['total'] = vacancies.total
+        else:
+            response = {
+                'vacancies': SerializationService.serialize_vacancies(vacancies.items),
+                'total': vacancies.total,
+                'pages': vacancies.pages,
+                'current_page': page
+            }
+        
+        if with_facets:
+            response['facets'] = FacetService.vacancy_facets(
+                query=search,
+                location=location,
+                employment_type=employment_type,
+                experience_level=experience_level,
+                min_salary=min_salary,
+                max_salary=max_salary
+            )
         
+        if validators is None:
+            return jsonify(response), 200
+        ResponseCache.set(cache_key, {'body': response, 'validators': validators.to_dict()}, versions)
+        
+        return validators.apply(jsonify(response)), 200
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f'Get vacancies error: {str(e)}')
         return jsonify({'message': 'Internal server error'}), 500
 
 @vacancies_bp.route('/<int:vacancy_id>', methods=['GET'])
+@read_replica
 def get_vacancy(vacancy_id):
     try:
-        vacancy = Vacancy.query.get_or_404(vacancy_id)
+        cache_key = ResponseCache.key(vacancy_tag(vacancy_id))
+        cached = ResponseCache.get(cache_key)
         
-        if not vacancy.is_active:
-            return jsonify({'message': 'Vacancy not found'}), 404
+        if cached is None:
+            # Moving the vacancy to another company bumps its own tag, so
+            # the company looked up here cannot go stale unnoticed.
+            company_id = db.session.query(Vacancy.company_id).filter(Vacancy.id == vacancy_id).scalar()
+            versions = ResponseCache.versions([vacancy_tag(vacancy_id), company_tag(company_id)])
+            validators = ValidatorService.vacancy(vacancy_id) if company_id is not None else None
+            
+            if validators is None:
+                return jsonify({'message': 'Vacancy not found'}), 404
+            
+            if validators.matches():
+                ViewCounterService.record(vacancy_id)
+                return validators.not_modified()
+            
+            vacancy = db.session.get(Vacancy, vacancy_id)
+            data = SerializationService.serialize_vacancy(vacancy)
+            ResponseCache.set(cache_key, {'body': data, 'validators': validators.to_dict()}, versions)
+        else:
+            data = cached['body']
+            validators = Validators.from_dict(cached['validators'])
         
-        vacancy.views_count += 1
-        db.session.commit()
+        ViewCounterService.record(vacancy_id)
+        
+        if validators.matches():
+            return validators.not_modified()
         
-        return jsonify({'vacancy': vacancy.to_dict()}), 200
+        data = dict(data, views_count=ViewCounterService.views_count(vacancy_id, data['views_count']))
+        
+        return validators.apply(jsonify({'vacancy': data})), 200
         
     except Exception as e:
         current_app.logger.error(f'Get vacancy error: {str(e)}')
@@ -70,13 +156,12 @@ def get_vacancy(vacancy_id):
 @jwt_required()
 def create_vacancy():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        principal = IdentityService.current()
         
-        if user.user_type != 'employer':
+        if principal.user_type != 'employer':
             return jsonify({'message': 'Only employers can create vacancies'}), 403
         
-        if not user.company:
+        if not principal.company_id:
             return jsonify({'message': 'Please create a company profile first'}), 400
         
         data = request.get_json()
@@ -90,8 +175,8 @@ def create_vacancy():
             location=data.get('location', ''),
             employment_type=data.get('employment_type', 'full'),
             experience_level=data.get('experience_level', 'not_required'),
-            employer_id=user_id,
-            company_id=user.company.id
+            employer_id=principal.user_id,
+            company_id=principal.company_id
         )
         
         db.session.add(vacancy)
@@ -99,7 +184,7 @@ def create_vacancy():
         
         return jsonify({
             'message': 'Vacancy created successfully',
-            'vacancy': vacancy.to_dict()
+            'vacancy': SerializationService.serialize_vacancy(vacancy)
         }), 201
         
     except Exception as e:
@@ -107,27 +192,89 @@ def create_vacancy():
         current_app.logger.error(f'Create vacancy error: {str(e)}')
         return jsonify({'message': 'Internal server error'}), 500
 
+@vacancies_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_vacancies():
+    try:
+        principal = IdentityService.current()
+        
+        if principal.user_type != 'employer':
+            return jsonify({'message': 'Only employers can import vacancies'}), 403
+        
+        if not principal.company_id:
+            return jsonify({'message': 'Please create a company profile first'}), 400
+        
+        format = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+        if format not in IMPORT_FORMATS:
+            return jsonify({'message': f'Unsupported format: {format}'}), 400
+        
+        upsert = request.args.get('upsert', 'false').lower() == 'true'
+        result = VacancyImportService.import_vacancies(
+            db.session.get(User, principal.user_id), db.session.get(Company, principal.company_id),
+            parse_rows(request.stream, format),
+            upsert=upsert, batch_size=IMPORT_BATCH_SIZE
+        )
+        
+        return jsonify(result.to_dict()), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Import vacancies error: {str(e)}')
+        return jsonify({'message': 'Internal server error'}), 500
+
+@vacancies_bp.route('/export', defaults={'kind': 'vacancies'}, methods=['GET'])
+@vacancies_bp.route('/applications/export', defaults={'kind': 'applications'}, methods=['GET'])
+@jwt_required()
+def export_company_data(kind):
+    try:
+        principal = IdentityService.current()
+        
+        if principal.user_type != 'employer' or not principal.company_id:
+            return jsonify({'message': 'Only employers with a company can export data'}), 403
+        
+        format = request.args.get('format', 'csv')
+        if format not in EXPORT_FORMATS:
+            return jsonify({'message': f'Unsupported format: {format}'}), 400
+        
+        gzip = request.args.get('gzip', 'false').lower() == 'true'
+        company_id = principal.company_id
+        rows = ExportService.rows(kind, company_id=company_id, engine=db.engine)
+        body = export_stream(ExportService.columns(kind), rows, format=format, gzip=gzip)
+        
+        filename = f'{kind}.{format}' + ('.gz' if gzip else '')
+        mimetype = 'application/gzip' if gzip else ('text/csv' if format == 'csv' else 'application/x-ndjson')
+        # The generator reads through its own connections; release the
+        # request's session before streaming starts.
+        db.session.remove()
+        
+        return Response(body, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f'Export error: {str(e)}')
+        return jsonify({'message': 'Internal server error'}), 500
+
 @vacancies_bp.route('/<int:vacancy_id>/apply', methods=['POST'])
 @jwt_required()
 def apply_to_vacancy(vacancy_id):
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        principal = IdentityService.current()
         
-        if user.user_type != 'job_seeker':
+        if principal.user_type != 'job_seeker':
             return jsonify({'message': 'Only job seekers can apply to vacancies'}), 403
         
-        if not user.profile:
+        if not principal.profile_id:
             return jsonify({'message': 'Please complete your profile first'}), 400
         
-        vacancy = Vacancy.query.get_or_404(vacancy_id)
+        vacancy = db.get_or_404(Vacancy, vacancy_id)
         
         if not vacancy.is_active:
             return jsonify({'message': 'This vacancy is no longer active'}), 400
         
         existing_application = Application.query.filter_by(
             vacancy_id=vacancy_id,
-            applicant_id=user.profile.id
+            applicant_id=principal.profile_id
         ).first()
         
         if existing_application:
@@ -137,19 +284,53 @@ def apply_to_vacancy(vacancy_id):
         
         application = Application(
             vacancy_id=vacancy_id,
-            applicant_id=user.profile.id,
+            applicant_id=principal.profile_id,
             cover_letter=data.get('cover_letter', '')
         )
         
         db.session.add(application)
+        db.session.flush()
+        EmailService.send_application_notification(application)
         db.session.commit()
         
         return jsonify({
             'message': 'Application submitted successfully',
-            'application': application.to_dict()
+            'application': SerializationService.serialize_applications([application])[0]
         }), 201
         
+    except IntegrityError:
+        # A concurrent request won the race to uq_applications_vacancy_applicant.
+        db.session.rollback()
+        return jsonify({'message': 'You have already applied to this vacancy'}), 400
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f'Apply to vacancy error: {str(e)}')
         return jsonify({'message': 'Internal server error'}), 500
+
+@vacancies_bp.route('/<int:vacancy_id>/applicants', methods=['GET'])
+@jwt_required()
+def get_ranked_applicants(vacancy_id):
+    try:
+        user_id = IdentityService.current().user_id
+        vacancy = db.session.get(Vacancy, vacancy_id)
+        
+        if not vacancy:
+            return jsonify({'message': 'Vacancy not found'}), 404
+        
+        if vacancy.employer_id != user_id:
+            return jsonify({'message': 'Only the vacancy owner can view its applicants'}), 403
+        
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_PER_PAGE)
+        ranked = RankingService.rank(vacancy, page=page, per_page=per_page)
+        
+        return jsonify({
+            'applicants': ranked.items,
+            'total': ranked.total,
+            'pages': ranked.pages,
+            'current_page': ranked.page
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f'Rank applicants error: {str(e)}')
+        return jsonify({'message': 'Internal server error'}), 500
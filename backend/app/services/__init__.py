@@ -1,5 +1,24 @@
 ﻿from .auth_service import AuthService
 from .email_service import EmailService
+from .facet_service import FacetService
+from .fulltext_service import FullTextService
+from .identity_service import IdentityService
+from .inbox_service import InboxService
+from .location_service import LocationService
+from .provisioning_service import UserProvisioningService
+from .ranking_service import RankingService
+from .recommendation_service import RecommendationService
+from .response_cache import ResponseCache
+from .salary_service import SalaryService
+from .search_index import SearchIndexService
 from .search_service import SearchService
+from .serialization_service import SerializationService
+from .stats_service import StatsService
+from .view_counter import ViewCounterService
 
-__all__ = ['AuthService', 'EmailService', 'SearchService']
+__all__ = [
+    'AuthService', 'EmailService', 'FacetService', 'FullTextService', 'IdentityService', 'InboxService',
+    'LocationService', 'RankingService', 'RecommendationService', 'ResponseCache',
+    'SalaryService', 'SearchIndexService', 'SearchService', 'SerializationService',
+    'StatsService', 'UserProvisioningService', 'ViewCounterService'
+]
@@ -1,4 +1,5 @@
-﻿from werkzeug.security import generate_password_hash, check_password_hash
+﻿from flask import current_app
+from app import db
 from app.models.user import User
 import secrets
 import string
@@ -16,10 +17,26 @@ class AuthService:
     
     @staticmethod
     def verify_user(email, password):
-        user = User.query.filter_by(email=email).first()
-        if user and user.check_password(password):
-            return user
-        return None
+        row = db.session.query(User.id, User.password_hash).filter_by(email=email).first()
+        # Give the connection back to the pool while the hash runs.
+        db.session.rollback()
+        if row is None:
+            return None
+        
+        hasher = current_app.extensions['password_hasher']
+        if not hasher.verify(row.password_hash, password):
+            return None
+        
+        user = db.session.get(User, row.id)
+        if hasher.needs_rehash(row.password_hash):
+            # The hash parameters changed since this password was set;
+            # the plain password is only at hand now, on login.
+            new_hash = hasher.hash(password)
+            User.query.filter_by(id=row.id, password_hash=row.password_hash).update(
+                {'password_hash': new_hash}, synchronize_session=False
+            )
+            db.session.commit()
+        return user
     
     @staticmethod
     def generate_reset_token():
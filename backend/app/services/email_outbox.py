@@ -0,0 +1,263 @@
+﻿import atexit
+import random
+import smtplib
+import threading
+import uuid
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from sqlalchemy import and_, bindparam, or_, select
+from app import db
+from app.models.outbox_email import OutboxEmail
+
+class SMTPConnection:
+    """One long-lived SMTP session, reopened when the server drops it."""
+
+    def __init__(self, config):
+        self.host = config['MAIL_SERVER']
+        self.port = config['MAIL_PORT']
+        self.use_tls = config.get('MAIL_USE_TLS', True)
+        self.username = config.get('MAIL_USERNAME')
+        self.password = config.get('MAIL_PASSWORD')
+        self.timeout = config.get('MAIL_TIMEOUT', 30)
+        self.server = None
+
+    def open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self.server = server
+
+    def send(self, message):
+        if self.server is None:
+            self.open()
+        try:
+            self.server.send_message(message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Idle sessions get closed by the server; retry once on a new one.
+            self.close()
+            self.open()
+            self.server.send_message(message)
+
+    def close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except Exception:
+            pass
+        self.server = None
+
+class LoggingConnection:
+    """Stand-in used with ``MAIL_SUPPRESS_SEND``: logs instead of sending."""
+
+    def __init__(self, logger):
+        self.logger = logger
+
+    def send(self, message):
+        self.logger.info(f'Would send email to {message["To"]}: {message["Subject"]}')
+
+    def close(self):
+        pass
+
+def is_connection_error(error):
+    # SMTPException derives from OSError too, but most of those are replies.
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+def is_permanent(error):
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+class EmailOutbox:
+    """Delivers rows of ``email_outbox`` from a pool of worker threads.
+
+    Messages are written to the outbox in the same transaction as the
+    change that triggers them, so nothing is lost if a worker dies. Each
+    worker claims a batch by stamping rows with its own token (claims older
+    than ``EMAIL_CLAIM_TIMEOUT`` are taken over), sends it over its own
+    persistent SMTP connection and records the outcome in one statement.
+    Temporary failures are retried with exponential backoff; permanent
+    ones (5xx) and messages out of attempts end up as ``failed``. When the
+    server cannot be reached the rest of the batch is handed back rather
+    than each row waiting out ``MAIL_TIMEOUT`` past its claim.
+    """
+
+    def __init__(self, app):
+        config = app.config
+        self.app = app
+        self.workers = config.get('EMAIL_WORKERS', 2)
+        self.batch_size = config.get('EMAIL_BATCH_SIZE', 50)
+        self.poll_interval = config.get('EMAIL_POLL_INTERVAL', 5)
+        self.max_attempts = config.get('EMAIL_MAX_ATTEMPTS', 6)
+        self.backoff = config.get('EMAIL_RETRY_BACKOFF', 30)
+        self.claim_timeout = config.get('EMAIL_CLAIM_TIMEOUT', 300)
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.threads = []
+        self.thread_lock = threading.Lock()
+
+    def connection(self):
+        if self.app.config.get('MAIL_SUPPRESS_SEND'):
+            return LoggingConnection(self.app.logger)
+        return SMTPConnection(self.app.config)
+
+    def message(self, row):
+        message = MIMEMultipart()
+        message['From'] = self.app.config['MAIL_DEFAULT_SENDER']
+        message['To'] = row.to_email
+        message['Subject'] = row.subject
+        message.attach(MIMEText(row.body, 'html'))
+        return message
+
+    def claim(self):
+        table = OutboxEmail.__table__
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        due = or_(
+            and_(table.c.status == 'pending', table.c.next_attempt_at <= now),
+            and_(table.c.status == 'sending', table.c.claimed_at < now - timedelta(seconds=self.claim_timeout))
+        )
+        batch = select(table.c.id).where(due).order_by(table.c.id).limit(self.batch_size)
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                # ``due`` is repeated on the UPDATE so that of two workers
+                # racing for the same rows only one stamps each of them.
+                connection.execute(
+                    table.update().where(table.c.id.in_(batch), due).values(
+                        status='sending', claimed_by=token, claimed_at=now
+                    )
+                )
+                return connection.execute(
+                    select(table).where(table.c.claimed_by == token).order_by(table.c.id)
+                ).all()
+
+    def send_batch(self, rows, connection):
+        sent, failed = [], []
+        for position, row in enumerate(rows):
+            try:
+                connection.send(self.message(row))
+                sent.append(row.id)
+            except Exception as e:
+                if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                    # The session is in an unknown state; start a new one.
+                    connection.close()
+                failed.append((row, e))
+                if is_connection_error(e):
+                    self.record(sent, failed, released=[other.id for other in rows[position + 1:]])
+                    raise
+        self.record(sent, failed)
+        return len(sent)
+
+    def record(self, sent, failed, released=()):
+        table = OutboxEmail.__table__
+        now = datetime.utcnow()
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                if released:
+                    # Not attempted, so no attempt is counted; the delay
+                    # keeps other workers off the unreachable server.
+                    connection.execute(
+                        table.update().where(table.c.id.in_(released)).values(
+                            status='pending', claimed_by=None,
+                            next_attempt_at=now + timedelta(seconds=self.backoff * random.uniform(0.8, 1.2))
+                        )
+                    )
+                if sent:
+                    connection.execute(
+                        table.update().where(table.c.id.in_(sent)).values(
+                            status='sent', sent_at=now, claimed_by=None, attempts=table.c.attempts + 1
+                        )
+                    )
+                if failed:
+                    updates = []
+                    for row, error in failed:
+                        attempts = row.attempts + 1
+                        give_up = attempts >= self.max_attempts or is_permanent(error)
+                        delay = self.backoff * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+                        updates.append({
+                            'row_id': row.id,
+                            'status': 'failed' if give_up else 'pending',
+                            'attempts': attempts,
+                            'next_attempt_at': now + timedelta(seconds=delay),
+                            'last_error': str(error)[:1000]
+                        })
+                        self.app.logger.warning(f'Email {row.id} to {row.to_email} failed: {str(error)}')
+                    connection.execute(
+                        table.update().where(table.c.id == bindparam('row_id')).values(
+                            status=bindparam('status'),
+                            attempts=bindparam('attempts'),
+                            next_attempt_at=bindparam('next_attempt_at'),
+                            last_error=bindparam('last_error'),
+                            claimed_by=None
+                        ),
+                        updates
+                    )
+
+    def deliver_pending(self, connection=None):
+        """Send everything that is due on the calling thread; returns the sent count."""
+        own = connection is None
+        connection = connection or self.connection()
+        delivered = 0
+        try:
+            while True:
+                rows = self.claim()
+                if not rows:
+                    return delivered
+                delivered += self.send_batch(rows, connection)
+        finally:
+            if own:
+                connection.close()
+
+    def wake(self):
+        if self.workers > 0:
+            self.start()
+        self.wakeup.set()
+
+    def start(self):
+        # Started from the first request rather than at import so that
+        # every gunicorn worker gets its own pool after the fork, and CLI
+        # commands none at all.
+        if len(self.threads) == self.workers and all(thread.is_alive() for thread in self.threads):
+            return
+        with self.thread_lock:
+            self.threads = [thread for thread in self.threads if thread.is_alive()]
+            self.stopped.clear()
+            while len(self.threads) < self.workers:
+                thread = threading.Thread(
+                    target=self.run, name=f'email-outbox-{len(self.threads)}', daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+
+    def run(self):
+        connection = self.connection()
+        try:
+            while not self.stopped.is_set():
+                try:
+                    self.deliver_pending(connection)
+                except Exception as e:
+                    connection.close()
+                    self.app.logger.error(f'Email outbox error: {str(e)}')
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.wakeup.set()
+
+def init_email_outbox(app):
+    outbox = EmailOutbox(app)
+    app.extensions['email_outbox'] = outbox
+    if outbox.workers > 0:
+        # Rows queued before a restart, and retries waiting out their
+        # backoff, are picked up by the poll loop without new mail.
+        app.before_request(outbox.start)
+    atexit.register(outbox.stop)
+    return outbox
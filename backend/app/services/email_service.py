@@ -1,43 +1,45 @@
-﻿import smtplib
-from email.mime.text import MimeText
-from email.mime.multipart import MimeMultipart
-from flask import current_app
+﻿from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models.outbox_email import OutboxEmail
 
 class EmailService:
+    """Queues outgoing mail in the ``email_outbox`` table.
+
+    Nothing here talks to the mail server: messages are added to the
+    current session and committed together with the caller's changes,
+    then delivered by :class:`~app.services.email_outbox.EmailOutbox`.
+    """
+
     @staticmethod
     def send_email(to_email, subject, body):
-        try:
-            if not current_app.config.get('MAIL_USERNAME'):
-                print(f'Would send email to {to_email}: {subject}')
-                return True
-            
-            msg = MimeMultipart()
-            msg['From'] = current_app.config['MAIL_USERNAME']
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            msg.attach(MimeText(body, 'html'))
-            
-            server = smtplib.SMTP(current_app.config['MAIL_SERVER'], current_app.config['MAIL_PORT'])
-            server.starttls()
-            server.login(current_app.config['MAIL_USERNAME'], current_app.config['MAIL_PASSWORD'])
-            server.send_message(msg)
-            server.quit()
-            
-            return True
-        except Exception as e:
-            current_app.logger.error(f'Email sending error: {str(e)}')
-            return False
+        email = OutboxEmail(to_email=to_email, subject=subject, body=body)
+        db.session.add(email)
+        db.session.info['email_outbox_wake'] = True
+        return email
     
     @staticmethod
-    def send_welcome_email(user):
+    def send_many(messages):
+        """Queue ``(to_email, subject, body)`` tuples with one executemany INSERT."""
+        rows = [{'to_email': to_email, 'subject': subject, 'body': body} for to_email, subject, body in messages]
+        if rows:
+            db.session.execute(OutboxEmail.__table__.insert(), rows)
+            db.session.info['email_outbox_wake'] = True
+    
+    @staticmethod
+    def welcome_email(email, username):
         subject = 'Welcome to CareerFinder!'
         body = f'''
-        <h1>Welcome to CareerFinder, {user.username}!</h1>
+        <h1>Welcome to CareerFinder, {username}!</h1>
         <p>Thank you for registering with CareerFinder.</p>
         <p>Start exploring job opportunities or posting vacancies today!</p>
         '''
-        return EmailService.send_email(user.email, subject, body)
+        return email, subject, body
+    
+    @staticmethod
+    def send_welcome_email(user):
+        return EmailService.send_email(*EmailService.welcome_email(user.email, user.username))
     
     @staticmethod
     def send_application_notification(application):
@@ -50,3 +52,19 @@ class EmailService:
         '''
         employer_email = application.vacancy.employer.email
         return EmailService.send_email(employer_email, subject, body)
+    
+    @staticmethod
+    def deliver_pending():
+        """Deliver due messages on the calling thread (CLI and tests)."""
+        return current_app.extensions['email_outbox'].deliver_pending()
+
+@event.listens_for(Session, 'after_commit')
+def wake_email_outbox(session):
+    if session.info.pop('email_outbox_wake', None) and has_app_context():
+        outbox = current_app.extensions.get('email_outbox')
+        if outbox is not None:
+            outbox.wake()
+
+@event.listens_for(Session, 'after_soft_rollback')
+def discard_email_wake(session, previous_transaction):
+    session.info.pop('email_outbox_wake', None)
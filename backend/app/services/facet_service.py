@@ -0,0 +1,149 @@
+﻿from collections import Counter
+from flask import current_app
+from sqlalchemy import case, func, select
+from app import db
+from app.models.location import Location
+from app.models.vacancy import Vacancy
+from app.services.fulltext_service import tokenize_query
+from app.services.location_service import normalize_location
+from app.services.search_index import SearchIndexService
+from app.services.search_service import SearchService
+from app.utils.cache import TTLCache
+
+SALARY_BUCKETS = (50000, 100000, 200000)
+TOP_LOCATIONS = 10
+FACETS = ('employment_type', 'experience_level', 'location', 'salary')
+
+def ranked(counter):
+    return sorted(counter.items(), key=lambda item: (-item[1], str(item[0])))
+
+def salary_bucket(salary):
+    if salary is None:
+        return 'not_specified'
+    lower = 0
+    for upper in SALARY_BUCKETS:
+        if salary < upper:
+            return f'{lower}-{upper}'
+        lower = upper
+    return f'{lower}+'
+
+def salary_bucket_expression(salary):
+    whens = [(salary.is_(None), 'not_specified')]
+    lower = 0
+    for upper in SALARY_BUCKETS:
+        whens.append((salary < upper, f'{lower}-{upper}'))
+        lower = upper
+    return case(*whens, else_=f'{lower}+')
+
+class FacetService:
+    """Facet counts for the vacancy search, computed in one pass."""
+
+    @staticmethod
+    def cache():
+        cache = current_app.extensions.get('facet_cache')
+        if cache is None:
+            cache = current_app.extensions['facet_cache'] = TTLCache(
+                maxsize=current_app.config.get('FACETS_CACHE_SIZE', 1024),
+                ttl=current_app.config.get('FACETS_CACHE_TTL', 60)
+            )
+        return cache
+
+    @staticmethod
+    def cache_key(query=None, location=None, employment_type=None, experience_level=None,
+                  min_salary=None, max_salary=None):
+        return (
+            ' '.join(sorted(set(tokenize_query(query)))),
+            normalize_location(location),
+            # Matched exactly by the database filter, so not normalized.
+            employment_type or '',
+            experience_level or '',
+            min_salary,
+            max_salary,
+        )
+
+    @staticmethod
+    def vacancy_facets(query=None, location=None, employment_type=None, experience_level=None,
+                       min_salary=None, max_salary=None):
+        key = FacetService.cache_key(query, location, employment_type, experience_level, min_salary, max_salary)
+        cache = FacetService.cache()
+        facets = cache.get(key)
+        if facets is None:
+            filters = dict(
+                query=query, location=location,
+                employment_type=employment_type, experience_level=experience_level,
+                min_salary=min_salary, max_salary=max_salary
+            )
+            if SearchIndexService.enabled():
+                counts = FacetService.count_from_index(**filters)
+            else:
+                counts = FacetService.count_from_database(**filters)
+            facets = FacetService.format(counts)
+            cache.set(key, facets)
+        return facets
+
+    @staticmethod
+    def count_from_database(**filters):
+        salary = case((Vacancy.salary_from.isnot(None), Vacancy.salary_min_base), else_=Vacancy.salary_max_base)
+        matches = SearchService.filter_vacancies(ranked=False, **filters).with_entities(
+            Vacancy.employment_type,
+            Vacancy.experience_level,
+            Vacancy.location_id,
+            salary_bucket_expression(salary).label('salary')
+        ).subquery()
+        # One pass grouped by every facet at once; the combinations are
+        # few enough to fold into the per-facet counters here.
+        columns = [matches.c.employment_type, matches.c.experience_level, matches.c.location_id, matches.c.salary]
+        combinations = db.session.execute(select(*columns, func.count()).group_by(*columns))
+
+        counts = {facet: Counter() for facet in FACETS}
+        for employment_type, experience_level, location_id, salary_value, count in combinations:
+            counts['employment_type'][employment_type] += count
+            counts['experience_level'][experience_level] += count
+            counts['location'][location_id] += count
+            counts['salary'][salary_value] += count
+        return counts
+
+    @staticmethod
+    def count_from_index(**filters):
+        index = SearchIndexService.index()
+        ids = SearchService.search_vacancy_ids(ranked=False, **filters)
+        counts = {facet: Counter() for facet in FACETS}
+        for vacancy_id in ids:
+            meta = index.doc_meta[vacancy_id]
+            counts['employment_type'][meta['employment_type'] or None] += 1
+            counts['experience_level'][meta['experience_level'] or None] += 1
+            counts['location'][meta['location_id'] or None] += 1
+            counts['salary'][salary_bucket(meta['salary'])] += 1
+        return counts
+
+    @staticmethod
+    def format(counts):
+        top_locations = [
+            (location_id, count)
+            for location_id, count in ranked(counts['location'])
+            if location_id is not None
+        ][:TOP_LOCATIONS]
+        names = {}
+        if top_locations:
+            names = dict(db.session.query(Location.id, Location.name).filter(
+                Location.id.in_([location_id for location_id, _ in top_locations])
+            ))
+
+        return {
+            'employment_type': [
+                {'value': value, 'count': count}
+                for value, count in ranked(counts['employment_type']) if value
+            ],
+            'experience_level': [
+                {'value': value, 'count': count}
+                for value, count in ranked(counts['experience_level']) if value
+            ],
+            'location': [
+                {'id': location_id, 'name': names.get(location_id), 'count': count}
+                for location_id, count in top_locations
+            ],
+            'salary': [
+                {'value': value, 'count': count}
+                for value, count in ranked(counts['salary'])
+            ],
+        }
@@ -0,0 +1,200 @@
+﻿import re
+import weakref
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, literal_column, or_, select, text
+from app import db
+from app.models.vacancy import Vacancy
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def tokenize_query(query):
+    return TOKEN_RE.findall((query or '').lower())
+
+class LikeFullTextBackend:
+    """Fallback backend: substring match, no index, no ranking."""
+    name = 'like'
+
+    def is_installed(self, connection):
+        return True
+
+    def install(self, connection):
+        pass
+
+    def rebuild(self, connection):
+        pass
+
+    def apply(self, query, text_query, ranked=True):
+        for token in tokenize_query(text_query):
+            query = query.filter(
+                or_(
+                    Vacancy.title.ilike(f'%{token}%'),
+                    Vacancy.description.ilike(f'%{token}%'),
+                    Vacancy.requirements.ilike(f'%{token}%')
+                )
+            )
+        return query
+
+class PostgresFullTextBackend:
+    """Generated ``tsvector`` column with a GIN index, ranked by ``ts_rank``."""
+    name = 'postgresql'
+
+    def __init__(self, ts_config='simple'):
+        self.ts_config = ts_config
+
+    def is_installed(self, connection):
+        return connection.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'vacancies' AND column_name = 'search_vector'"
+        )).first() is not None
+
+    def install(self, connection):
+        connection.execute(text(f"""
+            ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('{self.ts_config}', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('{self.ts_config}', coalesce(requirements, '')), 'B') ||
+                setweight(to_tsvector('{self.ts_config}', coalesce(description, '')), 'C')
+            ) STORED
+        """))
+        connection.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_vacancies_search_vector '
+            'ON vacancies USING GIN (search_vector)'
+        ))
+
+    def rebuild(self, connection):
+        # Generated columns are maintained by PostgreSQL itself.
+        connection.execute(text('REINDEX INDEX ix_vacancies_search_vector'))
+
+    def apply(self, query, text_query, ranked=True):
+        tokens = tokenize_query(text_query)
+        if not tokens:
+            return query
+
+        vector = literal_column('vacancies.search_vector')
+        ts_query = func.to_tsquery(self.ts_config, ' & '.join(f'{token}:*' for token in tokens))
+        query = query.filter(vector.op('@@')(ts_query))
+        if ranked:
+            query = query.order_by(func.ts_rank(vector, ts_query).desc())
+        return query
+
+class SqliteFullTextBackend:
+    """FTS5 external-content table kept in sync by triggers."""
+    name = 'sqlite'
+    table = 'vacancies_fts'
+
+    def is_installed(self, connection):
+        return connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': self.table}).first() is not None
+
+    def install(self, connection):
+        connection.execute(text(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5(
+                title, description, requirements,
+                content='vacancies', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """))
+        connection.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS vacancies_fts_insert AFTER INSERT ON vacancies BEGIN
+                INSERT INTO {self.table}(rowid, title, description, requirements)
+                VALUES (new.id, new.title, new.description, new.requirements);
+            END
+        """))
+        connection.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS vacancies_fts_delete AFTER DELETE ON vacancies BEGIN
+                INSERT INTO {self.table}({self.table}, rowid, title, description, requirements)
+                VALUES ('delete', old.id, old.title, old.description, old.requirements);
+            END
+        """))
+        connection.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS vacancies_fts_update
+            AFTER UPDATE OF title, description, requirements ON vacancies BEGIN
+                INSERT INTO {self.table}({self.table}, rowid, title, description, requirements)
+                VALUES ('delete', old.id, old.title, old.description, old.requirements);
+                INSERT INTO {self.table}(rowid, title, description, requirements)
+                VALUES (new.id, new.title, new.description, new.requirements);
+            END
+        """))
+
+    def rebuild(self, connection):
+        connection.execute(text(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')"))
+
+    def apply(self, query, text_query, ranked=True):
+        tokens = tokenize_query(text_query)
+        if not tokens:
+            return query
+
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        # Column weights follow the table definition: title, description, requirements.
+        matches = select(
+            literal_column('rowid').label('vacancy_id'),
+            literal_column(f'bm25({self.table}, 10.0, 1.0, 5.0)').label('rank')
+        ).select_from(text(self.table)).where(
+            text(f'{self.table} MATCH :fts_match').bindparams(fts_match=match)
+        ).subquery()
+
+        query = query.join(matches, matches.c.vacancy_id == Vacancy.id)
+        if ranked:
+            query = query.order_by(matches.c.rank)
+        return query
+
+def sqlite_has_fts5(connection):
+    try:
+        options = connection.exec_driver_sql('PRAGMA compile_options').scalars().all()
+    except Exception:
+        return False
+    return 'ENABLE_FTS5' in options
+
+def get_backend(dialect_name, connection=None):
+    setting = 'auto'
+    ts_config = 'simple'
+    if has_app_context():
+        setting = current_app.config.get('SEARCH_BACKEND', 'auto')
+        ts_config = current_app.config.get('SEARCH_TS_CONFIG', 'simple')
+
+    if setting == 'like':
+        return LikeFullTextBackend()
+    if dialect_name == 'postgresql':
+        return PostgresFullTextBackend(ts_config)
+    if dialect_name == 'sqlite' and (connection is None or sqlite_has_fts5(connection)):
+        return SqliteFullTextBackend()
+    return LikeFullTextBackend()
+
+class FullTextService:
+    _backends = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def backend():
+        engine = db.engine
+        if engine not in FullTextService._backends:
+            with engine.connect() as connection:
+                backend = get_backend(engine.dialect.name, connection)
+                if not backend.is_installed(connection):
+                    current_app.logger.warning(
+                        f'Full-text index for {backend.name} is not installed, '
+                        'falling back to substring search (run "flask search install")'
+                    )
+                    backend = LikeFullTextBackend()
+            FullTextService._backends[engine] = backend
+        return FullTextService._backends[engine]
+
+    @staticmethod
+    def install():
+        with db.engine.begin() as connection:
+            backend = get_backend(connection.dialect.name, connection)
+            backend.install(connection)
+            backend.rebuild(connection)
+        FullTextService._backends.pop(db.engine, None)
+        return backend
+
+    @staticmethod
+    def rebuild():
+        with db.engine.begin() as connection:
+            backend = get_backend(connection.dialect.name, connection)
+            backend.rebuild(connection)
+        return backend
+
+@event.listens_for(Vacancy.__table__, 'after_create')
+def install_fulltext(target, connection, **kw):
+    get_backend(connection.dialect.name, connection).install(connection)
@@ -0,0 +1,170 @@
+﻿import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
+from app import db, jwt
+from app.models.company import Company
+from app.models.profile import Profile
+from app.models.user import User
+from app.services.read_replicas import on_primary
+from app.utils.cache import TTLCache
+
+CLAIMS = ('user_type', 'profile_id', 'company_id', 'is_active')
+
+def timestamp(value):
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+class Principal:
+    """What authorization needs to know about a user, without loading it."""
+
+    def __init__(self, user_id, user_type, profile_id=None, company_id=None, is_active=True):
+        self.user_id = user_id
+        self.user_type = user_type
+        self.profile_id = profile_id
+        self.company_id = company_id
+        self.is_active = is_active
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            user.id, user.user_type,
+            profile_id=user.profile.id if user.profile else None,
+            company_id=user.company.id if user.company else None,
+            is_active=bool(user.is_active)
+        )
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        if 'user_type' not in claims:
+            return None
+        return cls(user_id, **{name: claims.get(name) for name in CLAIMS})
+
+    def claims(self):
+        return {name: getattr(self, name) for name in CLAIMS}
+
+class IdentityCache:
+    """Per-process principals and token revocations.
+
+    Principals are kept for ``PRINCIPAL_CACHE_TTL`` seconds. Revocations
+    made in this process apply at once; those made elsewhere (another
+    worker, the CLI) are picked up every ``IDENTITY_SYNC_INTERVAL``
+    seconds from users deactivated since the last sync, using
+    ``ix_users_active_updated``. A token issued before its user's
+    revocation is rejected; revocations are forgotten once every token
+    they could apply to has expired.
+    """
+
+    def __init__(self, app):
+        config = app.config
+        self.principals = TTLCache(
+            maxsize=config.get('PRINCIPAL_CACHE_SIZE', 10000), ttl=config.get('PRINCIPAL_CACHE_TTL', 30)
+        )
+        self.sync_interval = config.get('IDENTITY_SYNC_INTERVAL', 10)
+        self.lifetime = config.get('JWT_ACCESS_TOKEN_EXPIRES') or timedelta(hours=24)
+        self.revoked = {}
+        self.watermark = None
+        self.next_sync = 0
+        self.lock = threading.Lock()
+
+    def revoke(self, user_id, at=None):
+        at = at if at is not None else time.time()
+        with self.lock:
+            self.revoked[user_id] = max(self.revoked.get(user_id, 0), at)
+        self.principals.delete(user_id)
+
+    def is_revoked(self, user_id, issued_at):
+        revoked_at = self.revoked.get(user_id)
+        return revoked_at is not None and issued_at <= revoked_at
+
+    def maybe_sync(self):
+        if time.monotonic() < self.next_sync or not self.lock.acquire(blocking=False):
+            return
+        try:
+            self.next_sync = time.monotonic() + self.sync_interval
+            now = datetime.utcnow()
+            # Rows are stamped at flush and may commit a little later, so
+            # every sync looks back over the previous interval as well.
+            since = (self.watermark or now - self.lifetime) - timedelta(seconds=self.sync_interval)
+            with on_primary():
+                rows = db.session.query(User.id, User.updated_at).filter(
+                    User.is_active.is_(False), User.updated_at > since
+                ).all()
+            self.watermark = now
+            expired = timestamp(now - self.lifetime)
+            self.revoked = {
+                user_id: revoked_at for user_id, revoked_at in self.revoked.items() if revoked_at > expired
+            }
+        finally:
+            self.lock.release()
+        for user_id, updated_at in rows:
+            self.revoke(user_id, at=timestamp(updated_at))
+
+class IdentityService:
+    @staticmethod
+    def cache():
+        return current_app.extensions['identity']
+
+    @staticmethod
+    def load(user_id):
+        row = db.session.query(
+            User.id, User.user_type, Profile.id, Company.id, User.is_active
+        ).outerjoin(
+            Profile, Profile.user_id == User.id
+        ).outerjoin(
+            Company, Company.user_id == User.id
+        ).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        return Principal(row[0], row[1], profile_id=row[2], company_id=row[3], is_active=bool(row[4]))
+
+    @staticmethod
+    def principal(user_id):
+        cache = IdentityService.cache()
+        principal = cache.principals.get(user_id)
+        if principal is None:
+            principal = IdentityService.load(user_id)
+            if principal is not None:
+                cache.principals.set(user_id, principal)
+        return principal
+
+    @staticmethod
+    def current():
+        """Principal of the request's token, from its claims when it has them."""
+        user_id = int(get_jwt_identity())
+        return Principal.from_claims(user_id, get_jwt()) or IdentityService.principal(user_id)
+
+    @staticmethod
+    def create_token(principal):
+        return create_access_token(identity=principal.user_id, additional_claims=principal.claims())
+
+    @staticmethod
+    def revoke(user_id):
+        IdentityService.cache().revoke(user_id)
+
+    @staticmethod
+    def set_active(user, active):
+        user.is_active = active
+        db.session.commit()
+        if active:
+            IdentityService.cache().principals.delete(user.id)
+        else:
+            IdentityService.revoke(user.id)
+
+@jwt.user_identity_loader
+def user_identity(identity):
+    # RFC 7519 wants a string subject; newer PyJWT releases enforce it.
+    return str(identity)
+
+@jwt.token_in_blocklist_loader
+def token_revoked(jwt_header, jwt_payload):
+    if jwt_payload.get('is_active') is False:
+        return True
+    cache = IdentityService.cache()
+    cache.maybe_sync()
+    return cache.is_revoked(int(jwt_payload['sub']), jwt_payload.get('iat', 0))
+
+def init_identity(app):
+    cache = IdentityCache(app)
+    app.extensions['identity'] = cache
+    return cache
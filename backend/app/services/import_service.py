@@ -0,0 +1,240 @@
+﻿import codecs
+import csv
+import json
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import bindparam
+from app import db
+from app.models.vacancy import Vacancy
+from app.services.location_service import LocationService, normalize_location
+from app.services.response_cache import COMPANY_LIST, VACANCY_LIST, ResponseCache, company_tag, vacancy_tag
+from app.services.salary_service import SalaryService, normalize_currency, salary_range
+from app.services.stats_service import ACTIVE_VACANCIES, industry_key, upsert_deltas
+from app.utils.validators import validate_salary
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+TEXT_LIMITS = {
+    'title': 100, 'location': 100, 'employment_type': 50,
+    'experience_level': 50, 'currency': 3, 'external_id': 100
+}
+MAX_REPORTED_ERRORS = 1000
+
+def read_lines(stream):
+    """Decode a binary stream line by line without reading it whole.
+
+    Lines keep their line break: the csv reader needs it to tell a
+    quoted field spanning lines from two separate lines.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    while True:
+        chunk = stream.read(64 * 1024)
+        if not chunk:
+            break
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            yield line + '\n'
+    buffer += decoder.decode(b'', final=True)
+    if buffer:
+        yield buffer
+
+def parse_rows(stream, format='ndjson'):
+    """Yield ``(row_number, data, error)`` for every record of the stream."""
+    if format == 'csv':
+        reader = csv.DictReader(read_lines(stream))
+        for data in reader:
+            yield reader.line_num, {key: value for key, value in data.items() if value not in (None, '')}, None
+        return
+    for number, line in enumerate(read_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield number, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(data, dict):
+            yield number, None, 'Expected a JSON object'
+            continue
+        yield number, data, None
+
+def clean_row(data):
+    """Validate one record; return ``(values, error)``."""
+    values = {}
+    for field in ('title', 'description'):
+        if not str(data.get(field) or '').strip():
+            return None, f'{field} is required'
+    for field in ('title', 'description', 'requirements', 'location', 'employment_type',
+                  'experience_level', 'currency', 'external_id'):
+        value = data.get(field)
+        values[field] = str(value).strip() if value is not None else None
+        limit = TEXT_LIMITS.get(field)
+        if limit and values[field] and len(values[field]) > limit:
+            return None, f'{field} is longer than {limit} characters'
+
+    for field in ('salary_from', 'salary_to'):
+        value = data.get(field)
+        try:
+            values[field] = int(value) if value not in (None, '') else None
+        except (TypeError, ValueError):
+            return None, f'{field} must be an integer'
+    if not validate_salary(values['salary_from'], values['salary_to']):
+        return None, 'Invalid salary range'
+
+    is_active = data.get('is_active', True)
+    if isinstance(is_active, str):
+        is_active = is_active.strip().lower() not in ('false', '0', 'no', '')
+    values['is_active'] = bool(is_active)
+    values['requirements'] = values['requirements'] or ''
+    values['location'] = values['location'] or ''
+    values['employment_type'] = values['employment_type'] or 'full'
+    values['experience_level'] = values['experience_level'] or 'not_required'
+    values['currency'] = normalize_currency(values['currency'])
+    return values, None
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, row, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'error': message})
+
+    def to_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors)
+        }
+
+class VacancyImportService:
+    """Bulk vacancy import for one company.
+
+    Records are validated as they are read and written in chunks of
+    ``batch_size``: one executemany INSERT for new rows and one for rows
+    matched by ``external_id`` in upsert mode, each chunk in its own
+    transaction. The work the ORM flush hooks would do (normalized
+    location and salary, platform counters, cache invalidation) is done
+    per chunk; in-memory indexes pick the rows up by ``updated_at``.
+    """
+
+    @staticmethod
+    def import_vacancies(user, company, records, upsert=False, batch_size=1000):
+        result = ImportResult()
+        context = {'locations': {}, 'rates': {}, 'industry': company.industry}
+        chunk = []
+        for row, data, error in records:
+            if error is None:
+                values, error = clean_row(data)
+            if error is not None:
+                result.error(row, error)
+                continue
+            chunk.append((row, values))
+            if len(chunk) >= batch_size:
+                VacancyImportService.write_chunk(user, company, chunk, upsert, result, context)
+                chunk = []
+        if chunk:
+            VacancyImportService.write_chunk(user, company, chunk, upsert, result, context)
+        return result
+
+    @staticmethod
+    def location_ids(names, cache):
+        missing = {}
+        for name in names:
+            key = normalize_location(name)
+            if key and key not in cache:
+                missing[key] = LocationService.get_or_create(db.session, name)
+        if missing:
+            db.session.flush()
+            cache.update({key: location.id for key, location in missing.items() if location is not None})
+        return {name: cache.get(normalize_location(name)) for name in names}
+
+    @staticmethod
+    def write_chunk(user, company, chunk, upsert, result, context):
+        # A repeated external_id inside one chunk would make the outcome
+        # depend on statement order; keep the first and reject the rest.
+        seen = {}
+        rows = []
+        for row, values in chunk:
+            external_id = values['external_id']
+            if external_id and external_id in seen:
+                result.error(row, f'Duplicate external_id {external_id} (first seen on row {seen[external_id]})')
+                continue
+            if external_id:
+                seen[external_id] = row
+            rows.append((row, values))
+
+        existing = {}
+        if seen:
+            existing = {
+                external_id: (vacancy_id, is_active)
+                for vacancy_id, external_id, is_active in db.session.query(
+                    Vacancy.id, Vacancy.external_id, Vacancy.is_active
+                ).filter(Vacancy.company_id == company.id, Vacancy.external_id.in_(list(seen)))
+            }
+
+        locations = VacancyImportService.location_ids({values['location'] for _, values in rows}, context['locations'])
+        now = datetime.utcnow()
+        inserts, updates, written, deltas = [], [], [], Counter()
+        for row, values in rows:
+            current = existing.get(values['external_id'])
+            if current is not None and not upsert:
+                result.error(row, f'external_id {values["external_id"]} already exists')
+                continue
+
+            currency = values['currency']
+            if currency not in context['rates']:
+                context['rates'][currency] = SalaryService.rate(db.session, currency)
+            salary_min_base, salary_max_base = salary_range(
+                values['salary_from'], values['salary_to'], context['rates'][currency]
+            )
+            record = dict(
+                values,
+                location_id=locations.get(values['location']),
+                salary_min_base=salary_min_base,
+                salary_max_base=salary_max_base,
+                updated_at=now
+            )
+
+            was_active = current is not None and current[1]
+            change = int(values['is_active']) - int(bool(was_active))
+            deltas[ACTIVE_VACANCIES] += change
+            deltas[industry_key(context['industry'])] += change
+
+            written.append(row)
+            if current is None:
+                inserts.append(dict(
+                    record, employer_id=user.id, company_id=company.id, created_at=now, views_count=0
+                ))
+            else:
+                updates.append(dict(record, vacancy_id=current[0]))
+
+        table = Vacancy.__table__
+        try:
+            if inserts:
+                db.session.execute(table.insert(), inserts)
+            if updates:
+                # The remaining keys of each parameter set become the SET clause.
+                db.session.execute(table.update().where(table.c.id == bindparam('vacancy_id')), updates)
+            upsert_deltas(db.session.connection(), deltas)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            context['locations'].clear()
+            for row in written:
+                result.error(row, f'Batch failed: {str(e)}')
+            return
+
+        result.created += len(inserts)
+        result.updated += len(updates)
+        ResponseCache.invalidate(
+            [VACANCY_LIST, COMPANY_LIST, company_tag(company.id)]
+            + [vacancy_tag(update['vacancy_id']) for update in updates]
+        )
@@ -0,0 +1,102 @@
+﻿from datetime import datetime
+from sqlalchemy import func
+from app import db
+from app.models.application import Application
+from app.models.profile import Profile
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.utils.pagination import keyset_paginate
+
+def parse_date(value, name):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO date')
+
+class InboxService:
+    """Applications received by one company, across all its vacancies.
+
+    A page is a single joined query over plain columns, ordered by
+    ``(applied_at, id)`` with keyset pagination; per-status counts come
+    from one ``GROUP BY`` with the same filters minus the status. Both
+    are served by ``ix_applications_vacancy_status_applied``.
+    """
+
+    @staticmethod
+    def filtered(query, company_id, vacancy_id=None, applied_from=None, applied_to=None):
+        query = query.join(Vacancy, Vacancy.id == Application.vacancy_id).filter(
+            Vacancy.company_id == company_id
+        )
+        if vacancy_id is not None:
+            query = query.filter(Application.vacancy_id == vacancy_id)
+        if applied_from is not None:
+            query = query.filter(Application.applied_at >= applied_from)
+        if applied_to is not None:
+            query = query.filter(Application.applied_at < applied_to)
+        return query
+
+    @staticmethod
+    def applications(company, statuses=None, vacancy_id=None, applied_from=None, applied_to=None,
+                     cursor=None, per_page=20):
+        filters = dict(vacancy_id=vacancy_id, applied_from=applied_from, applied_to=applied_to)
+
+        page_query = InboxService.filtered(db.session.query(
+            Application.id,
+            Application.status,
+            Application.applied_at,
+            Application.updated_at,
+            Application.cover_letter,
+            Application.employer_notes,
+            Application.vacancy_id,
+            Application.applicant_id,
+            Vacancy.title.label('vacancy_title'),
+            Profile.first_name,
+            Profile.last_name,
+            User.email
+        ), company.id, **filters).join(
+            Profile, Profile.id == Application.applicant_id
+        ).join(
+            User, User.id == Profile.user_id
+        )
+        if statuses:
+            page_query = page_query.filter(Application.status.in_(statuses))
+        page = keyset_paginate(
+            page_query, [Application.applied_at, Application.id],
+            cursor=cursor, per_page=per_page, descending=True
+        )
+
+        counts = dict(InboxService.filtered(
+            db.session.query(Application.status, func.count(Application.id)), company.id, **filters
+        ).group_by(Application.status).all())
+        total = sum(count for status, count in counts.items() if not statuses or status in statuses)
+
+        return {
+            'applications': [InboxService.serialize(row, company) for row in page.items],
+            'counts': counts,
+            'total': total,
+            'next_cursor': page.next_cursor
+        }
+
+    @staticmethod
+    def serialize(row, company):
+        # Same shape as Application.to_dict.
+        return {
+            'id': row.id,
+            'cover_letter': row.cover_letter,
+            'applied_at': row.applied_at.isoformat(),
+            'status': row.status,
+            'employer_notes': row.employer_notes,
+            'updated_at': row.updated_at.isoformat(),
+            'vacancy_id': row.vacancy_id,
+            'applicant_id': row.applicant_id,
+            'vacancy': {
+                'title': row.vacancy_title,
+                'company_name': company.name
+            },
+            'applicant': {
+                'full_name': f'{row.first_name or ""} {row.last_name or ""}'.strip(),
+                'email': row.email
+            }
+        }
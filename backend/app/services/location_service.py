@@ -0,0 +1,193 @@
+﻿import re
+import threading
+import weakref
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect, or_, text
+from sqlalchemy.orm import Session
+from app import db
+from app.models.location import Location
+from app.models.vacancy import Vacancy
+
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+}
+
+# English exonyms that share too few trigrams with the transliterated
+# Russian name to be matched by similarity alone.
+LOCATION_ALIASES = {
+    'moscow': 'moskva',
+    'saint petersburg': 'sankt peterburg',
+    'st petersburg': 'sankt peterburg',
+    'petersburg': 'sankt peterburg',
+    'spb': 'sankt peterburg',
+    'piter': 'sankt peterburg',
+    'msk': 'moskva',
+    'nizhny novgorod': 'nizhniy novgorod',
+    'remote': 'udalenno',
+}
+
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+def normalize_location(value):
+    """Lower-case, transliterate and collapse a free-form location."""
+    value = (value or '').lower()
+    value = ''.join(CYRILLIC_TO_LATIN.get(char, char) for char in value)
+    value = NON_ALNUM_RE.sub(' ', value).strip()
+    for alias, canonical in LOCATION_ALIASES.items():
+        value = re.sub(rf'\b{alias}\b', canonical, value)
+    return value
+
+def trigrams(value):
+    """Trigrams of every word, padded like ``pg_trgm``."""
+    result = set()
+    for word in value.split():
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+class TrigramIndex:
+    """In-process stand-in for a ``pg_trgm`` GIN index over locations."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.grams = {}
+        self.keys = {}
+        self.max_id = 0
+
+    def add(self, location_id, search_key):
+        with self.lock:
+            if location_id in self.keys:
+                return
+            self.keys[location_id] = search_key
+            for gram in trigrams(search_key):
+                self.grams.setdefault(gram, set()).add(location_id)
+            self.max_id = max(self.max_id, location_id)
+
+    def match(self, search_key, threshold):
+        query_grams = trigrams(search_key)
+        if not query_grams:
+            return set()
+        with self.lock:
+            shared = {}
+            for gram in query_grams:
+                for location_id in self.grams.get(gram, ()):
+                    shared[location_id] = shared.get(location_id, 0) + 1
+            result = set()
+            for location_id, count in shared.items():
+                # word_similarity-style: how much of the query is covered,
+                # so "moskva" still matches "moskva russia".
+                if search_key in self.keys[location_id] or count / len(query_grams) >= threshold:
+                    result.add(location_id)
+            return result
+
+class LocationService:
+    _indexes = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def threshold():
+        if has_app_context():
+            return current_app.config.get('LOCATION_SIMILARITY_THRESHOLD', 0.5)
+        return 0.5
+
+    @staticmethod
+    def get_or_create(session, name):
+        search_key = normalize_location(name)
+        if not search_key:
+            return None
+
+        pending = session.info.setdefault('pending_locations', {})
+        if search_key in pending:
+            return pending[search_key]
+
+        with session.no_autoflush:
+            location = session.query(Location).filter_by(search_key=search_key).first()
+        if location is None:
+            location = Location(name=name.strip()[:100], search_key=search_key)
+            session.add(location)
+        pending[search_key] = location
+        return location
+
+    @staticmethod
+    def trigram_index():
+        engine = db.engine
+        index = LocationService._indexes.get(engine)
+        if index is None:
+            index = LocationService._indexes[engine] = TrigramIndex()
+        # Locations are append-only, so catching up on new IDs is enough.
+        max_id = db.session.query(func.max(Location.id)).scalar() or 0
+        if max_id > index.max_id:
+            rows = db.session.query(Location.id, Location.search_key).filter(
+                Location.id > index.max_id
+            ).all()
+            for location_id, search_key in rows:
+                index.add(location_id, search_key)
+        return index
+
+    @staticmethod
+    def resolve(value):
+        """Return the IDs of locations matching a user-entered filter."""
+        search_key = normalize_location(value)
+        if not search_key:
+            return []
+
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(
+                text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                {'threshold': str(LocationService.threshold())}
+            )
+            rows = db.session.query(Location.id).filter(
+                or_(
+                    Location.search_key.contains(search_key, autoescape=True),
+                    Location.search_key.op('%>')(search_key)
+                )
+            ).all()
+            return [row.id for row in rows]
+
+        return sorted(LocationService.trigram_index().match(search_key, LocationService.threshold()))
+
+    @staticmethod
+    def backfill(batch_size=1000):
+        """Attach a normalized location to vacancies created before it existed."""
+        updated = 0
+        last_id = 0
+        while True:
+            vacancies = Vacancy.query.filter(
+                Vacancy.id > last_id,
+                Vacancy.location_id.is_(None),
+                Vacancy.location.isnot(None),
+                Vacancy.location != ''
+            ).order_by(Vacancy.id).limit(batch_size).all()
+            if not vacancies:
+                return updated
+            last_id = vacancies[-1].id
+            for vacancy in vacancies:
+                location = LocationService.get_or_create(db.session, vacancy.location)
+                if location is not None:
+                    vacancy.normalized_location = location
+                    updated += 1
+            db.session.commit()
+
+@event.listens_for(Session, 'before_flush')
+def assign_vacancy_locations(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Vacancy):
+            continue
+        if obj in session.new or 'location' in inspect(obj).committed_state:
+            obj.normalized_location = LocationService.get_or_create(session, obj.location)
+
+@event.listens_for(Session, 'after_flush_postexec')
+def clear_pending_locations(session, flush_context):
+    session.info.pop('pending_locations', None)
+
+@event.listens_for(Location.__table__, 'after_create')
+def install_trigram_index(target, connection, **kw):
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        connection.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_locations_search_key_trgm '
+            'ON locations USING GIN (search_key gin_trgm_ops)'
+        ))
@@ -0,0 +1,216 @@
+﻿import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from app import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    return ','.join(f'{name}="{escape(value)}"' for name, value in labels)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{format_labels(labels + [("le", bound)])}}} {cumulative}'
+        yield f'{name}_sum{{{format_labels(labels)}}} {self.sum}'
+        yield f'{name}_count{{{format_labels(labels)}}} {self.count}'
+
+class RequestStats:
+    __slots__ = ('started', 'queries', 'db_time', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+
+class RequestMetrics:
+    """Request and SQL metrics of this process, in Prometheus text format.
+
+    A request costs two clock reads per query and one locked update when
+    it ends. The same statement run more than
+    ``METRICS_N_PLUS_ONE_THRESHOLD`` times in one request counts as an
+    N+1 and is logged once per endpoint. Every gunicorn worker keeps its
+    own numbers, so a scrape sees the worker that answered it.
+    """
+
+    def __init__(self, app):
+        self.threshold = app.config.get('METRICS_N_PLUS_ONE_THRESHOLD', 10)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.db_time = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.n_plus_one = Counter()
+        self.reported = set()
+        self.pool_events = Counter()
+
+    def start(self):
+        g.request_stats = RequestStats()
+
+    def finish(self, response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - stats.started
+        endpoint = request.endpoint or 'unmatched'
+        method = request.method
+        statement, repeats = stats.statements.most_common(1)[0] if stats.statements else (None, 0)
+        suspect = repeats > self.threshold
+        with self.lock:
+            self.requests[(endpoint, method, response.status_code)] += 1
+            self.latency[(endpoint, method)].observe(elapsed)
+            self.queries[endpoint].observe(stats.queries)
+            self.db_time[endpoint].observe(stats.db_time)
+            if suspect:
+                self.n_plus_one[endpoint] += 1
+                first = (endpoint, statement) not in self.reported
+                self.reported.add((endpoint, statement))
+        if suspect and first:
+            current_app.logger.warning(
+                f'Possible N+1 in {endpoint}: statement ran {repeats} times: {" ".join(statement.split())[:300]}'
+            )
+        return response
+
+    def pool_lines(self):
+        engines = [('primary', db.engine)]
+        replicas = current_app.extensions.get('read_replicas')
+        if replicas is not None:
+            engines += [(replica.name, replica.engine) for replica in replicas.replicas]
+        for name, method in (('size', 'size'), ('checked_out', 'checkedout'),
+                             ('checked_in', 'checkedin'), ('overflow', 'overflow')):
+            samples = [
+                (engine_name, getattr(engine.pool, method)())
+                for engine_name, engine in engines if hasattr(engine.pool, method)
+            ]
+            if not samples:
+                continue
+            yield f'# TYPE careerfinder_db_pool_{name} gauge'
+            for engine_name, value in samples:
+                yield f'careerfinder_db_pool_{name}{{engine="{engine_name}"}} {value}'
+        for name, value in sorted(self.pool_events.items()):
+            yield f'# TYPE careerfinder_db_pool_{name}_total counter'
+            yield f'careerfinder_db_pool_{name}_total {value}'
+        if replicas is not None:
+            yield '# TYPE careerfinder_db_replica_healthy gauge'
+            for replica in replicas.replicas:
+                yield f'careerfinder_db_replica_healthy{{engine="{replica.name}"}} {int(replica.healthy)}'
+
+    def render(self):
+        with self.lock:
+            requests = sorted(self.requests.items())
+            latency = sorted((key, self.copy(histogram)) for key, histogram in self.latency.items())
+            queries = sorted((key, self.copy(histogram)) for key, histogram in self.queries.items())
+            db_time = sorted((key, self.copy(histogram)) for key, histogram in self.db_time.items())
+            n_plus_one = sorted(self.n_plus_one.items())
+
+        lines = [
+            '# HELP careerfinder_http_requests_total Requests by endpoint, method and status.',
+            '# TYPE careerfinder_http_requests_total counter'
+        ]
+        for (endpoint, method, status), count in requests:
+            labels = format_labels([('endpoint', endpoint), ('method', method), ('status', status)])
+            lines.append(f'careerfinder_http_requests_total{{{labels}}} {count}')
+
+        lines += [
+            '# HELP careerfinder_http_request_duration_seconds Request latency by endpoint.',
+            '# TYPE careerfinder_http_request_duration_seconds histogram'
+        ]
+        for (endpoint, method), histogram in latency:
+            lines += histogram.lines(
+                'careerfinder_http_request_duration_seconds', [('endpoint', endpoint), ('method', method)]
+            )
+
+        lines += [
+            '# HELP careerfinder_db_queries_per_request SQL statements run per request.',
+            '# TYPE careerfinder_db_queries_per_request histogram'
+        ]
+        for endpoint, histogram in queries:
+            lines += histogram.lines('careerfinder_db_queries_per_request', [('endpoint', endpoint)])
+
+        lines += [
+            '# HELP careerfinder_db_time_per_request_seconds Time spent in SQL per request.',
+            '# TYPE careerfinder_db_time_per_request_seconds histogram'
+        ]
+        for endpoint, histogram in db_time:
+            lines += histogram.lines('careerfinder_db_time_per_request_seconds', [('endpoint', endpoint)])
+
+        lines += [
+            '# HELP careerfinder_db_n_plus_one_total Requests that repeated one statement above the threshold.',
+            '# TYPE careerfinder_db_n_plus_one_total counter'
+        ]
+        for endpoint, count in n_plus_one:
+            lines.append(f'careerfinder_db_n_plus_one_total{{{format_labels([("endpoint", endpoint)])}}} {count}')
+
+        lines += self.pool_lines()
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def copy(histogram):
+        copied = Histogram(histogram.buckets)
+        copied.counts = list(histogram.counts)
+        copied.sum = histogram.sum
+        copied.count = histogram.count
+        return copied
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    if context is None or not has_request_context():
+        return
+    stats = g.get('request_stats')
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_time += time.perf_counter() - getattr(context, 'query_started', time.perf_counter())
+    stats.statements[statement] += 1
+
+@event.listens_for(Pool, 'checkout')
+def count_checkout(dbapi_connection, connection_record, connection_proxy):
+    count_pool_event('checkouts')
+
+@event.listens_for(Pool, 'connect')
+def count_connect(dbapi_connection, connection_record):
+    count_pool_event('connections')
+
+def count_pool_event(name):
+    if not has_app_context():
+        return
+    metrics = current_app.extensions.get('metrics')
+    if metrics is not None:
+        with metrics.lock:
+            metrics.pool_events[name] += 1
+
+def init_metrics(app):
+    metrics = RequestMetrics(app)
+    app.extensions['metrics'] = metrics
+    if app.config.get('METRICS_ENABLED', True):
+        app.before_request(metrics.start)
+        app.after_request(metrics.finish)
+    return metrics
@@ -0,0 +1,163 @@
+﻿import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+from werkzeug.security import generate_password_hash, check_password_hash
+
+class HashingBusy(Exception):
+    """Raised when the hasher is saturated; the caller should answer 503."""
+
+    def __init__(self, retry_after=1):
+        super().__init__('Password hashing is saturated')
+        self.retry_after = retry_after
+
+class PasswordHasher:
+    """Runs password hashing off the request thread.
+
+    Hashes and checks go to a small process pool so that a burst of
+    logins burns CPU in ``PASSWORD_HASH_WORKERS`` processes instead of
+    every request thread. At most ``PASSWORD_HASH_MAX_PENDING`` jobs may
+    be running or queued; beyond that, and for jobs not finished within
+    ``PASSWORD_HASH_TIMEOUT``, ``HashingBusy`` is raised straight away
+    rather than letting requests pile up behind the pool. With no workers
+    the job runs inline, still under the same admission limit.
+
+    Bulk hashing (:meth:`hash_many`) has a pool of its own, shared by every
+    caller in the process and sized by ``PROVISIONING_HASH_PROCESSES``
+    (by default the cores not taken by login workers), so that imports
+    neither wait behind logins nor starve them.
+    """
+
+    def __init__(self, app):
+        config = app.config
+        self.method = config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+        self.workers = config.get('PASSWORD_HASH_WORKERS', 2)
+        self.max_pending = config.get('PASSWORD_HASH_MAX_PENDING', 16)
+        self.timeout = config.get('PASSWORD_HASH_TIMEOUT', 10)
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.bulk_workers = config.get('PROVISIONING_HASH_PROCESSES') or max(
+            (os.cpu_count() or 1) - max(self.workers, 0), 1
+        )
+        self.executor = None
+        self.bulk_executor = None
+        self.executor_lock = threading.Lock()
+        self.prefix = None
+        os.register_at_fork(after_in_child=self.forget)
+
+    def start(self):
+        """Fork both pools' processes now, while the process has one thread.
+
+        The children are forked: they only run werkzeug's hash functions,
+        which are already imported, while spawn and forkserver would re-run
+        the main script (``run.py`` builds an app at import time). Forking
+        once request, outbox or view-counter threads run could leave them
+        stuck on a lock one of those threads held, so the server entry
+        points call this before serving; elsewhere (CLI, development
+        server) the pools still start on first use.
+        """
+        if self.workers <= 0:
+            return
+        for executor in (self.pool(), self.bulk_pool()):
+            # With fork, the first job starts every process of the pool.
+            executor.submit(os.getpid).result()
+
+    def forget(self):
+        # Pools inherited over a fork (``gunicorn --preload``) have no
+        # manager thread in the child, which starts its own on first use.
+        self.executor = self.bulk_executor = None
+        self.executor_lock = threading.Lock()
+
+    def pool(self):
+        if self.executor is None:
+            with self.executor_lock:
+                if self.executor is None:
+                    self.executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('fork')
+                    )
+        return self.executor
+
+    def run(self, function, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy()
+        if self.workers <= 0:
+            try:
+                return function(*args)
+            finally:
+                self.slots.release()
+        try:
+            future = self.pool().submit(function, *args)
+        except BrokenProcessPool:
+            self.slots.release()
+            self.reset()
+            raise
+        except Exception:
+            self.slots.release()
+            raise
+        # The slot is held until the job really finishes, even when the
+        # request gives up waiting on it.
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HashingBusy(retry_after=self.timeout)
+        except BrokenProcessPool:
+            self.reset()
+            raise
+
+    def hash(self, password):
+        return self.run(generate_password_hash, password, self.method)
+
+    def bulk_pool(self):
+        if self.bulk_executor is None:
+            with self.executor_lock:
+                if self.bulk_executor is None:
+                    self.bulk_executor = ProcessPoolExecutor(
+                        max_workers=self.bulk_workers, mp_context=multiprocessing.get_context('fork')
+                    )
+        return self.bulk_executor
+
+    def hash_many(self, passwords):
+        if self.workers <= 0:
+            return [generate_password_hash(password, self.method) for password in passwords]
+        try:
+            return list(self.bulk_pool().map(generate_password_hash, passwords, repeat(self.method), chunksize=16))
+        except BrokenProcessPool:
+            self.reset()
+            raise
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self.run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        if self.prefix is None:
+            # Werkzeug fills in defaults (``pbkdf2`` becomes
+            # ``pbkdf2:sha256:600000``), so take the prefix from a real hash.
+            self.prefix = self.hash('').split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self.prefix
+
+    def reset(self):
+        with self.executor_lock:
+            executors = [self.executor, self.bulk_executor]
+            self.executor = self.bulk_executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self):
+        self.reset()
+
+def init_password_hasher(app):
+    hasher = PasswordHasher(app)
+    app.extensions['password_hasher'] = hasher
+    atexit.register(hasher.stop)
+    return hasher
+
+def start_password_hasher(app):
+    """Start the hashing pools before the server takes requests; see PasswordHasher.start."""
+    app.extensions['password_hasher'].start()
@@ -0,0 +1,169 @@
+﻿from collections import Counter
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models.company import Company
+from app.models.profile import Profile
+from app.models.user import User
+from app.services.email_service import EmailService
+from app.services.response_cache import COMPANY_LIST, ResponseCache
+from app.services.stats_service import TOTAL_COMPANIES, upsert_deltas
+from app.utils.validators import validate_email, validate_password
+
+USER_TYPES = ('job_seeker', 'employer')
+TEXT_LIMITS = {
+    'username': 80, 'email': 120, 'first_name': 50, 'last_name': 50,
+    'company_name': 100, 'industry': 100
+}
+
+def clean_user(data):
+    """Validate one user record; return ``(values, error)``."""
+    values = {}
+    for field in ('email', 'password'):
+        if not str(data.get(field) or '').strip():
+            return None, f'{field} is required'
+    for field in TEXT_LIMITS:
+        values[field] = str(data.get(field) or '').strip() or None
+        if values[field] and len(values[field]) > TEXT_LIMITS[field]:
+            return None, f'{field} is longer than {TEXT_LIMITS[field]} characters'
+
+    if not validate_email(values['email']):
+        return None, 'Invalid email format'
+    values['password'] = str(data['password'])
+    if not validate_password(values['password']):
+        return None, 'Password must be at least 6 characters long'
+    values['user_type'] = data.get('user_type') or 'job_seeker'
+    if values['user_type'] not in USER_TYPES:
+        return None, f'user_type must be one of {", ".join(USER_TYPES)}'
+    values['username'] = values['username'] or values['email'].split('@')[0]
+    if values['user_type'] == 'employer':
+        values['company_name'] = values['company_name'] or f'Company of {values["username"]}'
+    return values, None
+
+class ProvisioningResult:
+    def __init__(self):
+        self.created = 0
+        self.error_count = 0
+        self.users = []
+
+    def success(self, row, email, user_id):
+        self.created += 1
+        self.users.append({'row': row, 'email': email, 'status': 'created', 'id': user_id})
+
+    def error(self, row, email, message):
+        self.error_count += 1
+        self.users.append({'row': row, 'email': email, 'status': 'error', 'error': message})
+
+    def to_dict(self):
+        return {
+            'created': self.created,
+            'error_count': self.error_count,
+            'users': sorted(self.users, key=lambda user: user['row'])
+        }
+
+class UserProvisioningService:
+    """Creates many users at once, with their profile or company.
+
+    Records are written in chunks of ``batch_size``. For each chunk the
+    emails and usernames already taken are found with one ``IN`` query
+    each, passwords are hashed in parallel on the hasher's bulk pool, and
+    users, profiles, companies and optional welcome emails are inserted
+    with one executemany statement per table in a single transaction.
+    """
+
+    @staticmethod
+    def provision(records, send_welcome=False, batch_size=500):
+        result = ProvisioningResult()
+        hasher = current_app.extensions['password_hasher']
+        chunk = []
+        for row, data, error in records:
+            if error is None:
+                values, error = clean_user(data)
+            if error is not None:
+                result.error(row, (data or {}).get('email'), error)
+                continue
+            chunk.append((row, values))
+            if len(chunk) >= batch_size:
+                UserProvisioningService.write_chunk(chunk, send_welcome, result, hasher)
+                chunk = []
+        if chunk:
+            UserProvisioningService.write_chunk(chunk, send_welcome, result, hasher)
+        return result
+
+    @staticmethod
+    def write_chunk(chunk, send_welcome, result, hasher):
+        emails = {values['email'] for _, values in chunk}
+        usernames = {values['username'] for _, values in chunk}
+        taken_emails = {email for email, in db.session.query(User.email).filter(User.email.in_(emails))}
+        taken_usernames = {
+            username for username, in db.session.query(User.username).filter(User.username.in_(usernames))
+        }
+        # Give the connection back to the pool while the passwords hash.
+        db.session.rollback()
+
+        rows = []
+        for row, values in chunk:
+            if values['email'] in taken_emails:
+                result.error(row, values['email'], 'User already exists with this email')
+            elif values['username'] in taken_usernames:
+                result.error(row, values['email'], 'Username already taken')
+            else:
+                # Later duplicates inside the input are rejected the same way.
+                taken_emails.add(values['email'])
+                taken_usernames.add(values['username'])
+                rows.append((row, values))
+        if not rows:
+            return
+
+        hashes = hasher.hash_many([values['password'] for _, values in rows])
+        now = datetime.utcnow()
+        users = [
+            {
+                'username': values['username'], 'email': values['email'], 'password_hash': password_hash,
+                'user_type': values['user_type'], 'created_at': now, 'updated_at': now,
+                'is_active': True, 'is_verified': False
+            }
+            for (_, values), password_hash in zip(rows, hashes)
+        ]
+
+        try:
+            # Not INSERT .. RETURNING: keeping the ids in parameter order
+            # makes SQLite fall back to one statement per row.
+            db.session.execute(User.__table__.insert(), users)
+            user_ids = dict(db.session.query(User.email, User.id).filter(
+                User.email.in_([values['email'] for _, values in rows])
+            ))
+
+            profiles, companies = [], []
+            for _, values in rows:
+                user_id = user_ids[values['email']]
+                if values['user_type'] == 'employer':
+                    companies.append({
+                        'user_id': user_id, 'name': values['company_name'], 'industry': values['industry'],
+                        'created_at': now, 'updated_at': now, 'is_verified': False
+                    })
+                else:
+                    profiles.append({
+                        'user_id': user_id, 'first_name': values['first_name'], 'last_name': values['last_name'],
+                        'created_at': now, 'updated_at': now
+                    })
+            if profiles:
+                db.session.execute(Profile.__table__.insert(), profiles)
+            if companies:
+                db.session.execute(Company.__table__.insert(), companies)
+                upsert_deltas(db.session.connection(), Counter({TOTAL_COMPANIES: len(companies)}))
+            if send_welcome:
+                EmailService.send_many(
+                    EmailService.welcome_email(values['email'], values['username']) for _, values in rows
+                )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for row, values in rows:
+                result.error(row, values['email'], f'Batch failed: {str(e)}')
+            return
+
+        for row, values in rows:
+            result.success(row, values['email'], user_ids[values['email']])
+        if companies:
+            ResponseCache.invalidate([COMPANY_LIST])
@@ -0,0 +1,142 @@
+﻿import numpy as np
+from flask import current_app
+from app import db
+from app.models.application import Application
+from app.models.profile import Profile
+from app.services.recommendation_service import (
+    PROFILE_FIELD_WEIGHTS, RecommendationService, weighted_terms
+)
+from app.services.serialization_service import SerializationService
+from app.utils.cache import TTLCache
+from app.utils.pagination import ListPage
+
+RANKING_FIELD_WEIGHTS = {'requirements': 2, 'description': 1}
+# Stay under SQLite's bound-parameter limit when loading profiles.
+PROFILE_CHUNK = 900
+
+class RankingService:
+    """Ranks the applicants of a vacancy by profile/vacancy similarity.
+
+    Profiles are vectorized with the vocabulary and IDF of the
+    recommendation engine, so a profile's score only depends on its own
+    text and the vacancy's. Terms the engine has not seen yet (from
+    vacancies or profiles written after its last build) are scored with
+    the IDF of a term no vacancy contains instead of being dropped.
+    Scores are kept per vacancy and reused while the vacancy's
+    ``updated_at``, the profile's ``updated_at`` and the engine
+    ``version`` stay the same; only new or changed profiles are scored,
+    in one vectorized batch. With ``RECOMMENDATIONS_ENABLED`` off
+    applicants come back in application order, without scores.
+    """
+
+    @staticmethod
+    def cache():
+        cache = current_app.extensions.get('applicant_scores')
+        if cache is None:
+            cache = current_app.extensions['applicant_scores'] = TTLCache(
+                maxsize=current_app.config.get('APPLICANT_SCORES_CACHE_SIZE', 256),
+                ttl=current_app.config.get('APPLICANT_SCORES_CACHE_TTL', 3600)
+            )
+        return cache
+
+    @staticmethod
+    def score_profiles(engine, vacancy, profile_ids):
+        extra = {}
+        rows, columns, values = engine.vectorize_batch([weighted_terms(vacancy, RANKING_FIELD_WEIGHTS)], extra)
+        query = np.zeros(len(engine.vocabulary) + len(extra), dtype=np.float32)
+        query[columns] = values
+
+        scores = {}
+        for start in range(0, len(profile_ids), PROFILE_CHUNK):
+            chunk = profile_ids[start:start + PROFILE_CHUNK]
+            profiles = db.session.query(
+                Profile.id, Profile.skills, Profile.experience, Profile.resume_text
+            ).filter(Profile.id.in_(chunk)).all()
+            rows, columns, values = engine.vectorize_batch(
+                (weighted_terms(profile._asdict(), PROFILE_FIELD_WEIGHTS) for profile in profiles), extra
+            )
+            # Terms only profiles use got columns past the vacancy's.
+            shared = columns < len(query)
+            batch = np.bincount(
+                rows[shared], weights=values[shared] * query[columns[shared]], minlength=len(profiles)
+            )
+            scores.update(zip((profile.id for profile in profiles), batch.tolist()))
+        return scores
+
+    @staticmethod
+    def scores(vacancy):
+        """Return ``[(application_id, applied_at, score)]`` for every applicant."""
+        engine = RecommendationService.engine()
+        applicants = db.session.query(
+            Application.id, Application.applicant_id, Application.applied_at, Profile.updated_at
+        ).join(Profile, Profile.id == Application.applicant_id).filter(
+            Application.vacancy_id == vacancy.id
+        ).all()
+
+        cache = RankingService.cache()
+        version = (vacancy.updated_at, engine.version)
+        entry = cache.get(vacancy.id)
+        if entry is None or entry['version'] != version:
+            entry = {'version': version, 'profiles': {}}
+
+        known = entry['profiles']
+        stale = [
+            applicant.applicant_id for applicant in applicants
+            if known.get(applicant.applicant_id, (None,))[0] != applicant.updated_at
+        ]
+        if stale:
+            fresh = RankingService.score_profiles(engine, vacancy, stale)
+            updated = {applicant.applicant_id: applicant.updated_at for applicant in applicants}
+            for profile_id, score in fresh.items():
+                known[profile_id] = (updated[profile_id], score)
+        cache.set(vacancy.id, entry)
+
+        return [
+            (applicant.id, applicant.applied_at, known.get(applicant.applicant_id, (None, 0.0))[1])
+            for applicant in applicants
+        ]
+
+    @staticmethod
+    def rank(vacancy, page=1, per_page=20):
+        if not RecommendationService.enabled():
+            return RankingService.unranked(vacancy, page, per_page)
+        scored = RankingService.scores(vacancy)
+        if scored:
+            ids = np.array([application_id for application_id, _, _ in scored])
+            applied = np.array([applied_at.timestamp() if applied_at else 0 for _, applied_at, _ in scored])
+            scores = np.array([score for _, _, score in scored])
+            # Highest score first; earlier applications win ties.
+            order = np.lexsort((applied, -scores))
+        else:
+            ids = scores = order = np.array([], dtype=np.int64)
+
+        window = order[(page - 1) * per_page:page * per_page]
+        page_scores = dict(zip(ids[window].tolist(), scores[window].tolist()))
+        applications = {
+            application.id: application
+            for application in Application.query.options(
+                *SerializationService.application_load_options()
+            ).filter(Application.id.in_(list(page_scores)))
+        } if page_scores else {}
+        page_ids = [application_id for application_id in page_scores if application_id in applications]
+        serialized = SerializationService.serialize_applications(
+            applications[application_id] for application_id in page_ids
+        )
+        items = [
+            {'score': round(page_scores[application_id], 4), 'application': application}
+            for application_id, application in zip(page_ids, serialized)
+        ]
+        return ListPage(items, page, per_page, len(scored))
+
+    @staticmethod
+    def unranked(vacancy, page=1, per_page=20):
+        applications = Application.query.options(
+            *SerializationService.application_load_options()
+        ).filter(Application.vacancy_id == vacancy.id).order_by(
+            Application.applied_at, Application.id
+        ).paginate(page=page, per_page=per_page, error_out=False)
+        items = [
+            {'score': None, 'application': application}
+            for application in SerializationService.serialize_applications(applications.items)
+        ]
+        return ListPage(items, page, per_page, applications.total)
@@ -0,0 +1,238 @@
+﻿import atexit
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app import db
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'cf_primary_until'
+STICKY_HEADER = 'X-Primary-Until'
+# Seconds the replica is behind; NULL when it is not replaying (a primary).
+LAG_QUERIES = {
+    'postgresql': 'SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())'
+}
+
+def replica_url(app, url):
+    # Relative SQLite paths resolve against the instance folder, like the
+    # primary's do in Flask-SQLAlchemy.
+    url = make_url(url)
+    if url.drivername.startswith('sqlite') and url.database not in (None, '', ':memory:'):
+        if not url.database.startswith('/') and not url.database.startswith('file:'):
+            url = url.set(database=f'{app.instance_path}/{url.database}')
+    return url
+
+class Replica:
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.lag = None
+        self.checked_at = None
+        self.failed_at = 0.0
+        self.lock = threading.Lock()
+
+class ReadReplicas:
+    """Read replicas that ``@read_replica`` endpoints read from.
+
+    A request picks one healthy replica, round-robin, and keeps it for
+    all its reads (see RoutingSession). It reads from the primary instead
+    for ``READ_REPLICA_STICKY_SECONDS`` after the same client wrote: a
+    successful unsafe request returns the deadline both as a cookie and
+    as an ``X-Primary-Until`` header, which token clients send back on
+    their reads. The deadline travels with the client, so whichever
+    worker serves the next read sees it.
+
+    Health is probed every ``READ_REPLICA_HEALTH_INTERVAL`` seconds by a
+    background thread, never on the request path (under ASGI views run on
+    the event loop); a replica that cannot be reached or lags more than
+    ``READ_REPLICA_MAX_LAG`` seconds is skipped until a later probe
+    passes. A replica that fails mid-request is marked down at once and
+    the view is retried on the primary. With every replica down reads go
+    to the primary.
+    """
+
+    def __init__(self, app, urls):
+        self.app = app
+        options = app.config.get('READ_REPLICA_ENGINE_OPTIONS', {})
+        self.replicas = [
+            Replica(f'replica{number}', create_engine(replica_url(app, url), **options))
+            for number, url in enumerate(urls)
+        ]
+        self.sticky_seconds = app.config.get('READ_REPLICA_STICKY_SECONDS', 5)
+        self.health_interval = app.config.get('READ_REPLICA_HEALTH_INTERVAL', 5)
+        self.max_lag = app.config.get('READ_REPLICA_MAX_LAG', 10)
+        self.counter = itertools.count()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.thread_lock = threading.Lock()
+        for replica in self.replicas:
+            event.listen(replica.engine, 'handle_error', self.error_handler(replica))
+
+    def error_handler(self, replica):
+        def record_error(context):
+            if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+                self.mark_down(replica, str(context.original_exception))
+        return record_error
+
+    def mark_down(self, replica, reason):
+        if replica.healthy:
+            self.app.logger.warning(f'Read replica {replica.name} is unavailable: {reason}')
+        replica.healthy = False
+        replica.failed_at = replica.checked_at = time.monotonic()
+
+    def check(self, replica):
+        if not replica.lock.acquire(blocking=False):
+            return replica.healthy
+        try:
+            replica.checked_at = time.monotonic()
+            query = LAG_QUERIES.get(replica.engine.dialect.name, 'SELECT NULL')
+            try:
+                with replica.engine.connect() as connection:
+                    lag = connection.execute(text(query)).scalar()
+            except Exception as e:
+                self.mark_down(replica, str(e))
+                return False
+            replica.lag = float(lag) if lag is not None else None
+            if replica.lag is not None and replica.lag > self.max_lag:
+                self.mark_down(replica, f'{replica.lag:.1f}s behind the primary')
+                return False
+            if not replica.healthy:
+                self.app.logger.info(f'Read replica {replica.name} is available again')
+            replica.healthy = True
+            return True
+        finally:
+            replica.lock.release()
+
+    def choose(self):
+        if not self.replicas:
+            return None
+        self.start()
+        start = next(self.counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+    def start(self):
+        # Started lazily so that every gunicorn worker gets its own
+        # thread after the fork.
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.thread_lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run, name='read-replica-health', daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while True:
+            for replica in self.replicas:
+                self.check(replica)
+            if self.stopped.wait(self.health_interval):
+                return
+
+    def stop(self):
+        self.stopped.set()
+
+    def is_sticky(self):
+        now = time.time()
+        for value in (request.cookies.get(STICKY_COOKIE), request.headers.get(STICKY_HEADER)):
+            try:
+                until = float(value or 0)
+            except ValueError:
+                continue
+            # A client can only pin itself for as long as a write would.
+            if now < until <= now + self.sticky_seconds:
+                return True
+        return False
+
+    def stick(self, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+        until = f'{time.time() + self.sticky_seconds:.3f}'
+        response.set_cookie(
+            STICKY_COOKIE, until, max_age=math.ceil(self.sticky_seconds), httponly=True, samesite='Lax'
+        )
+        response.headers[STICKY_HEADER] = until
+        return response
+
+    def status(self):
+        for replica in self.replicas:
+            self.check(replica)
+        return [
+            {
+                'name': replica.name,
+                'url': replica.engine.url.render_as_string(hide_password=True),
+                'healthy': replica.healthy,
+                'lag': replica.lag
+            }
+            for replica in self.replicas
+        ]
+
+def read_replica(view):
+    """Let a read-only GET endpoint read from a replica; see ReadReplicas."""
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        replicas = current_app.extensions.get('read_replicas')
+        if replicas is None or request.method not in SAFE_METHODS:
+            return view(*args, **kwargs)
+        if replicas.is_sticky():
+            # Tells ResponseCache not to serve this client a cached copy
+            # of what it has just changed.
+            g.sticky_primary = True
+            return view(*args, **kwargs)
+        replica = replicas.choose()
+        if replica is None:
+            return view(*args, **kwargs)
+
+        started = time.monotonic()
+        g.replica_engine = replica.engine
+        try:
+            response = view(*args, **kwargs)
+        finally:
+            g.pop('replica_engine', None)
+        if replica.failed_at >= started:
+            # Went down mid-request; the view is read-only, so run it again
+            # against the primary.
+            db.session.rollback()
+            response = view(*args, **kwargs)
+        return response
+    return decorated
+
+@contextmanager
+def on_primary():
+    """Read from the primary inside a ``@read_replica`` view.
+
+    For reads that move a watermark, which a lagging replica would make
+    skip rows for good.
+    """
+    engine = g.pop('replica_engine', None) if has_app_context() else None
+    try:
+        yield
+    finally:
+        if engine is not None:
+            g.replica_engine = engine
+
+@event.listens_for(Session, 'after_flush')
+def mark_flushed(session, flush_context):
+    session.info['flushed'] = True
+
+def init_read_replicas(app):
+    urls = app.config.get('READ_REPLICA_URLS') or []
+    if not urls:
+        return None
+    replicas = ReadReplicas(app, urls)
+    app.extensions['read_replicas'] = replicas
+    app.after_request(replicas.stick)
+    atexit.register(replicas.stop)
+    return replicas
@@ -0,0 +1,415 @@
+﻿import math
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.application import Application
+from app.models.vacancy import Vacancy
+from app.services.fulltext_service import tokenize_query
+from app.services.location_service import LocationService
+from app.services.read_replicas import on_primary
+from app.services.search_index import vacancy_document
+
+VACANCY_FIELD_WEIGHTS = {'title': 3, 'requirements': 2, 'description': 1}
+PROFILE_FIELD_WEIGHTS = {'skills': 3, 'experience': 2, 'resume_text': 1}
+LOCATION_BOOST = 0.25
+JOB_TYPE_BOOST = 0.1
+ROW_ARRAYS = (
+    ('ids', np.int64, -1),
+    ('active', np.bool_, False),
+    ('employment_type', np.int32, -1),
+    ('location_id', np.int64, -1),
+    ('salary_max', np.float64, np.nan),
+)
+
+def weighted_terms(source, weights):
+    terms = Counter()
+    for field, weight in weights.items():
+        value = source.get(field) if isinstance(source, dict) else getattr(source, field)
+        for token in tokenize_query(value):
+            terms[token] += weight
+    return terms
+
+class RecommendationEngine:
+    """TF-IDF matrix over active vacancies, stored column-major in NumPy.
+
+    Scoring a profile is a sparse matrix-vector product: the postings of
+    the profile's terms are gathered and summed with one ``np.bincount``.
+    Filters and boosts are vectorized masks over per-row metadata arrays.
+
+    New or edited vacancies are appended as rows of a small delta segment
+    (per-term posting lists) and merged into the main matrix once it grows past
+    ``compact_threshold``. Replaced and deactivated rows are masked out
+    and dropped by :meth:`vacuum` once as many have piled up, so the
+    matrix stays the size of the active set. Deltas reuse the vocabulary
+    and IDF of the last full build, so terms first seen after it are
+    ignored until the next rebuild. ``version`` changes with every
+    rebuild, delta row, removal and compaction.
+    """
+
+    def __init__(self, compact_threshold=2000):
+        self.compact_threshold = compact_threshold
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.synced_at = None
+        self.generation = 0
+        self.revision = 0
+        self.reset()
+
+    @property
+    def version(self):
+        return (self.generation, self.revision)
+
+    def reset(self):
+        self.vocabulary = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.unseen_idf = 1.0
+        self.col_ptr = np.zeros(1, dtype=np.int64)
+        self.col_rows = np.zeros(0, dtype=np.int32)
+        self.col_vals = np.zeros(0, dtype=np.float32)
+        self.delta = defaultdict(list)
+        self.delta_rows = 0
+        self.size = 0
+        self.dead_rows = 0
+        self.row_of = {}
+        self.labels = {}
+        self._allocate(1024)
+
+    def _allocate(self, capacity):
+        for name, dtype, fill in ROW_ARRAYS:
+            array = np.full(capacity, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:len(old)] = old
+            setattr(self, name, array)
+
+    def _label(self, value):
+        if not value:
+            return -1
+        return self.labels.setdefault(value.strip().lower(), len(self.labels))
+
+    def _vectorize(self, terms):
+        """Normalized ``{column: weight}`` using the current vocabulary."""
+        vector = {}
+        for term, frequency in terms.items():
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[column] = (1 + math.log(frequency)) * self.idf[column]
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if not norm:
+            return {}
+        return {column: weight / norm for column, weight in vector.items()}
+
+    def vectorize_batch(self, term_counters, extra=None):
+        """Normalized TF-IDF rows for many term counters as COO arrays.
+
+        Uses the vocabulary and IDF of the last build. Unknown terms are
+        dropped, unless an ``extra`` dict is given: they are then added to
+        it and numbered after the vocabulary, weighted as if no vacancy of
+        the build contained them. Returns ``(rows, columns, values)``.
+        """
+        with self.lock:
+            known = len(self.vocabulary)
+            rows, columns, frequencies = [], [], []
+            for row, terms in enumerate(term_counters):
+                for term, frequency in terms.items():
+                    column = self.vocabulary.get(term)
+                    if column is None and extra is not None:
+                        column = known + extra.setdefault(term, len(extra))
+                    if column is not None:
+                        rows.append(row)
+                        columns.append(column)
+                        frequencies.append(frequency)
+            rows = np.array(rows, dtype=np.int64)
+            columns = np.array(columns, dtype=np.int64)
+            idf = np.concatenate((self.idf, np.full(len(extra or ()), self.unseen_idf, dtype=np.float32)))
+            values = (1 + np.log(np.array(frequencies, dtype=np.float32))) * idf[columns]
+        norms = np.sqrt(np.bincount(rows, weights=values * values))
+        return rows, columns, (values / norms[rows]).astype(np.float32)
+
+    def _add_row(self, document):
+        if self.size == len(self.ids):
+            self._allocate(len(self.ids) * 2)
+        row = self.size
+        self.size += 1
+        self.ids[row] = document['id']
+        self.active[row] = True
+        self.employment_type[row] = self._label(document['employment_type'])
+        self.location_id[row] = document['location_id'] or -1
+        salary_max = document['salary_max_base']
+        self.salary_max[row] = salary_max if salary_max is not None else np.nan
+        self.row_of[document['id']] = row
+        self.revision += 1
+        return row
+
+    def load(self, documents, synced_at):
+        """Build the main matrix from scratch."""
+        with self.lock:
+            self.reset()
+            rows, columns, frequencies = [], [], []
+            for document in documents:
+                if not document['is_active']:
+                    continue
+                row = self._add_row(document)
+                for term, frequency in weighted_terms(document, VACANCY_FIELD_WEIGHTS).items():
+                    rows.append(row)
+                    columns.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                    frequencies.append(frequency)
+
+            rows = np.array(rows, dtype=np.int32)
+            columns = np.array(columns, dtype=np.int64)
+            document_frequency = np.bincount(columns, minlength=len(self.vocabulary))
+            self.idf = (np.log((1 + self.size) / (1 + document_frequency)) + 1).astype(np.float32)
+            self.unseen_idf = float(np.log(1 + self.size) + 1)
+
+            values = (1 + np.log(np.array(frequencies, dtype=np.float32))) * self.idf[columns]
+            norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=self.size))
+            values = (values / norms[rows]).astype(np.float32)
+
+            self._set_matrix(rows, columns, values)
+            self.generation += 1
+            self.loaded = True
+            self.synced_at = synced_at
+
+    def _set_matrix(self, rows, columns, values):
+        order = np.argsort(columns, kind='stable')
+        self.col_rows = rows[order]
+        self.col_vals = values[order]
+        counts = np.bincount(columns, minlength=len(self.vocabulary))
+        self.col_ptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def _matrix_coo(self):
+        columns = np.repeat(np.arange(len(self.vocabulary), dtype=np.int64), np.diff(self.col_ptr))
+        return self.col_rows, columns, self.col_vals
+
+    def compact(self):
+        """Merge the delta rows into the column-major matrix."""
+        with self.lock:
+            if not self.delta:
+                return
+            rows, columns, values = self._matrix_coo()
+            delta_rows, delta_columns, delta_values = [], [], []
+            for column, postings in self.delta.items():
+                for row, weight in postings:
+                    delta_rows.append(row)
+                    delta_columns.append(column)
+                    delta_values.append(weight)
+            self._set_matrix(
+                np.concatenate((rows, np.array(delta_rows, dtype=np.int32))),
+                np.concatenate((columns, np.array(delta_columns, dtype=np.int64))),
+                np.concatenate((values, np.array(delta_values, dtype=np.float32)))
+            )
+            self.delta = defaultdict(list)
+            self.delta_rows = 0
+            self.revision += 1
+
+    def vacuum(self):
+        """Drop masked rows and renumber the rest; vocabulary and IDF stay."""
+        with self.lock:
+            self.compact()
+            size = self.size
+            keep = self.active[:size].copy()
+            renumbered = np.cumsum(keep) - 1
+            rows, columns, values = self._matrix_coo()
+            live = keep[rows]
+
+            self.size = int(keep.sum())
+            for name, dtype, fill in ROW_ARRAYS:
+                array = getattr(self, name)
+                array[:self.size] = array[:size][keep]
+                array[self.size:size] = fill
+            self.row_of = {int(vacancy_id): row for row, vacancy_id in enumerate(self.ids[:self.size])}
+            self._set_matrix(renumbered[rows[live]].astype(np.int32), columns[live], values[live])
+            self.dead_rows = 0
+            self.revision += 1
+
+    def remove(self, vacancy_id):
+        with self.lock:
+            row = self.row_of.pop(vacancy_id, None)
+            if row is not None:
+                self.active[row] = False
+                self.dead_rows += 1
+                self.revision += 1
+                if self.dead_rows >= self.compact_threshold:
+                    self.vacuum()
+
+    def upsert(self, document):
+        with self.lock:
+            self.remove(document['id'])
+            if not document['is_active']:
+                return
+            row = self._add_row(document)
+            for column, weight in self._vectorize(weighted_terms(document, VACANCY_FIELD_WEIGHTS)).items():
+                self.delta[column].append((row, weight))
+            self.delta_rows += 1
+            if self.delta_rows >= self.compact_threshold:
+                self.compact()
+
+    def score(self, terms):
+        """Cosine similarity of every row against a profile's terms."""
+        query = self._vectorize(terms)
+        scores = np.zeros(self.size, dtype=np.float32)
+        if not query:
+            return scores
+
+        columns = np.fromiter(query.keys(), dtype=np.int64)
+        weights = np.fromiter(query.values(), dtype=np.float32)
+        starts, ends = self.col_ptr[columns], self.col_ptr[columns + 1]
+        lengths = ends - starts
+        if lengths.sum():
+            positions = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+            scores += np.bincount(
+                self.col_rows[positions],
+                weights=self.col_vals[positions] * np.repeat(weights, lengths),
+                minlength=self.size
+            ).astype(np.float32)
+
+        for column, query_weight in query.items():
+            for row, weight in self.delta.get(column, ()):
+                scores[row] += query_weight * weight
+        return scores
+
+    def recommend(self, terms, limit=20, location_ids=None, job_type=None,
+                  desired_salary=None, exclude_ids=()):
+        """Return ``[(vacancy_id, score)]`` for the best ``limit`` matches."""
+        with self.lock:
+            if not self.size:
+                return []
+            scores = self.score(terms)
+            size = self.size
+
+            mask = self.active[:size].copy()
+            if desired_salary:
+                # Hide vacancies that certainly pay less than asked for;
+                # desired_salary is in the base currency.
+                mask &= ~(self.salary_max[:size] < desired_salary)
+            if exclude_ids:
+                rows = [self.row_of[vacancy_id] for vacancy_id in exclude_ids if vacancy_id in self.row_of]
+                mask[rows] = False
+
+            boost = np.ones(size, dtype=np.float32)
+            if location_ids:
+                boost += LOCATION_BOOST * np.isin(self.location_id[:size], list(location_ids))
+            job_type_label = self.labels.get((job_type or '').strip().lower())
+            if job_type_label is not None:
+                boost += JOB_TYPE_BOOST * (self.employment_type[:size] == job_type_label)
+
+            scores = np.where(mask & (scores > 0), scores * boost, -np.inf)
+            limit = min(limit, int(np.isfinite(scores).sum()))
+            if limit <= 0:
+                return []
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(int(self.ids[row]), float(scores[row])) for row in top]
+
+class RecommendationService:
+    """Keeps one :class:`RecommendationEngine` per application in sync.
+
+    Mirrors :class:`SearchIndexService`: the first request builds the
+    matrix, committed ORM changes are applied incrementally, and changes
+    from other workers are picked up by ``updated_at`` every
+    ``RECOMMENDATION_SYNC_INTERVAL`` seconds.
+    """
+
+    @staticmethod
+    def enabled():
+        return has_app_context() and 'recommendation_engine' in current_app.extensions
+
+    @staticmethod
+    def engine():
+        engine = current_app.extensions['recommendation_engine']
+        interval = current_app.config.get('RECOMMENDATION_SYNC_INTERVAL', 60)
+        now = datetime.utcnow()
+        # The sync watermark is the app clock, so a lagging replica would
+        # make it skip rows.
+        with on_primary():
+            if not engine.loaded:
+                RecommendationService.rebuild(engine, now)
+            elif now - engine.synced_at > timedelta(seconds=interval):
+                RecommendationService.sync(engine, now)
+        return engine
+
+    @staticmethod
+    def rebuild(engine=None, now=None):
+        engine = engine or current_app.extensions['recommendation_engine']
+        vacancies = Vacancy.query.filter_by(is_active=True).yield_per(1000)
+        engine.load((vacancy_document(vacancy) for vacancy in vacancies), now or datetime.utcnow())
+        return engine
+
+    @staticmethod
+    def sync(engine, now=None):
+        now = now or datetime.utcnow()
+        since = engine.synced_at - timedelta(seconds=5)
+        changed = Vacancy.query.filter(Vacancy.updated_at >= since).yield_per(1000)
+        with engine.lock:
+            for vacancy in changed:
+                engine.upsert(vacancy_document(vacancy))
+            engine.synced_at = now
+
+    @staticmethod
+    def recommend_for_profile(profile, limit=20):
+        """Best matching active vacancies the profile has not applied to."""
+        applied = [vacancy_id for (vacancy_id,) in profile.applications.with_entities(Application.vacancy_id)]
+        location_ids = LocationService.resolve(profile.desired_location) if profile.desired_location else None
+        return RecommendationService.engine().recommend(
+            weighted_terms(profile, PROFILE_FIELD_WEIGHTS),
+            limit=limit,
+            location_ids=location_ids,
+            job_type=profile.desired_job_type,
+            desired_salary=profile.desired_salary,
+            exclude_ids=applied
+        )
+
+def warm_recommendations(app):
+    """Build the matrix before the server takes requests.
+
+    Called from the server entry points rather than ``create_app`` so CLI
+    commands do not pay for it. Under ``gunicorn --preload`` the workers
+    inherit the built matrix.
+    """
+    with app.app_context():
+        if not RecommendationService.enabled():
+            return
+        try:
+            RecommendationService.engine()
+        except Exception as e:
+            app.logger.error(f'Recommendation warm-up error: {str(e)}')
+
+def init_recommendations(app):
+    if app.config.get('RECOMMENDATIONS_ENABLED', True):
+        app.extensions['recommendation_engine'] = RecommendationEngine(
+            compact_threshold=app.config.get('RECOMMENDATION_COMPACT_THRESHOLD', 2000)
+        )
+
+@event.listens_for(Session, 'after_flush')
+def collect_recommendation_changes(session, flush_context):
+    if not RecommendationService.enabled():
+        return
+    pending = session.info.setdefault('recommendation_pending', {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Vacancy):
+            pending[obj.id] = vacancy_document(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Vacancy):
+            pending[obj.id] = None
+
+@event.listens_for(Session, 'after_commit')
+def apply_recommendation_changes(session):
+    pending = session.info.pop('recommendation_pending', None)
+    if not pending or not RecommendationService.enabled():
+        return
+    engine = current_app.extensions['recommendation_engine']
+    if not engine.loaded:
+        return
+    for vacancy_id, document in pending.items():
+        if document is None:
+            engine.remove(vacancy_id)
+        else:
+            engine.upsert(document)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def discard_recommendation_changes(session, previous_transaction):
+    session.info.pop('recommendation_pending', None)
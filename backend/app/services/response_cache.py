@@ -0,0 +1,201 @@
+﻿import json
+import threading
+import uuid
+from urllib.parse import urlencode
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.application import Application
+from app.models.company import Company
+from app.models.vacancy import Vacancy
+from app.utils.cache import TTLCache
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+VACANCY_LIST = 'vacancies'
+COMPANY_LIST = 'companies'
+
+def vacancy_tag(vacancy_id):
+    return f'vacancy:{vacancy_id}'
+
+def company_tag(company_id):
+    return f'company:{company_id}'
+
+class MemoryCacheBackend:
+    """Entries and tag versions of one process.
+
+    A commit only bumps the versions of the process that made it, so with
+    several gunicorn or uvicorn workers the others keep serving their
+    entries for up to ``RESPONSE_CACHE_TTL``. Use it with a single worker
+    (development, tests) and ``RESPONSE_CACHE_BACKEND=redis`` otherwise.
+    """
+
+    def __init__(self, maxsize=2048, ttl=60):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.versions = {}
+        # Versions restart at zero in every process.
+        self.scope = uuid.uuid4().hex
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.entries.set(key, value, ttl)
+
+    def tag_versions(self, tags):
+        with self.lock:
+            return [self.versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self.lock:
+            for tag in tags:
+                self.versions[tag] = self.versions.get(tag, 0) + 1
+
+    def clear(self):
+        self.entries.clear()
+        with self.lock:
+            self.versions.clear()
+
+class RedisCacheBackend:
+    def __init__(self, url, ttl=60, prefix='careerfinder:cache'):
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.scope = prefix
+
+    def get(self, key):
+        value = self.client.get(f'{self.prefix}:entry:{key}')
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.setex(f'{self.prefix}:entry:{key}', ttl or self.ttl, json.dumps(value))
+
+    def tag_versions(self, tags):
+        if not tags:
+            return []
+        values = self.client.mget([f'{self.prefix}:tag:{tag}' for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tags):
+        pipeline = self.client.pipeline()
+        for tag in tags:
+            pipeline.incr(f'{self.prefix}:tag:{tag}')
+        pipeline.execute()
+
+    def clear(self):
+        for key in self.client.scan_iter(f'{self.prefix}:*'):
+            self.client.delete(key)
+
+class ResponseCache:
+    """Cache for public read responses with tag-based invalidation.
+
+    Every entry records the version of each tag it depends on. Committing
+    a change to a vacancy, company or application bumps the versions of
+    the affected tags, and entries whose recorded versions no longer
+    match are treated as misses. Versions are taken with :meth:`versions`
+    before the response is computed, so a commit that lands while it is
+    being built leaves the entry already stale.
+
+    Only responses read from the primary are stored: a lagging replica
+    could answer with rows older than the versions taken. Clients that
+    just wrote (see ReadReplicas) skip the cache on reads as well.
+    """
+
+    @staticmethod
+    def backend():
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('response_cache')
+
+    @staticmethod
+    def key(namespace, args=None, names=()):
+        # Only the parameters the view reads, under their exact names and
+        # with every value in order; encoding them keeps a value holding
+        # ``&`` or ``=`` from passing for other parameters.
+        params = [(name, value) for name in sorted(names) for value in (args.getlist(name) if args else ())]
+        return f'{namespace}?{urlencode(params)}'
+
+    @staticmethod
+    def get(key):
+        backend = ResponseCache.backend()
+        if backend is None or g.get('sticky_primary'):
+            return None
+        entry = backend.get(key)
+        if entry is None:
+            return None
+        tags = list(entry['tags'])
+        if backend.tag_versions(tags) != [entry['tags'][tag] for tag in tags]:
+            return None
+        return entry['value']
+
+    @staticmethod
+    def versions(tags):
+        backend = ResponseCache.backend()
+        if backend is None:
+            return None
+        tags = sorted(set(tags))
+        return dict(zip(tags, backend.tag_versions(tags)))
+
+    @staticmethod
+    def scope():
+        """What tag versions are counted within, for validators built from them."""
+        backend = ResponseCache.backend()
+        return backend.scope if backend is not None else None
+
+    @staticmethod
+    def set(key, value, versions):
+        backend = ResponseCache.backend()
+        if backend is None or versions is None or g.get('replica_engine') is not None:
+            return
+        backend.set(key, {'tags': versions, 'value': value})
+
+    @staticmethod
+    def invalidate(tags):
+        backend = ResponseCache.backend()
+        if backend is not None and tags:
+            backend.bump(sorted(set(tags)))
+
+def init_response_cache(app):
+    backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+    ttl = app.config.get('RESPONSE_CACHE_TTL', 60)
+    if backend == 'redis':
+        if redis is None:
+            raise RuntimeError('RESPONSE_CACHE_BACKEND=redis requires the redis package')
+        app.extensions['response_cache'] = RedisCacheBackend(app.config['REDIS_URL'], ttl=ttl)
+    elif backend == 'memory':
+        app.extensions['response_cache'] = MemoryCacheBackend(
+            maxsize=app.config.get('RESPONSE_CACHE_SIZE', 2048), ttl=ttl
+        )
+
+def affected_tags(obj):
+    if isinstance(obj, Vacancy):
+        # vacancies_count of the owning company changes as well.
+        return {VACANCY_LIST, COMPANY_LIST, vacancy_tag(obj.id), company_tag(obj.company_id)}
+    if isinstance(obj, Company):
+        # Vacancy payloads embed the company, and their entries carry its tag.
+        return {VACANCY_LIST, COMPANY_LIST, company_tag(obj.id)}
+    if isinstance(obj, Application):
+        return {VACANCY_LIST, vacancy_tag(obj.vacancy_id)}
+    return set()
+
+@event.listens_for(Session, 'after_flush')
+def collect_cache_tags(session, flush_context):
+    if ResponseCache.backend() is None:
+        return
+    tags = session.info.setdefault('response_cache_tags', set())
+    for obj in session.new | session.dirty | session.deleted:
+        tags |= affected_tags(obj)
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_cache_tags(session):
+    tags = session.info.pop('response_cache_tags', None)
+    if tags:
+        ResponseCache.invalidate(tags)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def discard_cache_tags(session, previous_transaction):
+    session.info.pop('response_cache_tags', None)
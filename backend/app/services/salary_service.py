@@ -0,0 +1,152 @@
+﻿from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import Integer, and_, case, cast, event, func, inspect, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models.exchange_rate import ExchangeRate
+from app.models.vacancy import SALARY_UNBOUNDED, Vacancy
+from app.services.response_cache import VACANCY_LIST, ResponseCache, company_tag
+
+SALARY_FIELDS = ('salary_from', 'salary_to', 'currency')
+# Vacancy.currency column default.
+DEFAULT_CURRENCY = 'RUB'
+
+def base_currency():
+    if has_app_context():
+        return current_app.config.get('SALARY_BASE_CURRENCY', 'RUB').upper()
+    return 'RUB'
+
+def normalize_currency(currency):
+    return (currency or DEFAULT_CURRENCY).strip().upper()
+
+def salary_range(salary_from, salary_to, rate):
+    """Convert a salary range to ``(low, high)`` in the base currency.
+
+    An open lower bound becomes 0 and an open upper bound
+    ``SALARY_UNBOUNDED``; no salary at all, or an unknown rate, gives
+    ``(None, None)``.
+    """
+    if rate is None or (salary_from is None and salary_to is None):
+        return None, None
+    low = round(salary_from * rate) if salary_from is not None else 0
+    high = round(salary_to * rate) if salary_to is not None else SALARY_UNBOUNDED
+    return min(low, SALARY_UNBOUNDED), min(high, SALARY_UNBOUNDED)
+
+def converted_expression(amount, rate):
+    # Clamped before the cast, which would overflow an INTEGER otherwise.
+    value = func.round(amount * rate)
+    return case((value > SALARY_UNBOUNDED, SALARY_UNBOUNDED), else_=cast(value, Integer))
+
+def salary_range_expressions(rate):
+    """SQL counterpart of :func:`salary_range` for set-based updates."""
+    if rate is None:
+        return None, None
+    no_salary = and_(Vacancy.salary_from.is_(None), Vacancy.salary_to.is_(None))
+    low = case(
+        (no_salary, None),
+        (Vacancy.salary_from.isnot(None), converted_expression(Vacancy.salary_from, rate)),
+        else_=0
+    )
+    high = case(
+        (no_salary, None),
+        (Vacancy.salary_to.isnot(None), converted_expression(Vacancy.salary_to, rate)),
+        else_=SALARY_UNBOUNDED
+    )
+    return low, high
+
+class SalaryService:
+    """Salary ranges normalized to ``SALARY_BASE_CURRENCY``.
+
+    ``salary_min_base``/``salary_max_base`` are kept up to date on flush
+    from the ``exchange_rates`` table and recomputed in bulk when a rate
+    changes, so salary filters are indexed range comparisons.
+    """
+
+    @staticmethod
+    def rate(session, currency):
+        currency = normalize_currency(currency)
+        if currency == base_currency():
+            return 1.0
+        with session.no_autoflush:
+            row = session.get(ExchangeRate, currency)
+        return row.rate if row else None
+
+    @staticmethod
+    def to_base(amount, currency=None):
+        if amount is None:
+            return None
+        rate = SalaryService.rate(db.session, currency)
+        if rate is None:
+            raise ValueError(f'Unknown currency: {currency}')
+        return round(amount * rate)
+
+    @staticmethod
+    def overlap_criteria(min_salary=None, max_salary=None):
+        """Criteria matching vacancies whose range overlaps ``[min_salary, max_salary]``.
+
+        Vacancies without a salary have NULL bounds and never match.
+        """
+        if min_salary is not None and max_salary is not None and min_salary > max_salary:
+            raise ValueError('min_salary must not be greater than max_salary')
+        criteria = []
+        if min_salary is not None:
+            criteria.append(Vacancy.salary_max_base >= min_salary)
+        if max_salary is not None:
+            criteria.append(Vacancy.salary_min_base <= max_salary)
+        return criteria
+
+    @staticmethod
+    def set_rate(currency, rate):
+        if rate <= 0:
+            raise ValueError('Exchange rate must be positive')
+        currency = normalize_currency(currency)
+        row = db.session.get(ExchangeRate, currency)
+        if row is None:
+            db.session.add(ExchangeRate(currency=currency, rate=rate))
+        else:
+            row.rate = rate
+        db.session.commit()
+        return SalaryService.recompute(currency)
+
+    @staticmethod
+    def recompute(currency=None):
+        """Recompute normalized salaries with one UPDATE per stored currency.
+
+        Returns the number of vacancies updated.
+        """
+        rates = {row.currency: row.rate for row in ExchangeRate.query}
+        rates[base_currency()] = 1.0
+        stored = [value for (value,) in db.session.query(Vacancy.currency).distinct()]
+        if currency:
+            stored = [value for value in stored if normalize_currency(value) == normalize_currency(currency)]
+
+        now = datetime.utcnow()
+        updated = 0
+        company_ids = set()
+        for value in stored:
+            condition = Vacancy.currency.is_(None) if value is None else Vacancy.currency == value
+            low, high = salary_range_expressions(rates.get(normalize_currency(value)))
+            company_ids.update(company_id for (company_id,) in db.session.query(Vacancy.company_id).filter(condition).distinct())
+            updated += db.session.execute(
+                update(Vacancy).where(condition).values(
+                    salary_min_base=low, salary_max_base=high, updated_at=now
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+        db.session.commit()
+
+        # Bulk updates bypass the ORM flush events that invalidate caches;
+        # the bumped updated_at lets the in-memory indexes resync. Vacancy
+        # detail entries also carry their company's tag, so bumping the
+        # companies covers them without one tag per vacancy.
+        ResponseCache.invalidate([VACANCY_LIST] + [company_tag(company_id) for company_id in company_ids])
+        return updated
+
+@event.listens_for(Session, 'before_flush')
+def assign_base_salaries(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Vacancy):
+            continue
+        if obj in session.new or set(SALARY_FIELDS) & set(inspect(obj).committed_state):
+            obj.salary_min_base, obj.salary_max_base = salary_range(
+                obj.salary_from, obj.salary_to, SalaryService.rate(session, obj.currency)
+            )
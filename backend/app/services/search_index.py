@@ -0,0 +1,294 @@
+﻿import bisect
+import math
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.vacancy import Vacancy
+from app.services.fulltext_service import tokenize_query
+from app.services.read_replicas import on_primary
+
+FIELD_WEIGHTS = {'title': 3, 'requirements': 2, 'description': 1}
+FILTER_FIELDS = ('employment_type', 'experience_level', 'location_id')
+
+def normalize_filter(value):
+    if isinstance(value, str) or value is None:
+        return (value or '').strip().lower()
+    return value
+
+def vacancy_document(vacancy):
+    return {
+        'id': vacancy.id,
+        'is_active': vacancy.is_active,
+        'created_at': vacancy.created_at,
+        'title': vacancy.title,
+        'description': vacancy.description,
+        'requirements': vacancy.requirements,
+        'employment_type': vacancy.employment_type,
+        'experience_level': vacancy.experience_level,
+        'location_id': vacancy.location_id,
+        'salary_from': vacancy.salary_from,
+        'salary_to': vacancy.salary_to,
+        'salary_min_base': vacancy.salary_min_base,
+        'salary_max_base': vacancy.salary_max_base,
+    }
+
+class InvertedIndex:
+    """In-memory BM25 index over active vacancies.
+
+    Posting lists map a term to ``{vacancy_id: weighted_tf}``; filter
+    fields (including the normalized ``location_id``) keep a
+    ``value -> set(ids)`` map so filters are set
+    intersections. All mutation happens under one lock.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.lock = threading.RLock()
+        self.postings = {}
+        self.vocabulary = []
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.doc_meta = {}
+        self.filters = {field: {} for field in FILTER_FIELDS}
+        self.total_length = 0
+        self.loaded = False
+        self.synced_at = None
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def _add_term(self, term):
+        self.postings[term] = {}
+        bisect.insort(self.vocabulary, term)
+
+    def _drop_term(self, term):
+        del self.postings[term]
+        position = bisect.bisect_left(self.vocabulary, term)
+        if position < len(self.vocabulary) and self.vocabulary[position] == term:
+            del self.vocabulary[position]
+
+    def remove(self, vacancy_id):
+        with self.lock:
+            terms = self.doc_terms.pop(vacancy_id, None)
+            if terms is None:
+                return
+            for term in terms:
+                postings = self.postings[term]
+                postings.pop(vacancy_id, None)
+                if not postings:
+                    self._drop_term(term)
+            self.total_length -= self.doc_lengths.pop(vacancy_id)
+            meta = self.doc_meta.pop(vacancy_id)
+            for field in FILTER_FIELDS:
+                ids = self.filters[field].get(meta[field])
+                if ids is not None:
+                    ids.discard(vacancy_id)
+                    if not ids:
+                        del self.filters[field][meta[field]]
+
+    def upsert(self, document):
+        vacancy_id = document['id']
+        with self.lock:
+            self.remove(vacancy_id)
+            if not document['is_active']:
+                return
+
+            terms = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize_query(document[field]):
+                    terms[token] += weight
+
+            for term, frequency in terms.items():
+                if term not in self.postings:
+                    self._add_term(term)
+                self.postings[term][vacancy_id] = frequency
+
+            length = sum(terms.values())
+            self.doc_terms[vacancy_id] = list(terms)
+            self.doc_lengths[vacancy_id] = length
+            self.total_length += length
+
+            meta = {field: normalize_filter(document[field]) for field in FILTER_FIELDS}
+            meta['created_at'] = document['created_at'] or datetime.min
+            meta['salary'] = (document['salary_min_base'] if document['salary_from'] is not None
+                              else document['salary_max_base'])
+            meta['salary_range'] = (document['salary_min_base'], document['salary_max_base'])
+            self.doc_meta[vacancy_id] = meta
+            for field in FILTER_FIELDS:
+                self.filters[field].setdefault(meta[field], set()).add(vacancy_id)
+
+    def _expand(self, token):
+        # Every term the token is a prefix of, like the database
+        # backends' prefix match: the sorted vocabulary keeps them in one
+        # slice, which ends before the first term past the prefix.
+        start = bisect.bisect_left(self.vocabulary, token)
+        end = bisect.bisect_left(self.vocabulary, token[:-1] + chr(ord(token[-1]) + 1), start)
+        return self.vocabulary[start:end]
+
+    def _filter_ids(self, employment_type=None, experience_level=None, location_ids=None,
+                    min_salary=None, max_salary=None):
+        candidates = None
+        for field, value in (('employment_type', employment_type),
+                             ('experience_level', experience_level)):
+            if value:
+                ids = self.filters[field].get(normalize_filter(value), set())
+                candidates = set(ids) if candidates is None else candidates & ids
+
+        if location_ids is not None:
+            ids = set()
+            for location_id in location_ids:
+                ids |= self.filters['location_id'].get(location_id, set())
+            candidates = ids if candidates is None else candidates & ids
+
+        if min_salary is not None or max_salary is not None:
+            lower = min_salary if min_salary is not None else float('-inf')
+            upper = max_salary if max_salary is not None else float('inf')
+            candidates = {
+                vacancy_id
+                for vacancy_id in (self.doc_meta if candidates is None else candidates)
+                if self.doc_meta[vacancy_id]['salary_range'][0] is not None
+                and self.doc_meta[vacancy_id]['salary_range'][1] >= lower
+                and self.doc_meta[vacancy_id]['salary_range'][0] <= upper
+            }
+
+        return candidates
+
+    def search(self, query=None, ranked=True, **filters):
+        """Return matching vacancy IDs, best match first.
+
+        Without a text query, or with ``ranked=False``, IDs come back in
+        ``(created_at, id)`` descending order like the database listing.
+        """
+        with self.lock:
+            candidates = self._filter_ids(**filters)
+            scores = None
+
+            tokens = tokenize_query(query)
+            if tokens:
+                doc_count = len(self.doc_terms) or 1
+                average_length = self.total_length / doc_count or 1
+                for token in tokens:
+                    token_scores = {}
+                    for term in self._expand(token):
+                        postings = self.postings[term]
+                        idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                        for vacancy_id, frequency in postings.items():
+                            if candidates is not None and vacancy_id not in candidates:
+                                continue
+                            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[vacancy_id] / average_length)
+                            score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                            token_scores[vacancy_id] = max(token_scores.get(vacancy_id, 0.0), score)
+                    if scores is None:
+                        scores = token_scores
+                    else:
+                        scores = {
+                            vacancy_id: scores[vacancy_id] + score
+                            for vacancy_id, score in token_scores.items()
+                            if vacancy_id in scores
+                        }
+                    if not scores:
+                        return []
+                candidates = set(scores)
+
+            if candidates is None:
+                candidates = self.doc_terms.keys()
+
+            if scores is not None and ranked:
+                return sorted(
+                    candidates,
+                    key=lambda vacancy_id: (scores[vacancy_id], self.sort_key(vacancy_id)),
+                    reverse=True
+                )
+            return sorted(candidates, key=self.sort_key, reverse=True)
+
+    def sort_key(self, vacancy_id):
+        return (self.doc_meta[vacancy_id]['created_at'], vacancy_id)
+
+    def load(self, vacancies, synced_at):
+        with self.lock:
+            for vacancy in vacancies:
+                self.upsert(vacancy_document(vacancy))
+            self.loaded = True
+            self.synced_at = synced_at
+
+class SearchIndexService:
+    """Keeps one :class:`InvertedIndex` per application in sync with the DB.
+
+    The first search fills the index. After that, committed ORM changes
+    are applied as they happen and vacancies changed by other workers are
+    picked up by ``updated_at`` every ``SEARCH_INDEX_SYNC_INTERVAL``
+    seconds.
+    """
+
+    @staticmethod
+    def enabled():
+        return has_app_context() and 'vacancy_search_index' in current_app.extensions
+
+    @staticmethod
+    def index():
+        index = current_app.extensions['vacancy_search_index']
+        interval = current_app.config.get('SEARCH_INDEX_SYNC_INTERVAL', 30)
+        now = datetime.utcnow()
+        # The sync watermark is the app clock, so a lagging replica would
+        # make it skip rows.
+        with on_primary():
+            if not index.loaded:
+                SearchIndexService.rebuild(index, now)
+            elif now - index.synced_at > timedelta(seconds=interval):
+                SearchIndexService.sync(index, now)
+        return index
+
+    @staticmethod
+    def rebuild(index, now=None):
+        now = now or datetime.utcnow()
+        index.load(Vacancy.query.filter_by(is_active=True).yield_per(1000), now)
+
+    @staticmethod
+    def sync(index, now=None):
+        now = now or datetime.utcnow()
+        # Overlap the window a little so commits racing the previous sync
+        # are not missed; re-applying a document is idempotent.
+        since = index.synced_at - timedelta(seconds=5)
+        changed = Vacancy.query.filter(Vacancy.updated_at >= since).yield_per(1000)
+        with index.lock:
+            for vacancy in changed:
+                index.upsert(vacancy_document(vacancy))
+            index.synced_at = now
+
+def init_search_index(app):
+    if app.config.get('SEARCH_IN_MEMORY_INDEX'):
+        app.extensions['vacancy_search_index'] = InvertedIndex()
+
+@event.listens_for(Session, 'after_flush')
+def collect_vacancy_changes(session, flush_context):
+    if not SearchIndexService.enabled():
+        return
+    pending = session.info.setdefault('vacancy_index_pending', {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Vacancy):
+            pending[obj.id] = vacancy_document(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Vacancy):
+            pending[obj.id] = None
+
+@event.listens_for(Session, 'after_commit')
+def apply_vacancy_changes(session):
+    pending = session.info.pop('vacancy_index_pending', None)
+    if not pending or not SearchIndexService.enabled():
+        return
+    index = current_app.extensions['vacancy_search_index']
+    if not index.loaded:
+        return
+    for vacancy_id, document in pending.items():
+        if document is None:
+            index.remove(vacancy_id)
+        else:
+            index.upsert(document)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def discard_vacancy_changes(session, previous_transaction):
+    session.info.pop('vacancy_index_pending', None)
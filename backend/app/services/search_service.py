@@ -1,23 +1,51 @@
 ﻿from app.models.vacancy import Vacancy
 from app.models.company import Company
-from sqlalchemy import or_
+from app.services.fulltext_service import FullTextService
+from app.services.location_service import LocationService
+from app.services.salary_service import SalaryService
+from app.services.search_index import SearchIndexService
+from app.utils.pagination import KeysetPage, ListPage, decode_cursor, encode_cursor, keyset_paginate
 
 class SearchService:
     @staticmethod
-    def search_vacancies(query=None, location=None, employment_type=None, experience_level=None, page=1, per_page=20):
+    def search_vacancies(query=None, location=None, employment_type=None, experience_level=None, page=1, per_page=20,
+                         cursor=None, include_total=False, min_salary=None, max_salary=None):
+        if SearchIndexService.enabled():
+            return SearchService.search_vacancies_indexed(
+                query=query, location=location, employment_type=employment_type,
+                experience_level=experience_level, page=page, per_page=per_page,
+                cursor=cursor, include_total=include_total,
+                min_salary=min_salary, max_salary=max_salary
+            )
+        
+        # Relevance ordering cannot be expressed as a keyset, so cursor
+        # pages of a text search stay in (created_at, id) order.
+        search_query = SearchService.filter_vacancies(
+            query=query, location=location, employment_type=employment_type,
+            experience_level=experience_level, ranked=cursor is None,
+            min_salary=min_salary, max_salary=max_salary
+        )
+        
+        if cursor is not None:
+            return keyset_paginate(
+                search_query, [Vacancy.created_at, Vacancy.id], cursor=cursor,
+                per_page=per_page, descending=True, include_total=include_total
+            )
+        
+        return search_query.order_by(Vacancy.created_at.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+    
+    @staticmethod
+    def filter_vacancies(query=None, location=None, employment_type=None, experience_level=None, ranked=True,
+                         min_salary=None, max_salary=None):
         search_query = Vacancy.query.filter_by(is_active=True)
         
         if query:
-            search_query = search_query.filter(
-                or_(
-                    Vacancy.title.ilike(f'%{query}%'),
-                    Vacancy.description.ilike(f'%{query}%'),
-                    Vacancy.requirements.ilike(f'%{query}%')
-                )
-            )
+            search_query = FullTextService.backend().apply(search_query, query, ranked=ranked)
         
         if location:
-            search_query = search_query.filter(Vacancy.location.ilike(f'%{location}%'))
+            search_query = search_query.filter(Vacancy.location_id.in_(LocationService.resolve(location)))
             
         if employment_type:
             search_query = search_query.filter(Vacancy.employment_type == employment_type)
@@ -25,12 +53,61 @@ class SearchService:
         if experience_level:
             search_query = search_query.filter(Vacancy.experience_level == experience_level)
         
-        return search_query.order_by(Vacancy.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+        if min_salary is not None or max_salary is not None:
+            search_query = search_query.filter(*SalaryService.overlap_criteria(min_salary, max_salary))
+        
+        return search_query
+    
+    @staticmethod
+    def search_vacancy_ids(query=None, location=None, employment_type=None, experience_level=None, ranked=True,
+                           min_salary=None, max_salary=None):
+        SalaryService.overlap_criteria(min_salary, max_salary)
+        return SearchIndexService.index().search(
+            query, ranked=ranked,
+            location_ids=LocationService.resolve(location) if location else None,
+            employment_type=employment_type, experience_level=experience_level,
+            min_salary=min_salary, max_salary=max_salary
         )
     
     @staticmethod
-    def search_companies(query=None, industry=None, page=1, per_page=20):
+    def search_vacancies_indexed(query=None, location=None, employment_type=None, experience_level=None,
+                                 page=1, per_page=20, cursor=None, include_total=False,
+                                 min_salary=None, max_salary=None):
+        """Answer a vacancy search from the in-memory index.
+
+        Only the IDs of the requested page are loaded from the database.
+        """
+        index = SearchIndexService.index()
+        ids = SearchService.search_vacancy_ids(
+            query=query, location=location, employment_type=employment_type,
+            experience_level=experience_level, ranked=cursor is None,
+            min_salary=min_salary, max_salary=max_salary
+        )
+        
+        if cursor is not None:
+            total = len(ids) if include_total else None
+            if cursor:
+                after = tuple(decode_cursor(cursor, 2))
+                ids = [vacancy_id for vacancy_id in ids if index.sort_key(vacancy_id) < after]
+            page_ids = ids[:per_page]
+            next_cursor = None
+            if len(ids) > per_page:
+                next_cursor = encode_cursor(list(index.sort_key(page_ids[-1])))
+            return KeysetPage(SearchService.load_vacancies(page_ids), next_cursor, total)
+        
+        page_ids = ids[(page - 1) * per_page:page * per_page]
+        return ListPage(SearchService.load_vacancies(page_ids), page, per_page, len(ids))
+    
+    @staticmethod
+    def load_vacancies(ids):
+        if not ids:
+            return []
+        vacancies = {vacancy.id: vacancy for vacancy in Vacancy.query.filter(Vacancy.id.in_(ids))}
+        return [vacancies[vacancy_id] for vacancy_id in ids if vacancy_id in vacancies]
+    
+    @staticmethod
+    def search_companies(query=None, industry=None, page=1, per_page=20,
+                         cursor=None, include_total=False):
         search_query = Company.query
         
         if query:
@@ -39,6 +116,12 @@ class SearchService:
         if industry:
             search_query = search_query.filter(Company.industry.ilike(f'%{industry}%'))
         
+        if cursor is not None:
+            return keyset_paginate(
+                search_query, [Company.name, Company.id], cursor=cursor,
+                per_page=per_page, include_total=include_total
+            )
+        
         return search_query.order_by(Company.name).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -0,0 +1,89 @@
+﻿from sqlalchemy import func, inspect
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models.vacancy import Vacancy
+from app.models.company import Company
+from app.models.profile import Profile
+from app.models.application import Application
+
+class SerializationService:
+    """Serializes whole pages of models with a fixed number of queries.
+
+    Relationships are loaded in one batch per page and every ``*_count``
+    field comes from a single grouped aggregate instead of a per-row
+    ``.count()``.
+    """
+
+    @staticmethod
+    def count_by(column, ids):
+        if not ids:
+            return {}
+        rows = db.session.query(column, func.count()).filter(
+            column.in_(ids)
+        ).group_by(column).all()
+        return dict(rows)
+
+    @staticmethod
+    def serialize_companies(companies):
+        companies = list(companies)
+        vacancies_counts = SerializationService.count_by(
+            Vacancy.company_id, [company.id for company in companies]
+        )
+        return [
+            company.to_dict(vacancies_count=vacancies_counts.get(company.id, 0))
+            for company in companies
+        ]
+
+    @staticmethod
+    def serialize_vacancies(vacancies):
+        vacancies = list(vacancies)
+        if not vacancies:
+            return []
+
+        company_ids = {vacancy.company_id for vacancy in vacancies}
+        companies = Company.query.filter(Company.id.in_(company_ids)).all()
+        company_dicts = {
+            company['id']: company
+            for company in SerializationService.serialize_companies(companies)
+        }
+        applications_counts = SerializationService.count_by(
+            Application.vacancy_id, [vacancy.id for vacancy in vacancies]
+        )
+
+        return [
+            vacancy.to_dict(
+                company=company_dicts.get(vacancy.company_id),
+                applications_count=applications_counts.get(vacancy.id, 0)
+            )
+            for vacancy in vacancies
+        ]
+
+    @staticmethod
+    def serialize_vacancy(vacancy):
+        return SerializationService.serialize_vacancies([vacancy])[0]
+
+    @staticmethod
+    def serialize_company(company):
+        return SerializationService.serialize_companies([company])[0]
+
+    @staticmethod
+    def application_load_options():
+        return (
+            joinedload(Application.vacancy).joinedload(Vacancy.company),
+            joinedload(Application.applicant).joinedload(Profile.user),
+        )
+
+    @staticmethod
+    def serialize_applications(applications):
+        applications = list(applications)
+        ids = [
+            application.id for application in applications
+            if {'vacancy', 'applicant'} & inspect(application).unloaded
+        ]
+        if ids:
+            # Populates vacancy, company, applicant and user for the whole
+            # page through the identity map in one round-trip.
+            Application.query.options(
+                *SerializationService.application_load_options()
+            ).filter(Application.id.in_(ids)).all()
+        return [application.to_dict() for application in applications]
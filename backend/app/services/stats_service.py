@@ -0,0 +1,217 @@
+﻿from collections import Counter
+from datetime import datetime
+from sqlalchemy import event, func, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import db
+from app.models.application import Application
+from app.models.company import Company
+from app.models.platform_stat import PlatformStat
+from app.models.vacancy import Vacancy
+
+ACTIVE_VACANCIES = 'vacancies.active'
+TOTAL_COMPANIES = 'companies.total'
+INDUSTRY_PREFIX = 'vacancies.active.industry:'
+APPLICATIONS_DAY_PREFIX = 'applications.day:'
+INITIALIZED = 'stats.initialized'
+
+def industry_key(industry):
+    return f'{INDUSTRY_PREFIX}{industry or "unspecified"}'
+
+def applications_day_key(applied_at):
+    return f'{APPLICATIONS_DAY_PREFIX}{(applied_at or datetime.utcnow()).date().isoformat()}'
+
+def upsert_deltas(connection, deltas):
+    rows = [
+        {'key': key, 'value': value, 'updated_at': datetime.utcnow()}
+        for key, value in sorted(deltas.items()) if value
+    ]
+    if not rows:
+        return
+
+    table = PlatformStat.__table__
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                'value': table.c.value + statement.excluded.value,
+                'updated_at': statement.excluded.updated_at
+            }
+        )
+        connection.execute(statement, rows)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            table.update().where(table.c.key == row['key']).values(
+                value=table.c.value + row['value'], updated_at=row['updated_at']
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+class StatsNotSeeded(RuntimeError):
+    """Raised while ``platform_stats`` has not been seeded."""
+
+    def __init__(self):
+        super().__init__(
+            'Statistics counters are not seeded (run "flask db upgrade" or "flask stats reconcile")'
+        )
+
+class StatsService:
+    """Platform counters kept in ``platform_stats``.
+
+    Counters are adjusted inside the same transaction as the rows they
+    count, so reading them is a primary-key lookup. They are seeded by a
+    migration and corrected by ``flask stats reconcile``; requests never
+    write them, so workers cannot race on the seeding. Until they are
+    seeded, reads raise StatsNotSeeded rather than count every request.
+    """
+
+    @staticmethod
+    def values(keys):
+        rows = dict(
+            db.session.query(PlatformStat.key, PlatformStat.value).filter(
+                PlatformStat.key.in_(list(keys) + [INITIALIZED])
+            )
+        )
+        if INITIALIZED not in rows:
+            raise StatsNotSeeded()
+        return {key: rows.get(key, 0) for key in keys}
+
+    @staticmethod
+    def prefixed(prefix):
+        rows = dict(
+            db.session.query(PlatformStat.key, PlatformStat.value).filter(
+                PlatformStat.key.startswith(prefix) | (PlatformStat.key == INITIALIZED)
+            )
+        )
+        if INITIALIZED not in rows:
+            raise StatsNotSeeded()
+        return {
+            key[len(prefix):]: value
+            for key, value in sorted(rows.items())
+            if key.startswith(prefix) and value != 0
+        }
+
+    @staticmethod
+    def vacancies_per_industry():
+        return StatsService.prefixed(INDUSTRY_PREFIX)
+
+    @staticmethod
+    def applications_per_day():
+        return StatsService.prefixed(APPLICATIONS_DAY_PREFIX)
+
+    @staticmethod
+    def actual_counts(session=None):
+        session = session or db.session
+        counts = Counter()
+        counts[ACTIVE_VACANCIES] = session.query(func.count(Vacancy.id)).filter(Vacancy.is_active.is_(True)).scalar()
+        counts[TOTAL_COMPANIES] = session.query(func.count(Company.id)).scalar()
+
+        industries = session.query(Company.industry, func.count(Vacancy.id)).join(
+            Vacancy, Vacancy.company_id == Company.id
+        ).filter(Vacancy.is_active.is_(True)).group_by(Company.industry)
+        for industry, count in industries:
+            counts[industry_key(industry)] += count
+
+        days = session.query(func.date(Application.applied_at), func.count(Application.id)).group_by(
+            func.date(Application.applied_at)
+        )
+        for day, count in days:
+            counts[f'{APPLICATIONS_DAY_PREFIX}{day}'] += count
+
+        counts[INITIALIZED] = 1
+        return counts
+
+    @staticmethod
+    def drift(session=None):
+        """Differences between fresh counts and the stored counters, by key."""
+        session = session or db.session
+        counts = StatsService.actual_counts(session)
+        current = dict(session.query(PlatformStat.key, PlatformStat.value))
+        return {
+            key: counts.get(key, 0) - current.get(key, 0)
+            for key in set(counts) | set(current)
+            if counts.get(key, 0) != current.get(key, 0)
+        }
+
+    @staticmethod
+    def reconcile():
+        """Correct every counter to a fresh count; returns the corrected keys.
+
+        Counts and counters are read in one snapshot and the drift is then
+        added per key, so deltas other workers commit in between are kept.
+        Run one reconcile at a time.
+        """
+        isolation_level = 'SERIALIZABLE' if db.engine.dialect.name == 'sqlite' else 'REPEATABLE READ'
+        db.session.connection(execution_options={'isolation_level': isolation_level})
+        try:
+            drift = StatsService.drift()
+        finally:
+            db.session.rollback()
+        with db.engine.begin() as connection:
+            upsert_deltas(connection, drift)
+        return drift
+
+def vacancy_industry(session, vacancy, company_id=None):
+    with session.no_autoflush:
+        company = session.get(Company, company_id or vacancy.company_id)
+    return company.industry if company else None
+
+def collect_deltas(session):
+    deltas = Counter()
+
+    for obj in session.new:
+        if isinstance(obj, Vacancy) and obj.is_active:
+            deltas[ACTIVE_VACANCIES] += 1
+            deltas[industry_key(vacancy_industry(session, obj))] += 1
+        elif isinstance(obj, Company):
+            deltas[TOTAL_COMPANIES] += 1
+        elif isinstance(obj, Application):
+            deltas[applications_day_key(obj.applied_at)] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Vacancy) and obj.is_active:
+            deltas[ACTIVE_VACANCIES] -= 1
+            deltas[industry_key(vacancy_industry(session, obj))] -= 1
+        elif isinstance(obj, Company):
+            deltas[TOTAL_COMPANIES] -= 1
+        elif isinstance(obj, Application):
+            deltas[applications_day_key(obj.applied_at)] -= 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Vacancy):
+            state = inspect(obj)
+            active = state.attrs.is_active.history
+            company = state.attrs.company_id.history
+            if not active.has_changes() and not company.has_changes():
+                continue
+            was_active = bool(active.deleted[0]) if active.deleted else bool(obj.is_active)
+            old_company_id = company.deleted[0] if company.deleted else obj.company_id
+            if was_active:
+                deltas[ACTIVE_VACANCIES] -= 1
+                deltas[industry_key(vacancy_industry(session, obj, old_company_id))] -= 1
+            if obj.is_active:
+                deltas[ACTIVE_VACANCIES] += 1
+                deltas[industry_key(vacancy_industry(session, obj))] += 1
+        elif isinstance(obj, Company):
+            industry = inspect(obj).attrs.industry.history
+            if industry.deleted:
+                with session.no_autoflush:
+                    moved = session.query(func.count(Vacancy.id)).filter(
+                        Vacancy.company_id == obj.id, Vacancy.is_active.is_(True)
+                    ).scalar()
+                deltas[industry_key(industry.deleted[0])] -= moved
+                deltas[industry_key(obj.industry)] += moved
+
+    return deltas
+
+@event.listens_for(Session, 'after_flush')
+def apply_stat_deltas(session, flush_context):
+    deltas = collect_deltas(session)
+    if any(deltas.values()):
+        upsert_deltas(session.connection(), deltas)
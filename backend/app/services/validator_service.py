@@ -0,0 +1,88 @@
+﻿from sqlalchemy import func, select
+from app import db
+from app.models.application import Application
+from app.models.company import Company
+from app.models.profile import Profile
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services.response_cache import ResponseCache
+from app.utils.conditional import Validators
+
+def _count(column, value):
+    return select(func.count()).where(column == value).scalar_subquery()
+
+class ValidatorService:
+    """Computes response validators with one aggregate query each.
+
+    Every part that shows up in the serialized payload (the row's own
+    ``updated_at``, embedded rows, ``*_count`` fields) feeds the ETag, so
+    a validator changes whenever the body would. ``views_count`` is left
+    out on purpose: it changes on every read. Listings, which no query
+    over a few rows can summarize, use the response cache's tag versions.
+    """
+
+    @staticmethod
+    def vacancy(vacancy_id):
+        row = db.session.query(
+            Vacancy.updated_at,
+            Vacancy.is_active,
+            Company.updated_at,
+            _count(Application.vacancy_id, Vacancy.id),
+            _count(Vacancy.company_id, Company.id).correlate(Company)
+        ).join(Company, Company.id == Vacancy.company_id).filter(Vacancy.id == vacancy_id).first()
+        if row is None or not row[1]:
+            return None
+        return Validators.from_parts('vacancy', vacancy_id, *row)
+
+    @staticmethod
+    def company(company_id):
+        row = db.session.query(
+            Company.updated_at,
+            _count(Vacancy.company_id, Company.id)
+        ).filter(Company.id == company_id).first()
+        if row is None:
+            return None
+        return Validators.from_parts('company', company_id, *row)
+
+    @staticmethod
+    def listing(cache_key, versions):
+        # Every insert, update and delete the listing shows bumps one of
+        # its tags, so the versions taken before the query stand for the
+        # whole result. Without a cache there are none, and no validators.
+        if versions is None:
+            return None
+        return Validators.from_parts(cache_key, ResponseCache.scope(), *sorted(versions.items()))
+
+    @staticmethod
+    def profile(user_id):
+        row = db.session.query(
+            Profile.id,
+            Profile.updated_at,
+            _count(Application.applicant_id, Profile.id)
+        ).filter(Profile.user_id == user_id).first()
+        if row is None:
+            return None
+        return Validators.from_parts('profile', *row)
+
+    @staticmethod
+    def applications(user_id):
+        row = db.session.query(
+            func.max(Profile.id),
+            func.count(Application.id),
+            func.max(Application.updated_at),
+            func.max(Vacancy.updated_at),
+            func.max(Company.updated_at),
+            func.max(Profile.updated_at),
+            func.max(User.updated_at)
+        ).select_from(Profile).join(
+            User, User.id == Profile.user_id
+        ).outerjoin(
+            Application, Application.applicant_id == Profile.id
+        ).outerjoin(
+            Vacancy, Vacancy.id == Application.vacancy_id
+        ).outerjoin(
+            Company, Company.id == Vacancy.company_id
+        ).filter(Profile.user_id == user_id).first()
+        if row is None or row[0] is None:
+            return None
+        return Validators.from_parts('applications', user_id, *row)
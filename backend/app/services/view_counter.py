@@ -0,0 +1,179 @@
+﻿import atexit
+import threading
+import uuid
+from collections import Counter
+from flask import current_app
+from sqlalchemy import bindparam, func
+from app import db
+from app.models.vacancy import Vacancy
+from app.services.response_cache import ResponseCache, vacancy_tag
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+class MemoryViewBuffer:
+    """Per-process buffer of pending view increments."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def increment(self, vacancy_id, amount=1):
+        with self.lock:
+            self.counts[vacancy_id] += amount
+
+    def pending(self, vacancy_id):
+        with self.lock:
+            return self.counts.get(vacancy_id, 0)
+
+    def drain(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        return dict(counts)
+
+    def restore(self, counts):
+        with self.lock:
+            self.counts.update(counts)
+
+class RedisViewBuffer:
+    """Buffer shared by all workers, kept in a Redis hash."""
+
+    def __init__(self, url, key='careerfinder:vacancy_views'):
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+
+    def increment(self, vacancy_id, amount=1):
+        self.client.hincrby(self.key, vacancy_id, amount)
+
+    def pending(self, vacancy_id):
+        return int(self.client.hget(self.key, vacancy_id) or 0)
+
+    def drain(self):
+        # RENAME is atomic, so increments that land during the flush go
+        # to a fresh hash instead of being lost.
+        flushing = f'{self.key}:flushing:{uuid.uuid4().hex}'
+        try:
+            self.client.rename(self.key, flushing)
+        except redis.ResponseError:
+            return {}
+        counts = self.client.hgetall(flushing)
+        self.client.delete(flushing)
+        return {int(vacancy_id): int(amount) for vacancy_id, amount in counts.items()}
+
+    def restore(self, counts):
+        pipeline = self.client.pipeline()
+        for vacancy_id, amount in counts.items():
+            pipeline.hincrby(self.key, vacancy_id, amount)
+        pipeline.execute()
+
+class ViewCounter:
+    """Collects vacancy views and writes them back in batches.
+
+    Each flush is a single executemany of
+    ``UPDATE vacancies SET views_count = views_count + n``, so concurrent
+    workers never overwrite each other's increments. ``updated_at`` is
+    left alone: a view is not an edit. The flushed vacancies' cache tags
+    are bumped afterwards, because a cached detail body plus the now
+    empty pending count would otherwise go backwards.
+    """
+
+    def __init__(self, app, buffer, interval=10):
+        self.app = app
+        self.buffer = buffer
+        self.interval = interval
+        self.flush_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.thread_lock = threading.Lock()
+
+    def record(self, vacancy_id, amount=1):
+        self.buffer.increment(vacancy_id, amount)
+        if self.interval > 0:
+            self.start()
+
+    def pending(self, vacancy_id):
+        return self.buffer.pending(vacancy_id)
+
+    def flush(self):
+        with self.flush_lock:
+            counts = self.buffer.drain()
+            if not counts:
+                return 0
+            table = Vacancy.__table__
+            statement = table.update().where(
+                table.c.id == bindparam('vacancy_id')
+            ).values(
+                views_count=func.coalesce(table.c.views_count, 0) + bindparam('amount'),
+                updated_at=table.c.updated_at
+            )
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as connection:
+                        connection.execute(statement, [
+                            {'vacancy_id': vacancy_id, 'amount': amount}
+                            for vacancy_id, amount in counts.items()
+                        ])
+                    ResponseCache.invalidate([vacancy_tag(vacancy_id) for vacancy_id in counts])
+            except Exception:
+                self.buffer.restore(counts)
+                raise
+            return len(counts)
+
+    def start(self):
+        # Started lazily so that every gunicorn worker gets its own
+        # thread after the fork.
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.thread_lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run, name='view-counter-flush', daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.error(f'View counter flush error: {str(e)}')
+
+    def stop(self):
+        self.stopped.set()
+        try:
+            self.flush()
+        except Exception as e:
+            self.app.logger.error(f'View counter flush error: {str(e)}')
+
+class ViewCounterService:
+    @staticmethod
+    def counter():
+        return current_app.extensions['view_counter']
+
+    @staticmethod
+    def record(vacancy_id):
+        ViewCounterService.counter().record(vacancy_id)
+
+    @staticmethod
+    def views_count(vacancy_id, stored_count):
+        return (stored_count or 0) + ViewCounterService.counter().pending(vacancy_id)
+
+    @staticmethod
+    def flush():
+        return ViewCounterService.counter().flush()
+
+def init_view_counter(app):
+    backend = app.config.get('VIEW_COUNTER_BACKEND', 'memory')
+    if backend == 'redis':
+        if redis is None:
+            raise RuntimeError('VIEW_COUNTER_BACKEND=redis requires the redis package')
+        buffer = RedisViewBuffer(app.config['REDIS_URL'])
+    else:
+        buffer = MemoryViewBuffer()
+
+    counter = ViewCounter(app, buffer, interval=app.config.get('VIEW_COUNTER_FLUSH_INTERVAL', 10))
+    app.extensions['view_counter'] = counter
+    atexit.register(counter.stop)
+    return counter
@@ -1,9 +1,15 @@
 ﻿from .helpers import format_salary, format_date, generate_slug
 from .validators import validate_email, validate_password, validate_phone, validate_salary
-from .security import sanitize_input, escape_html
+from .validators import sanitize_input
+from .security import escape_html
+from .cache import TTLCache
+from .pagination import KeysetPage, ListPage, keyset_paginate, encode_cursor, decode_cursor
+from .export import EXPORT_FORMATS, export_stream
 
 __all__ = [
     'format_salary', 'format_date', 'generate_slug',
     'validate_email', 'validate_password', 'validate_phone', 'validate_salary',
-    'sanitize_input', 'escape_html'
+    'sanitize_input', 'escape_html',
+    'TTLCache', 'KeysetPage', 'ListPage', 'keyset_paginate', 'encode_cursor', 'decode_cursor',
+    'EXPORT_FORMATS', 'export_stream'
 ]
@@ -0,0 +1,59 @@
+﻿import hashlib
+from datetime import datetime, timezone
+from flask import Response, request
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+class Validators:
+    """ETag / Last-Modified pair for a response, known before its body.
+
+    The ETag is weak: it is derived from ``updated_at`` values and counts
+    rather than from the serialized bytes.
+    """
+
+    def __init__(self, etag, last_modified=None):
+        self.etag = etag
+        self.last_modified = _as_utc(last_modified)
+
+    @classmethod
+    def from_parts(cls, *parts):
+        digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+        timestamps = [part for part in parts if isinstance(part, datetime)]
+        return cls(digest, max(timestamps) if timestamps else None)
+
+    def matches(self):
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(self.etag)
+        if request.if_modified_since and self.last_modified:
+            return self.last_modified <= request.if_modified_since
+        return False
+
+    def apply(self, response, private=False):
+        response.set_etag(self.etag, weak=True)
+        if self.last_modified:
+            response.last_modified = self.last_modified
+        response.cache_control.no_cache = True
+        if private:
+            response.cache_control.private = True
+        else:
+            response.cache_control.public = True
+        return response
+
+    def not_modified(self, private=False):
+        return self.apply(Response(status=304), private=private)
+
+    def to_dict(self):
+        return {
+            'etag': self.etag,
+            'last_modified': self.last_modified.isoformat() if self.last_modified else None
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        last_modified = data.get('last_modified')
+        return cls(data['etag'], datetime.fromisoformat(last_modified) if last_modified else None)
@@ -0,0 +1,61 @@
+﻿import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+CHUNK_SIZE = 64 * 1024
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def csv_lines(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_plain(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(
+            {column: _plain(value) for column, value in zip(columns, row)}, ensure_ascii=False
+        ) + '\n'
+
+def encode_chunks(lines, size=CHUNK_SIZE):
+    """Join text lines into UTF-8 chunks of roughly ``size`` bytes."""
+    parts, length = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        parts.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(parts)
+            parts, length = [], 0
+    if parts:
+        yield b''.join(parts)
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_stream(columns, rows, format='csv', gzip=False):
+    """Serialize ``rows`` lazily as CSV or NDJSON bytes, optionally gzipped."""
+    lines = csv_lines(columns, rows) if format == 'csv' else ndjson_lines(columns, rows)
+    chunks = encode_chunks(lines)
+    return gzip_chunks(chunks) if gzip else chunks
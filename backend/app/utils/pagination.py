@@ -0,0 +1,81 @@
+﻿import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+class ListPage:
+    def __init__(self, items, page, per_page, total):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def pages(self):
+        return -(-self.total // self.per_page) if self.per_page else 0
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+def _load_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+def encode_cursor(values):
+    raw = json.dumps([_dump_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, size):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = [_load_value(value) for value in json.loads(raw)]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Invalid cursor')
+    if len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+def keyset_paginate(query, columns, cursor=None, per_page=20, descending=False, include_total=False):
+    """Paginate on a unique, ordered column tuple instead of OFFSET.
+
+    ``columns`` must end in a unique column (usually the primary key) so
+    the ordering is total. An empty ``cursor`` means the first page.
+    """
+    total = query.order_by(None).count() if include_total else None
+
+    if cursor:
+        values = decode_cursor(cursor, len(columns))
+        clauses = []
+        for i, column in enumerate(columns):
+            equal = [columns[j] == values[j] for j in range(i)]
+            beyond = column < values[i] if descending else column > values[i]
+            clauses.append(and_(*equal, beyond))
+        query = query.filter(or_(*clauses))
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*ordering).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+
+    return KeysetPage(rows, next_cursor, total)
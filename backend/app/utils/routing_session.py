@@ -0,0 +1,44 @@
+﻿from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import orm
+
+def replica_engine(session, clause):
+    """The replica engine ``clause`` may read from, or None for the primary."""
+    if session._flushing or session.info.get('flushed') or not has_app_context():
+        return None
+    engine = g.get('replica_engine')
+    if engine is None or not getattr(clause, 'is_select', False):
+        return None
+    if getattr(clause, '_for_update_arg', None) is not None:
+        return None
+    return engine
+
+class RoutingSession(Session):
+    """``db.session`` class that sends plain reads to ``g.replica_engine``.
+
+    The engine is only set while a ``@read_replica`` view runs (see
+    app.services.read_replicas). Flushes, DML, raw SQL, ``SELECT ... FOR
+    UPDATE`` and every statement after the session's first flush still
+    go to the primary, so a request always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engine = replica_engine(self, clause)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class AsyncRoutingSession(orm.Session):
+    """Sync side of the ``AsyncSession`` that async reads run in (see app.asgi).
+
+    Routes like :class:`RoutingSession`, but to the async engine standing
+    in for each sync one: ``info['async_engines']`` maps the sync replica
+    engines, and None for the primary, to their async counterparts.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        engines = self.info['async_engines']
+        return engines.get(replica_engine(self, clause), engines[None]).sync_engine
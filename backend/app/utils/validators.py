@@ -1,9 +1,9 @@
 ﻿import re
-from email_validator import validate_email, EmailNotValidError
+from email_validator import validate_email as _validate_email, EmailNotValidError
 
 def validate_email(email):
     try:
-        valid = validate_email(email)
+        _validate_email(email, check_deliverability=False)
         return True
     except EmailNotValidError:
         return False
@@ -0,0 +1,10 @@
+﻿from app import create_app
+from app.asgi import create_asgi_app
+from app.config import ProductionConfig
+from app.services.password_hasher import start_password_hasher
+from app.services.recommendation_service import warm_recommendations
+
+flask_app = create_app(ProductionConfig)
+start_password_hasher(flask_app)
+warm_recommendations(flask_app)
+app = create_asgi_app(flask_app)
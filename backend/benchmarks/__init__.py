@@ -0,0 +1,4 @@
+﻿from .data import BENCHMARK_PASSWORD, Generator, generate
+from .driver import WORKLOADS, compare, run
+
+__all__ = ['BENCHMARK_PASSWORD', 'Generator', 'generate', 'WORKLOADS', 'compare', 'run']
@@ -0,0 +1,85 @@
+﻿"""Benchmarks for the CareerFinder API.
+
+Run from the backend directory::
+
+    python -m benchmarks generate --database sqlite:///bench.db --vacancies 100000
+    python -m benchmarks run --database sqlite:///bench.db --output before.json
+    python -m benchmarks run --database sqlite:///bench.db --output after.json
+    python -m benchmarks compare before.json after.json
+
+``run`` drives the app in-process through ``create_app(TestingConfig)``
+pointed at the given database, or with ``--url`` a server that is
+already running on it (``gunicorn -w 1 wsgi:app``).
+"""
+import json
+import click
+from app import create_app, db
+from benchmarks.data import generate
+from benchmarks.driver import WORKLOADS, benchmark_config, compare, run
+
+def parse_overrides(values):
+    overrides = {}
+    for value in values:
+        key, _, raw = value.partition('=')
+        try:
+            overrides[key] = json.loads(raw)
+        except ValueError:
+            overrides[key] = raw
+    return overrides
+
+@click.group()
+def cli():
+    """CareerFinder benchmarks."""
+
+@cli.command('generate')
+@click.option('--database', required=True, help='SQLAlchemy URL, e.g. sqlite:///bench.db or postgresql://...')
+@click.option('--vacancies', default=10000, show_default=True)
+@click.option('--companies', type=int, default=None, help='Defaults to vacancies / 20.')
+@click.option('--job-seekers', type=int, default=None, help='Defaults to vacancies / 2.')
+@click.option('--applications', type=int, default=None, help='Defaults to vacancies * 2.')
+@click.option('--english-share', default=0.4, show_default=True, help='Share of English rows; the rest are Russian.')
+@click.option('--seed', default=42, show_default=True)
+@click.option('--batch-size', default=5000, show_default=True)
+def generate_command(database, vacancies, companies, job_seekers, applications, english_share, seed, batch_size):
+    """Create the schema and bulk-load synthetic data."""
+    app = create_app(benchmark_config(database))
+    with app.app_context():
+        db.create_all()
+        counts = generate(
+            vacancies=vacancies, companies=companies, job_seekers=job_seekers, applications=applications,
+            english_share=english_share, seed=seed, batch_size=batch_size, log=click.echo
+        )
+    click.echo(json.dumps(counts))
+
+@cli.command('run')
+@click.option('--database', required=True, help='Database the data was generated into.')
+@click.option('--url', default=None, help='Base URL of a running server; in-process when omitted.')
+@click.option('--workload', 'workloads', multiple=True, type=click.Choice(sorted(WORKLOADS)),
+              help='Repeat to pick several; all of them by default.')
+@click.option('--requests', default=500, show_default=True, help='Requests per workload.')
+@click.option('--concurrency', default=4, show_default=True)
+@click.option('--warmup', default=20, show_default=True)
+@click.option('--sessions', default=20, show_default=True, help='Job seekers logged in for authenticated workloads.')
+@click.option('--seed', default=42, show_default=True)
+@click.option('--set', 'settings', multiple=True, help='Config override KEY=VALUE (value parsed as JSON when possible).')
+@click.option('--output', type=click.Path(dir_okay=False), default=None, help='Write results as JSON.')
+def run_command(database, url, workloads, requests, concurrency, warmup, sessions, seed, settings, output):
+    """Run endpoint workloads and report throughput, latency and queries."""
+    results = run(
+        database, workloads or list(WORKLOADS), url=url, requests=requests, concurrency=concurrency,
+        warmup=warmup, sessions=sessions, seed=seed, overrides=parse_overrides(settings), log=click.echo
+    )
+    if output:
+        with open(output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, ensure_ascii=False, indent=2)
+
+@cli.command('compare')
+@click.argument('baseline', type=click.File('r', encoding='utf-8'))
+@click.argument('candidate', type=click.File('r', encoding='utf-8'))
+def compare_command(baseline, candidate):
+    """Relative change of CANDIDATE against BASELINE."""
+    for line in compare(json.load(baseline), json.load(candidate)):
+        click.echo(line)
+
+if __name__ == '__main__':
+    cli()
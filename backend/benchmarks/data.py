@@ -0,0 +1,251 @@
+﻿import random
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, text
+from app import db
+from app.models.application import Application
+from app.models.company import Company
+from app.models.profile import Profile
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services.location_service import LocationService
+from app.services.salary_service import SalaryService, salary_range
+from app.services.stats_service import StatsService
+
+BENCHMARK_PASSWORD = 'benchmark'
+EMAIL_DOMAIN = 'bench.local'
+
+LOCATIONS = {
+    'ru': ['Москва', 'Санкт-Петербург', 'Новосибирск', 'Екатеринбург', 'Казань',
+           'Нижний Новгород', 'Краснодар', 'Удалённо'],
+    'en': ['Moscow', 'Saint Petersburg', 'Berlin', 'London', 'Amsterdam', 'Remote', 'Warsaw', 'Belgrade']
+}
+ROLES = {
+    'ru': ['Разработчик Python', 'Backend-разработчик', 'Frontend-разработчик', 'Аналитик данных',
+           'Тестировщик', 'DevOps-инженер', 'Менеджер проектов', 'Дизайнер интерфейсов',
+           'Специалист поддержки', 'Бухгалтер', 'Менеджер по продажам', 'HR-менеджер'],
+    'en': ['Python Developer', 'Backend Engineer', 'Frontend Developer', 'Data Analyst', 'QA Engineer',
+           'DevOps Engineer', 'Project Manager', 'UX Designer', 'Support Specialist', 'Accountant',
+           'Sales Manager', 'Recruiter']
+}
+LEVELS = {
+    'ru': ['Младший', 'Старший', 'Ведущий', 'Главный', ''],
+    'en': ['Junior', 'Senior', 'Lead', 'Principal', '']
+}
+SENTENCES = {
+    'ru': ['Мы ищем специалиста в растущую команду.', 'Работа над высоконагруженным продуктом.',
+           'Гибкий график и возможность удалённой работы.', 'Официальное оформление и ДМС.',
+           'Участие в проектировании архитектуры.', 'Наставничество и обучение за счёт компании.',
+           'Команда из двадцати инженеров и аналитиков.', 'Современный стек и быстрые релизы.'],
+    'en': ['We are looking for a specialist to join a growing team.', 'You will work on a high-load product.',
+           'Flexible hours and remote work are possible.', 'Health insurance and paid time off.',
+           'You will take part in architecture design.', 'Mentoring and a paid learning budget.',
+           'A team of twenty engineers and analysts.', 'A modern stack and frequent releases.']
+}
+SKILLS = ['Python', 'Flask', 'Django', 'PostgreSQL', 'SQL', 'Docker', 'Kubernetes', 'React', 'TypeScript',
+          'Go', 'Java', 'Kafka', 'Redis', 'Linux', 'Git', 'Excel', '1С', 'Figma', 'Agile', 'English']
+FIRST_NAMES = ['Иван', 'Анна', 'Дмитрий', 'Мария', 'Алексей', 'Елена', 'John', 'Emma', 'Michael', 'Olivia']
+LAST_NAMES = ['Иванов', 'Смирнова', 'Кузнецов', 'Попова', 'Соколов', 'Smith', 'Brown', 'Miller', 'Wilson']
+COMPANY_NAMES = ['Альфа', 'Вектор', 'Горизонт', 'Northwind', 'Contoso', 'Globex', 'Initech', 'Umbrella']
+INDUSTRIES = ['IT', 'Финансы', 'Ритейл', 'Healthcare', 'Education', 'Logistics', 'Manufacturing', 'Media']
+COMPANY_SIZES = ['1-10', '11-50', '51-200', '201-1000', '1000+']
+EMPLOYMENT_TYPES = ['full', 'full', 'full', 'part', 'remote', 'contract']
+EXPERIENCE_LEVELS = ['not_required', 'junior', 'middle', 'senior']
+APPLICATION_STATUSES = ['pending', 'pending', 'reviewed', 'interview', 'accepted', 'rejected']
+CURRENCIES = ['RUB'] * 8 + ['USD', 'EUR']
+
+def seeker_email(index):
+    return f'seeker{index}@{EMAIL_DOMAIN}'
+
+def employer_email(index):
+    return f'employer{index}@{EMAIL_DOMAIN}'
+
+class Generator:
+    """Bulk-loads a reproducible synthetic data set.
+
+    Rows are built from fixed word lists with a seeded RNG and written
+    with executemany INSERTs in batches, with explicit ids, so a million
+    rows take seconds rather than the hours the ORM would need. The
+    derived data the flush hooks normally maintain (normalized location,
+    base salary, platform counters) is filled in on the way. Every user
+    has the password ``BENCHMARK_PASSWORD``.
+    """
+
+    def __init__(self, vacancies=10000, companies=None, job_seekers=None, applications=None,
+                 english_share=0.4, seed=42, batch_size=5000, log=print):
+        self.vacancies = vacancies
+        self.companies = companies or max(vacancies // 20, 1)
+        self.job_seekers = job_seekers or max(vacancies // 2, 1)
+        self.applications = min(
+            applications if applications is not None else vacancies * 2, self.vacancies * self.job_seekers
+        )
+        self.english_share = english_share
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log
+        self.now = datetime.utcnow().replace(microsecond=0)
+
+    def language(self):
+        return 'en' if self.rng.random() < self.english_share else 'ru'
+
+    def insert(self, model, rows):
+        table = model.__table__
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                db.session.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(table.insert(), batch)
+        db.session.commit()
+
+    def next_id(self, model):
+        return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+    def timed(self, label, model, rows, count):
+        started = time.perf_counter()
+        self.insert(model, rows)
+        elapsed = time.perf_counter() - started
+        self.log(f'{label}: {count} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)')
+
+    def run(self):
+        rng = self.rng
+        password_hash = current_app.extensions['password_hasher'].hash(BENCHMARK_PASSWORD)
+        user_start = self.next_id(User)
+        company_start = self.next_id(Company)
+        profile_start = self.next_id(Profile)
+        vacancy_start = self.next_id(Vacancy)
+        if user_start > 1:
+            self.log(f'Appending to existing data (users from id {user_start})')
+
+        employer_ids = range(user_start, user_start + self.companies)
+        seeker_ids = range(employer_ids.stop, employer_ids.stop + self.job_seekers)
+
+        def users():
+            for user_id in employer_ids:
+                yield self.user(user_id, employer_email(user_id), 'employer', password_hash)
+            for user_id in seeker_ids:
+                yield self.user(user_id, seeker_email(user_id), 'job_seeker', password_hash)
+        self.timed('users', User, users(), len(employer_ids) + len(seeker_ids))
+
+        industries = {}
+        def companies():
+            for offset, user_id in enumerate(employer_ids):
+                company_id = company_start + offset
+                industries[company_id] = rng.choice(INDUSTRIES)
+                yield {
+                    'id': company_id, 'user_id': user_id,
+                    'name': f'{rng.choice(COMPANY_NAMES)} {company_id}',
+                    'description': ' '.join(rng.sample(SENTENCES[self.language()], 3)),
+                    'industry': industries[company_id], 'company_size': rng.choice(COMPANY_SIZES),
+                    'founded_year': rng.randint(1990, 2024), 'is_verified': rng.random() < 0.3,
+                    'created_at': self.past(720), 'updated_at': self.now
+                }
+        self.timed('companies', Company, companies(), len(employer_ids))
+
+        def profiles():
+            for offset, user_id in enumerate(seeker_ids):
+                language = self.language()
+                yield {
+                    'id': profile_start + offset, 'user_id': user_id,
+                    'first_name': rng.choice(FIRST_NAMES), 'last_name': rng.choice(LAST_NAMES),
+                    'location': rng.choice(LOCATIONS[language]),
+                    'bio': ' '.join(rng.sample(SENTENCES[language], 2)),
+                    'skills': ', '.join(rng.sample(SKILLS, rng.randint(3, 7))),
+                    'experience': rng.choice(ROLES[language]),
+                    'desired_salary': rng.randrange(40000, 400000, 5000),
+                    'desired_job_type': rng.choice(EMPLOYMENT_TYPES),
+                    'desired_location': rng.choice(LOCATIONS[language]),
+                    'created_at': self.past(365), 'updated_at': self.now
+                }
+        self.timed('profiles', Profile, profiles(), len(seeker_ids))
+
+        locations = {
+            name: LocationService.get_or_create(db.session, name)
+            for names in LOCATIONS.values() for name in names
+        }
+        db.session.flush()
+        location_ids = {name: location.id if location else None for name, location in locations.items()}
+        rates = {currency: SalaryService.rate(db.session, currency) for currency in set(CURRENCIES)}
+        db.session.commit()
+
+        created = {}
+        def vacancies():
+            for offset in range(self.vacancies):
+                vacancy_id = vacancy_start + offset
+                language = self.language()
+                company_offset = rng.randrange(self.companies)
+                salary_from = rng.randrange(30000, 300000, 5000) if rng.random() < 0.85 else None
+                salary_to = (salary_from or 30000) + rng.randrange(0, 200000, 5000) if rng.random() < 0.7 else None
+                currency = rng.choice(CURRENCIES)
+                if currency != 'RUB':
+                    salary_from = salary_from and salary_from // 90
+                    salary_to = salary_to and salary_to // 90
+                salary_min_base, salary_max_base = salary_range(salary_from, salary_to, rates[currency])
+                location = rng.choice(LOCATIONS[language])
+                created[vacancy_id] = self.past(180)
+                yield {
+                    'id': vacancy_id,
+                    'title': f'{rng.choice(LEVELS[language])} {rng.choice(ROLES[language])}'.strip(),
+                    'description': ' '.join(rng.sample(SENTENCES[language], 4)),
+                    'requirements': ', '.join(rng.sample(SKILLS, rng.randint(2, 6))),
+                    'salary_from': salary_from, 'salary_to': salary_to, 'currency': currency,
+                    'salary_min_base': salary_min_base, 'salary_max_base': salary_max_base,
+                    'location': location, 'location_id': location_ids[location],
+                    'employment_type': rng.choice(EMPLOYMENT_TYPES),
+                    'experience_level': rng.choice(EXPERIENCE_LEVELS),
+                    'is_active': rng.random() < 0.9, 'views_count': rng.randint(0, 5000),
+                    'employer_id': employer_ids[company_offset], 'company_id': company_start + company_offset,
+                    'created_at': created[vacancy_id], 'updated_at': created[vacancy_id]
+                }
+        self.timed('vacancies', Vacancy, vacancies(), self.vacancies)
+
+        def applications():
+            seen = set()
+            vacancy_ids = range(vacancy_start, vacancy_start + self.vacancies)
+            profile_ids = range(profile_start, profile_start + len(seeker_ids))
+            while len(seen) < self.applications:
+                # Popular vacancies get more applications.
+                vacancy_id = vacancy_ids[int(len(vacancy_ids) * rng.random() ** 2)]
+                profile_id = rng.choice(profile_ids)
+                if (vacancy_id, profile_id) in seen:
+                    continue
+                seen.add((vacancy_id, profile_id))
+                applied_at = created[vacancy_id] + timedelta(
+                    seconds=rng.randrange(max(int((self.now - created[vacancy_id]).total_seconds()), 1))
+                )
+                yield {
+                    'vacancy_id': vacancy_id, 'applicant_id': profile_id,
+                    'cover_letter': rng.choice(SENTENCES[self.language()]),
+                    'status': rng.choice(APPLICATION_STATUSES),
+                    'applied_at': applied_at, 'updated_at': applied_at
+                }
+        self.timed('applications', Application, applications(), self.applications)
+
+        if db.engine.dialect.name == 'postgresql':
+            for model in (User, Company, Profile, Vacancy):
+                table = model.__tablename__
+                db.session.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                ))
+            db.session.commit()
+        StatsService.reconcile()
+        return {
+            'users': len(employer_ids) + len(seeker_ids), 'companies': self.companies,
+            'profiles': self.job_seekers, 'vacancies': self.vacancies, 'applications': self.applications
+        }
+
+    def user(self, user_id, email, user_type, password_hash):
+        return {
+            'id': user_id, 'username': email.split('@')[0], 'email': email, 'password_hash': password_hash,
+            'user_type': user_type, 'is_active': True, 'is_verified': True,
+            'created_at': self.past(720), 'updated_at': self.now
+        }
+
+    def past(self, days):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+def generate(**options):
+    return Generator(**options).run()
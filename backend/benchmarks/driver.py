@@ -0,0 +1,254 @@
+﻿import json
+import math
+import platform
+import random
+import re
+import subprocess
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+from sqlalchemy import func
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.profile import Profile
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from benchmarks.data import BENCHMARK_PASSWORD, LOCATIONS
+
+SEARCH_TERMS = ['python', 'разработчик', 'аналитик', 'engineer', 'менеджер', 'remote', 'senior', 'postgresql']
+METRIC_LINE = re.compile(r'^careerfinder_db_(queries|time)_per_request(?:_seconds)?_(sum|count)\{endpoint="([^"]*)"\} (\S+)$')
+
+def benchmark_config(database_url, overrides=None):
+    attributes = {'SQLALCHEMY_DATABASE_URI': database_url}
+    attributes.update(overrides or {})
+    return type('BenchmarkConfig', (TestingConfig,), attributes)
+
+class Dataset:
+    """Ids and accounts the workloads pick from, read once from the database."""
+
+    def __init__(self, app, sessions=20, seed=42):
+        with app.app_context():
+            self.vacancy_ids = db.session.query(func.min(Vacancy.id), func.max(Vacancy.id)).one()
+            self.seeker_emails = [email for email, in db.session.query(User.email).join(
+                Profile, Profile.user_id == User.id
+            ).filter(User.user_type == 'job_seeker').order_by(User.id).limit(sessions * 50)]
+            self.counts = {
+                'users': User.query.count(),
+                'vacancies': Vacancy.query.count(),
+                'profiles': Profile.query.count()
+            }
+            self.dialect = db.engine.dialect.name
+        if self.vacancy_ids[0] is None or not self.seeker_emails:
+            raise ValueError('The database has no benchmark data; run "generate" first')
+        rng = random.Random(seed)
+        self.session_emails = rng.sample(self.seeker_emails, min(sessions, len(self.seeker_emails)))
+        self.tokens = []
+
+def list_vacancies(dataset, rng):
+    return 'GET', f'/vacancies/?page={rng.randint(1, 50)}', None, None
+
+def filter_vacancies(dataset, rng):
+    location = quote(rng.choice(LOCATIONS[rng.choice(['ru', 'en'])]))
+    return 'GET', f'/vacancies/?location={location}&employment_type=full&min_salary={rng.randrange(50000, 200000, 10000)}', None, None
+
+def search_vacancies(dataset, rng):
+    return 'GET', f'/vacancies/?search={quote(rng.choice(SEARCH_TERMS))}', None, None
+
+def get_vacancy(dataset, rng):
+    return 'GET', f'/vacancies/{rng.randint(*dataset.vacancy_ids)}', None, None
+
+def list_companies(dataset, rng):
+    return 'GET', f'/companies/?page={rng.randint(1, 20)}', None, None
+
+def my_applications(dataset, rng):
+    return 'GET', '/profile/my-applications', None, rng.choice(dataset.tokens)
+
+def login(dataset, rng):
+    return 'POST', '/auth/login', {'email': rng.choice(dataset.seeker_emails), 'password': BENCHMARK_PASSWORD}, None
+
+def platform_stats(dataset, rng):
+    return 'GET', '/api/v1/stats', None, None
+
+WORKLOADS = {
+    'vacancies': list_vacancies,
+    'vacancies_filtered': filter_vacancies,
+    'search': search_vacancies,
+    'vacancy': get_vacancy,
+    'companies': list_companies,
+    'my_applications': my_applications,
+    'login': login,
+    'stats': platform_stats
+}
+
+class InProcessTarget:
+    """Requests through the Flask test client of an app built in this process."""
+
+    def __init__(self, app):
+        self.app = app
+        self.name = 'in-process'
+        self.local = threading.local()
+
+    def request(self, method, path, json=None, token=None):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        headers = {'Authorization': f'Bearer {token}'} if token else None
+        response = client.open(path, method=method, json=json, headers=headers)
+        return response.status_code, response.get_data()
+
+class HttpTarget:
+    """Requests over HTTP, e.g. to a local gunicorn; run it with one worker for exact query counts."""
+
+    def __init__(self, base_url):
+        import requests
+        self.requests = requests
+        self.base_url = base_url.rstrip('/')
+        self.name = self.base_url
+        self.local = threading.local()
+
+    def request(self, method, path, json=None, token=None):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = self.requests.Session()
+        headers = {'Authorization': f'Bearer {token}'} if token else None
+        response = session.request(method, self.base_url + path, json=json, headers=headers)
+        return response.status_code, response.content
+
+def scrape(target):
+    """Total SQL statements, DB seconds and requests so far, from ``/api/v1/metrics``."""
+    status, body = target.request('GET', '/api/v1/metrics')
+    totals = {'queries': 0.0, 'time': 0.0, 'requests': 0.0}
+    if status != 200:
+        return totals
+    for line in body.decode().splitlines():
+        match = METRIC_LINE.match(line)
+        if not match or match.group(3) == 'api.metrics':
+            continue
+        kind, part, _, value = match.groups()
+        if part == 'sum':
+            totals[kind] += float(value)
+        elif kind == 'queries':
+            totals['requests'] += float(value)
+    return totals
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, max(math.ceil(fraction * len(ordered)) - 1, 0))]
+
+def run_workload(target, dataset, name, requests=500, concurrency=4, warmup=20, seed=42):
+    workload = WORKLOADS[name]
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        method, path, body, token = workload(dataset, rng)
+        target.request(method, path, json=body, token=token)
+
+    before = scrape(target)
+    latencies, errors, lock = [], [0], threading.Lock()
+
+    def worker(index, count):
+        rng = random.Random(seed * 1000 + index)
+        own, failed = [], 0
+        for _ in range(count):
+            method, path, body, token = workload(dataset, rng)
+            started = time.perf_counter()
+            status, _ = target.request(method, path, json=body, token=token)
+            own.append(time.perf_counter() - started)
+            failed += status >= 500
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    shares = [requests // concurrency + (index < requests % concurrency) for index in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(index, count)) for index, count in enumerate(shares)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    after = scrape(target)
+
+    latencies.sort()
+    served = after['requests'] - before['requests']
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3),
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3)
+        },
+        'queries_per_request': round((after['queries'] - before['queries']) / served, 2) if served else None,
+        'db_ms_per_request': round((after['time'] - before['time']) / served * 1000, 3) if served else None
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(database_url, workloads, url=None, requests=500, concurrency=4, warmup=20, sessions=20,
+        seed=42, overrides=None, log=print):
+    app = create_app(benchmark_config(database_url, overrides))
+    dataset = Dataset(app, sessions=sessions, seed=seed)
+    target = HttpTarget(url) if url else InProcessTarget(app)
+
+    for email in dataset.session_emails:
+        status, body = target.request('POST', '/auth/login', json={'email': email, 'password': BENCHMARK_PASSWORD})
+        if status != 200:
+            raise RuntimeError(f'Login of {email} failed with {status}')
+        dataset.tokens.append(json.loads(body)['access_token'])
+
+    results = {
+        'meta': {
+            'started_at': datetime.utcnow().isoformat(),
+            'commit': git_commit(),
+            'target': target.name,
+            'database': dataset.dialect,
+            'rows': dataset.counts,
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'requests': requests,
+            'concurrency': concurrency,
+            'seed': seed,
+            'overrides': overrides or {}
+        },
+        'workloads': {}
+    }
+    for name in workloads:
+        result = run_workload(target, dataset, name, requests=requests, concurrency=concurrency,
+                              warmup=warmup, seed=seed)
+        results['workloads'][name] = result
+        latency = result['latency_ms']
+        log(f'{name:20} {result["throughput"]:>8} req/s  p50 {latency["p50"]:>8} ms  '
+            f'p95 {latency["p95"]:>8} ms  p99 {latency["p99"]:>8} ms  '
+            f'queries {result["queries_per_request"]}  errors {result["errors"]}')
+    return results
+
+def compare(baseline, candidate):
+    """Lines comparing two result files, workload by workload."""
+    def change(old, new):
+        if old in (None, 0) or new is None:
+            return '     n/a'
+        return f'{(new - old) / old * 100:+7.1f}%'
+
+    lines = [f'{"workload":20} {"req/s":>9} {"p50":>9} {"p95":>9} {"p99":>9} {"queries":>9}']
+    for name, new in candidate['workloads'].items():
+        old = baseline['workloads'].get(name)
+        if old is None:
+            continue
+        lines.append(
+            f'{name:20} {change(old["throughput"], new["throughput"]):>9} '
+            f'{change(old["latency_ms"]["p50"], new["latency_ms"]["p50"]):>9} '
+            f'{change(old["latency_ms"]["p95"], new["latency_ms"]["p95"]):>9} '
+            f'{change(old["latency_ms"]["p99"], new["latency_ms"]["p99"]):>9} '
+            f'{change(old["queries_per_request"], new["queries_per_request"]):>9}'
+        )
+    return lines
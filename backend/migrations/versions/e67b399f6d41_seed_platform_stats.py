@@ -0,0 +1,72 @@
+"""Seed platform statistics counters
+
+Revision ID: e67b399f6d41
+Revises: af64ae907819
+Create Date: 2026-10-17 19:49:53.618248
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e67b399f6d41'
+down_revision = 'af64ae907819'
+branch_labels = None
+depends_on = None
+
+# Written out here rather than imported from the application, so that
+# later model changes cannot break upgrading from scratch.
+platform_stats = sa.table(
+    'platform_stats', sa.column('key', sa.String), sa.column('value', sa.BigInteger),
+    sa.column('updated_at', sa.DateTime)
+)
+COUNTS = (
+    ('vacancies.active', 'SELECT COUNT(*) FROM vacancies WHERE is_active = :active'),
+    ('companies.total', 'SELECT COUNT(*) FROM companies'),
+)
+INDUSTRIES = (
+    'SELECT companies.industry, COUNT(*) FROM vacancies '
+    'JOIN companies ON companies.id = vacancies.company_id '
+    'WHERE vacancies.is_active = :active GROUP BY companies.industry'
+)
+DAYS = 'SELECT DATE(applied_at), COUNT(*) FROM applications GROUP BY DATE(applied_at)'
+
+
+def actual_counts(bind):
+    counts = {'stats.initialized': 1}
+    for key, query in COUNTS:
+        counts[key] = bind.execute(sa.text(query), {'active': True}).scalar()
+    for industry, count in bind.execute(sa.text(INDUSTRIES), {'active': True}):
+        key = f'vacancies.active.industry:{industry or "unspecified"}'
+        counts[key] = counts.get(key, 0) + count
+    for day, count in bind.execute(sa.text(DAYS)):
+        counts[f'applications.day:{day}'] = count
+    return counts
+
+
+def upgrade():
+    # Counters used to be seeded by the first stats request; count them
+    # here instead. Adding the drift leaves already seeded counters alone.
+    bind = op.get_bind()
+    counts = actual_counts(bind)
+    current = dict(bind.execute(sa.select(platform_stats.c.key, platform_stats.c.value)).all())
+    now = datetime.utcnow()
+    for key in sorted(set(counts) | set(current)):
+        delta = counts.get(key, 0) - current.get(key, 0)
+        if not delta:
+            continue
+        if key in current:
+            bind.execute(
+                platform_stats.update().where(platform_stats.c.key == key).values(
+                    value=platform_stats.c.value + delta, updated_at=now
+                )
+            )
+        else:
+            bind.execute(platform_stats.insert().values(key=key, value=delta, updated_at=now))
+
+
+def downgrade():
+    # The counters are data kept up to date by the application.
+    pass
@@ -0,0 +1,67 @@
+﻿import os
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.application import Application
+from app.models.company import Company
+from app.models.profile import Profile
+from app.models.vacancy import Vacancy
+from app.services.identity_service import IdentityService
+from app.services.response_cache import MemoryCacheBackend
+from app.services.view_counter import ViewCounterService
+from benchmarks.data import generate
+
+class PlanTestingConfig(TestingConfig):
+    # PostgreSQL plans differ enough from SQLite's to be worth checking:
+    # TEST_DATABASE_URL=postgresql://... python -m pytest tests
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', TestingConfig.SQLALCHEMY_DATABASE_URI)
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    # Cached responses run no queries at all.
+    RESPONSE_CACHE_BACKEND = 'none'
+    METRICS_ENABLED = False
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app(PlanTestingConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        generate(vacancies=2000, seed=7, log=lambda message: None)
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        ViewCounterService.flush()
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def response_cache(app):
+    """The in-memory response cache, switched on for one test."""
+    app.extensions['response_cache'] = MemoryCacheBackend()
+    yield app.extensions['response_cache']
+    del app.extensions['response_cache']
+
+@pytest.fixture(scope='session')
+def seeded(app):
+    """IDs and tokens the route cases fill their URLs from."""
+    with app.app_context():
+        seeker_id, profile_id = db.session.query(Profile.user_id, Profile.id).join(
+            Application, Application.applicant_id == Profile.id
+        ).order_by(Profile.id).first()
+        applied = db.session.query(Application.vacancy_id).filter(Application.applicant_id == profile_id)
+        vacancy_id = db.session.query(Vacancy.id).filter(
+            Vacancy.is_active.is_(True), Vacancy.id.notin_(applied)
+        ).order_by(Vacancy.id).first()[0]
+        company = db.session.query(Company.id, Company.user_id).join(
+            Vacancy, Vacancy.company_id == Company.id
+        ).join(Application, Application.vacancy_id == Vacancy.id).order_by(Company.id).first()
+        seeker_email = db.session.get(Profile, profile_id).user.email
+        return {
+            'vacancy_id': vacancy_id,
+            'company_id': company.id,
+            'seeker_email': seeker_email,
+            'seeker': IdentityService.create_token(IdentityService.principal(seeker_id)),
+            'employer': IdentityService.create_token(IdentityService.principal(company.user_id))
+        }
@@ -0,0 +1,78 @@
+﻿"""The ASGI entry point, driven through ASGI scopes."""
+import asyncio
+import json
+import pytest
+from app import create_app, db
+from app.asgi import CACHED_ENDPOINTS, create_asgi_app
+from app.models.vacancy import Vacancy
+from app.services.response_cache import RedisCacheBackend
+from benchmarks.data import generate
+from tests.conftest import PlanTestingConfig
+
+@pytest.fixture(scope='module')
+def asgi_app(tmp_path_factory):
+    # The async engine opens its own connections, so the database has to
+    # be a file rather than the shared in-memory one.
+    class AsgiTestingConfig(PlanTestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path_factory.mktemp("asgi") / "asgi.db"}'
+    app = create_app(AsgiTestingConfig)
+    with app.app_context():
+        db.create_all()
+        generate(vacancies=50, seed=3, log=lambda message: None)
+    return app
+
+async def request(asgi, path, method='GET', query=b''):
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query,
+        'headers': [(b'host', b'localhost')], 'http_version': '1.1', 'scheme': 'http'
+    }
+    await asgi(scope, receive, send)
+    body = b''.join(message.get('body', b'') for message in sent if message['type'] == 'http.response.body')
+    return sent[0]['status'], body
+
+def test_reads_run_on_the_event_loop(asgi_app):
+    asgi = create_asgi_app(asgi_app)
+    with asgi_app.app_context():
+        vacancy_id = db.session.query(Vacancy.id).filter(Vacancy.is_active.is_(True)).first()[0]
+
+    async def run():
+        events, replies = asyncio.Queue(), asyncio.Queue()
+        lifespan = asyncio.create_task(asgi({'type': 'lifespan'}, events.get, replies.put))
+        await events.put({'type': 'lifespan.startup'})
+        assert (await replies.get())['type'] == 'lifespan.startup.complete'
+        try:
+            for path in ('/vacancies/', f'/vacancies/{vacancy_id}', '/companies/', '/api/v1/stats'):
+                assert asgi.reads.handles({'type': 'http', 'method': 'GET', 'path': path})
+                status, body = await request(asgi, path)
+                assert status == 200, body
+                assert json.loads(body)
+            # Everything else goes through the WSGI thread pool.
+            assert not asgi.reads.handles({'type': 'http', 'method': 'GET', 'path': '/api/v1/health'})
+            status, body = await request(asgi, '/api/v1/health')
+            assert (status, json.loads(body)['status']) == (200, 'healthy')
+        finally:
+            await events.put({'type': 'lifespan.shutdown'})
+            await lifespan
+
+    asyncio.run(run())
+
+def test_blocking_cache_keeps_views_on_the_thread_pool(asgi_app):
+    cache = asgi_app.extensions.get('response_cache')
+    asgi_app.extensions['response_cache'] = RedisCacheBackend('redis://localhost:6379/0')
+    try:
+        endpoints = create_asgi_app(asgi_app).reads.endpoints
+    finally:
+        asgi_app.extensions.pop('response_cache')
+        if cache is not None:
+            asgi_app.extensions['response_cache'] = cache
+    assert endpoints == {'api.get_stats'}
+    assert not endpoints & CACHED_ENDPOINTS
@@ -0,0 +1,76 @@
+﻿"""Email outbox delivery and retries."""
+import smtplib
+import time
+from datetime import datetime
+import pytest
+from app import create_app, db
+from app.models.outbox_email import OutboxEmail
+from tests.conftest import PlanTestingConfig
+
+class RefusingConnection:
+    def __init__(self, error):
+        self.error = error
+
+    def send(self, message):
+        raise self.error
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def queued(app):
+    with app.app_context():
+        db.session.execute(OutboxEmail.__table__.delete())
+        db.session.execute(OutboxEmail.__table__.insert(), [
+            {'to_email': f'user{number}@example.com', 'subject': 'Hello', 'body': 'Hi'} for number in range(3)
+        ])
+        db.session.commit()
+        yield app.extensions['email_outbox']
+        db.session.execute(OutboxEmail.__table__.delete())
+        db.session.commit()
+
+def rows():
+    return db.session.query(OutboxEmail).order_by(OutboxEmail.id).all()
+
+def test_unreachable_server_releases_the_batch(app, queued):
+    with pytest.raises(ConnectionRefusedError):
+        queued.deliver_pending(RefusingConnection(ConnectionRefusedError()))
+
+    first, *rest = rows()
+    assert (first.status, first.attempts) == ('pending', 1)
+    assert first.last_error is not None
+    assert [(row.status, row.attempts, row.claimed_by) for row in rest] == [('pending', 0, None)] * 2
+    assert all(row.next_attempt_at > datetime.utcnow() for row in rows())
+
+def test_temporary_and_permanent_failures(app, queued):
+    queued.deliver_pending(RefusingConnection(smtplib.SMTPResponseException(451, 'Try again later')))
+    assert {(row.status, row.attempts) for row in rows()} == {('pending', 1)}
+
+    db.session.query(OutboxEmail).update({'next_attempt_at': datetime.utcnow()})
+    db.session.commit()
+    queued.deliver_pending(RefusingConnection(smtplib.SMTPResponseException(550, 'No such user')))
+    assert {(row.status, row.attempts) for row in rows()} == {('failed', 2)}
+
+def test_workers_drain_rows_queued_before_start(tmp_path):
+    class WorkerConfig(PlanTestingConfig):
+        # A file, so the worker thread gets a connection of its own
+        # instead of sharing the in-memory database's single one.
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "outbox.db"}'
+        EMAIL_WORKERS = 1
+        EMAIL_POLL_INTERVAL = 1
+    app = create_app(WorkerConfig)
+    outbox = app.extensions['email_outbox']
+    with app.app_context():
+        db.create_all()
+        db.session.execute(OutboxEmail.__table__.insert(), [{'to_email': 'a@example.com', 'subject': 'S', 'body': 'B'}])
+        db.session.commit()
+    try:
+        app.test_client().get('/companies/')
+        deadline = time.monotonic() + 5
+        with app.app_context():
+            while db.session.query(OutboxEmail.status).scalar() != 'sent' and time.monotonic() < deadline:
+                db.session.rollback()
+                time.sleep(0.05)
+            assert db.session.query(OutboxEmail.status).scalar() == 'sent'
+    finally:
+        outbox.stop()
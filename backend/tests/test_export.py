@@ -0,0 +1,70 @@
+﻿"""Streaming CSV/NDJSON exports."""
+import csv
+import gzip
+import io
+import json
+from app import db
+from app.models.application import Application
+from app.models.vacancy import Vacancy
+from app.services.export_service import ExportService
+
+def test_csv_export_has_every_company_vacancy(app, seeded):
+    response = app.test_client().get(
+        '/vacancies/export', headers={'Authorization': f'Bearer {seeded["employer"]}'}
+    )
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    with app.app_context():
+        expected = [
+            vacancy_id for (vacancy_id,) in db.session.query(Vacancy.id).filter(
+                Vacancy.company_id == seeded['company_id']
+            ).order_by(Vacancy.id)
+        ]
+        applications = dict(db.session.query(Application.vacancy_id, db.func.count()).filter(
+            Application.vacancy_id.in_(expected)
+        ).group_by(Application.vacancy_id).all())
+    assert [int(row['id']) for row in rows] == expected
+    assert {row['company_id'] for row in rows} == {str(seeded['company_id'])}
+    assert [int(row['applications_count']) for row in rows] == [applications.get(id, 0) for id in expected]
+
+def test_gzipped_ndjson_matches_csv(app, seeded):
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {seeded["employer"]}'}
+    response = client.get('/vacancies/applications/export?format=ndjson&gzip=true', headers=headers)
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'] == 'attachment; filename="applications.ndjson.gz"'
+    records = [json.loads(line) for line in gzip.decompress(response.get_data()).decode().splitlines()]
+
+    rows = list(csv.DictReader(io.StringIO(
+        client.get('/vacancies/applications/export', headers=headers).get_data(as_text=True)
+    )))
+    assert records
+    assert [record['id'] for record in records] == [int(row['id']) for row in rows]
+    assert {record['company_id'] for record in records} == {seeded['company_id']}
+    assert list(records[0]) == ExportService.columns('applications')
+
+def test_windows_cover_every_row_once(app):
+    with app.app_context():
+        whole = [row.id for row in ExportService.rows('applications')]
+        windowed = [row.id for row in ExportService.rows('applications', window=97, yield_per=10)]
+    assert whole == sorted(set(whole))
+    assert windowed == whole
+
+def test_export_is_for_employers(app, seeded):
+    client = app.test_client()
+    response = client.get('/vacancies/export', headers={'Authorization': f'Bearer {seeded["seeker"]}'})
+    assert response.status_code == 403
+    response = client.get('/vacancies/export?format=xml', headers={'Authorization': f'Bearer {seeded["employer"]}'})
+    assert response.status_code == 400
+
+def test_cli_export(app, seeded, tmp_path):
+    output = tmp_path / 'vacancies.ndjson'
+    result = app.test_cli_runner().invoke(args=[
+        'export', 'run', 'vacancies', '--format', 'ndjson',
+        '--company-id', str(seeded['company_id']), '--output', str(output)
+    ])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        count = Vacancy.query.filter_by(company_id=seeded['company_id']).count()
+    assert len(output.read_text().splitlines()) == count
@@ -0,0 +1,66 @@
+﻿"""Authorization from token claims, and token revocation."""
+import pytest
+from flask_jwt_extended import verify_jwt_in_request
+from app import db
+from app.models.profile import Profile
+from app.models.user import User
+from app.services.identity_service import IdentityService
+from tests.test_query_plans import recorded_statements
+
+@pytest.fixture
+def member(app):
+    """A job seeker of its own, so revoking it leaves the shared fixtures alone."""
+    with app.app_context():
+        user = User(username='revocable', email='revocable@example.com', user_type='job_seeker')
+        user.profile = Profile(first_name='Rev')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        token = IdentityService.create_token(IdentityService.principal(user_id))
+    yield {'id': user_id, 'token': token}
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+        app.extensions['identity'].revoked.pop(user_id, None)
+
+def profile_status(app, token):
+    return app.test_client().get(
+        '/profile/my-profile', headers={'Authorization': f'Bearer {token}'}
+    ).status_code
+
+def test_principal_comes_from_the_claims(app, seeded):
+    with app.test_request_context(headers={'Authorization': f'Bearer {seeded["employer"]}'}):
+        verify_jwt_in_request()
+        with recorded_statements() as statements:
+            principal = IdentityService.current()
+    assert statements == []
+    assert principal.user_type == 'employer' and principal.company_id == seeded['company_id']
+
+def test_deactivation_here_applies_at_once(app, member):
+    assert profile_status(app, member['token']) == 200
+    with app.app_context():
+        IdentityService.set_active(db.session.get(User, member['id']), False)
+    assert profile_status(app, member['token']) == 401
+
+    with app.app_context():
+        IdentityService.set_active(db.session.get(User, member['id']), True)
+    # Reactivation does not bring back tokens issued before the revocation.
+    assert profile_status(app, member['token']) == 401
+
+def test_deactivation_elsewhere_applies_on_the_next_sync(app, member):
+    with app.app_context():
+        # As another worker or the CLI would: no revocation in this process.
+        db.session.get(User, member['id']).is_active = False
+        db.session.commit()
+    cache = app.extensions['identity']
+    cache.next_sync = float('inf')
+    assert profile_status(app, member['token']) == 200
+    cache.next_sync = 0
+    assert profile_status(app, member['token']) == 401
+
+def test_tokens_of_inactive_users_are_refused(app, member):
+    with app.app_context():
+        principal = IdentityService.principal(member['id'])
+        principal.is_active = False
+        token = IdentityService.create_token(principal)
+    assert profile_status(app, token) == 401
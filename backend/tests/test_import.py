@@ -0,0 +1,28 @@
+﻿"""Streaming vacancy import."""
+import io
+from app import db
+from app.models.vacancy import Vacancy
+from app.services.import_service import parse_rows
+
+def test_csv_keeps_quoted_line_breaks():
+    stream = io.BytesIO('\ufefftitle,description\r\nFirst,"line one\nline two"\r\nSecond,plain\r\n'.encode())
+    rows = list(parse_rows(stream, 'csv'))
+    assert [data['description'] for _, data, _ in rows] == ['line one\nline two', 'plain']
+    assert [number for number, _, _ in rows] == [3, 4]
+
+def test_ndjson_reports_bad_lines():
+    stream = io.BytesIO(b'{"title": "A"}\n\nnot json\n[1]\n{"title": "B"}')
+    rows = list(parse_rows(stream))
+    assert [(number, error is None) for number, _, error in rows] == [(1, True), (3, False), (4, False), (5, True)]
+
+def test_import_csv(app, seeded):
+    client = app.test_client()
+    body = 'external_id,title,description\r\nimport-csv-1,Imported,"first paragraph\n\nsecond paragraph"\r\n'
+    response = client.post(
+        '/vacancies/import', data=body.encode(), content_type='text/csv',
+        headers={'Authorization': f'Bearer {seeded["employer"]}'}
+    )
+    assert response.status_code == 200, response.get_json()
+    with app.app_context():
+        vacancy = db.session.query(Vacancy).filter(Vacancy.external_id == 'import-csv-1').one()
+        assert vacancy.description == 'first paragraph\n\nsecond paragraph'
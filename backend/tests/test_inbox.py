@@ -0,0 +1,69 @@
+﻿"""The employer application inbox."""
+from collections import Counter
+import pytest
+from app import db
+from app.models.application import Application
+from app.models.vacancy import Vacancy
+from tests.test_query_plans import recorded_statements
+
+PATH = '/companies/my-company/applications'
+
+@pytest.fixture
+def inbox(app, seeded):
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {seeded["employer"]}'}
+
+    def get(query='', status=200):
+        response = client.get(f'{PATH}?{query}', headers=headers)
+        assert response.status_code == status, response.get_data(as_text=True)
+        return response.get_json()
+    return get
+
+@pytest.fixture
+def received(app, seeded):
+    """``(applied_at, id, status, vacancy_id)`` of every application the company got."""
+    with app.app_context():
+        return db.session.query(
+            Application.applied_at, Application.id, Application.status, Application.vacancy_id
+        ).join(Vacancy).filter(Vacancy.company_id == seeded['company_id']).all()
+
+def walk(inbox, query):
+    ids, cursor = [], ''
+    while cursor is not None:
+        body = inbox(f'{query}&per_page=3&cursor={cursor}')
+        ids.extend(application['id'] for application in body['applications'])
+        cursor = body['next_cursor']
+    return ids, body
+
+def test_pages_cover_the_inbox_newest_first(inbox, received):
+    ids, body = walk(inbox, '')
+    assert ids == [row.id for row in sorted(received, reverse=True)]
+    assert body['total'] == len(received)
+    assert body['counts'] == dict(Counter(row.status for row in received))
+
+def test_filters(inbox, received):
+    status = received[0].status
+    ids, body = walk(inbox, f'status={status}')
+    assert sorted(ids) == sorted(row.id for row in received if row.status == status)
+    assert body['total'] == len(ids)
+    # Counts ignore the status filter so every tab can show its badge.
+    assert sum(body['counts'].values()) == len(received)
+
+    vacancy_id = received[0].vacancy_id
+    ids, _ = walk(inbox, f'vacancy_id={vacancy_id}')
+    assert sorted(ids) == sorted(row.id for row in received if row.vacancy_id == vacancy_id)
+
+    middle = sorted(row.applied_at for row in received)[len(received) // 2]
+    ids, _ = walk(inbox, f'applied_from={middle.isoformat()}')
+    assert sorted(ids) == sorted(row.id for row in received if row.applied_at >= middle)
+
+def test_rejects_bad_input(inbox):
+    assert inbox('applied_from=yesterday', status=400) == {'message': 'applied_from must be an ISO date'}
+    assert inbox('cursor=nonsense', status=400) == {'message': 'Invalid cursor'}
+
+def test_page_is_two_queries(app, inbox):
+    with app.app_context():
+        with recorded_statements() as statements:
+            inbox('per_page=50')
+    inbox_statements = [statement for statement, _ in statements if 'applications' in statement]
+    assert len(inbox_statements) == 2
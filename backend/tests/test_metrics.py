@@ -0,0 +1,24 @@
+﻿"""The Prometheus metrics endpoint."""
+import pytest
+
+TOKEN = 'metrics-secret'
+
+@pytest.mark.parametrize('configured,header', [
+    (None, None),
+    (None, 'Bearer '),
+    (TOKEN, None),
+    (TOKEN, 'Bearer wrong'),
+    (TOKEN, TOKEN),
+])
+def test_needs_the_metrics_token(app, monkeypatch, configured, header):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', configured)
+    headers = {'Authorization': header} if header else None
+    response = app.test_client().get('/api/v1/metrics', headers=headers)
+    assert response.status_code == 403
+
+def test_serves_prometheus_text(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', TOKEN)
+    response = app.test_client().get('/api/v1/metrics', headers={'Authorization': f'Bearer {TOKEN}'})
+    assert response.status_code == 200
+    assert response.content_type == 'text/plain; version=0.0.4; charset=utf-8'
+    assert '# TYPE' in response.get_data(as_text=True)
@@ -0,0 +1,33 @@
+﻿"""Password hashing off the request thread."""
+from types import SimpleNamespace
+import pytest
+from app.services.password_hasher import HashingBusy, PasswordHasher
+
+def hasher(**config):
+    return PasswordHasher(SimpleNamespace(config={'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000', **config}))
+
+def test_pools_are_forked_before_serving():
+    password_hasher = hasher(PASSWORD_HASH_WORKERS=1, PROVISIONING_HASH_PROCESSES=2)
+    try:
+        password_hasher.start()
+        assert len(password_hasher.executor._processes) == 1
+        assert len(password_hasher.bulk_executor._processes) == 2
+
+        password_hash = password_hasher.hash('secret')
+        assert password_hasher.verify(password_hash, 'secret')
+        assert not password_hasher.verify(password_hash, 'wrong')
+        assert all(password_hasher.verify(value, 'same') for value in password_hasher.hash_many(['same'] * 3))
+    finally:
+        password_hasher.stop()
+
+def test_inline_hashing_starts_no_processes():
+    password_hasher = hasher(PASSWORD_HASH_WORKERS=0)
+    password_hasher.start()
+    assert password_hasher.executor is None and password_hasher.bulk_executor is None
+    assert password_hasher.verify(password_hasher.hash('secret'), 'secret')
+
+def test_saturated_hasher_sheds_load():
+    password_hasher = hasher(PASSWORD_HASH_WORKERS=0, PASSWORD_HASH_MAX_PENDING=1)
+    password_hasher.slots.acquire()
+    with pytest.raises(HashingBusy):
+        password_hasher.hash('secret')
@@ -0,0 +1,95 @@
+﻿"""Bulk user provisioning over HTTP and the CLI."""
+import json
+import pytest
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.services.provisioning_service import UserProvisioningService
+from app.services.stats_service import StatsService
+
+TOKEN = 'provisioning-secret'
+
+@pytest.fixture
+def provisioning(app, monkeypatch):
+    """Posts to /auth/provision; drops the users it created afterwards."""
+    monkeypatch.setitem(app.config, 'PROVISIONING_TOKEN', TOKEN)
+    client = app.test_client()
+
+    def post(users, token=TOKEN, status=200):
+        response = client.post('/auth/provision', json={'users': users}, headers={'X-Provisioning-Token': token})
+        assert response.status_code == status, response.get_data(as_text=True)
+        return response.get_json()
+    yield post
+    with app.app_context():
+        # Profiles and companies go with their user.
+        for user in User.query.filter(User.email.like('provisioned%')).all():
+            db.session.delete(user)
+        db.session.commit()
+
+def test_requires_the_token(app, provisioning, monkeypatch):
+    provisioning([{'email': 'provisioned@example.com', 'password': 'secret1'}], token='wrong', status=403)
+    monkeypatch.setitem(app.config, 'PROVISIONING_TOKEN', None)
+    provisioning([{'email': 'provisioned@example.com', 'password': 'secret1'}], token='', status=403)
+
+def test_reports_every_row(app, provisioning):
+    result = provisioning([
+        {'email': 'provisioned1@example.com', 'password': 'secret1', 'first_name': 'Ann'},
+        {'email': 'provisioned2@example.com', 'password': 'secret2', 'user_type': 'employer',
+         'company_name': 'Provisioned Ltd'},
+        {'email': 'provisioned1@example.com', 'password': 'secret1', 'username': 'other'},
+        {'email': 'provisioned3', 'password': 'secret1'},
+        'not an object',
+    ])
+    assert result['created'] == 2 and result['error_count'] == 3
+    assert [user.get('error') for user in result['users']] == [
+        None, None, 'User already exists with this email', 'Invalid email format', 'Expected a JSON object'
+    ]
+    again = provisioning([
+        {'email': 'provisioned2@example.com', 'password': 'secret2', 'username': 'someone_else'},
+        {'email': 'provisioned4@example.com', 'password': 'secret4', 'username': 'provisioned1'},
+    ])
+    assert [user['error'] for user in again['users']] == [
+        'User already exists with this email', 'Username already taken'
+    ]
+
+    with app.app_context():
+        seeker = db.session.get(User, result['users'][0]['id'])
+        employer = db.session.get(User, result['users'][1]['id'])
+        assert seeker.check_password('secret1') and seeker.profile.first_name == 'Ann'
+        assert employer.company.name == 'Provisioned Ltd'
+        assert StatsService.drift() == {}
+    response = app.test_client().post('/auth/login', json={'email': 'provisioned2@example.com', 'password': 'secret2'})
+    assert response.status_code == 200
+
+def test_caps_the_request_size(provisioning):
+    users = [{'email': f'provisioned{number}@example.com', 'password': 'secret1'} for number in range(201)]
+    provisioning(users, status=400)
+
+def test_duplicates_across_chunks(app, provisioning):
+    records = [
+        (number, {'email': f'provisioned{number % 3}@example.com', 'password': 'secret1',
+                  'username': f'provisioned{number}'}, None)
+        for number in range(1, 8)
+    ]
+    with app.app_context():
+        result = UserProvisioningService.provision(records, batch_size=2).to_dict()
+    assert [user['status'] for user in result['users']] == ['created'] * 3 + ['error'] * 4
+
+def test_cli_reads_csv(app, provisioning, tmp_path):
+    source = tmp_path / 'users.csv'
+    source.write_text(
+        'email,password,user_type,company_name\n'
+        'provisioned1@example.com,secret1,job_seeker,\n'
+        'provisioned2@example.com,short,job_seeker,\n'
+        'provisioned3@example.com,secret3,employer,CLI Co\n'
+    )
+    result = app.test_cli_runner().invoke(args=['users', 'provision', str(source)])
+    assert result.exit_code == 0, result.output
+    report = json.loads(result.output)
+    assert (report['created'], report['error_count']) == (2, 1)
+    assert report['users'][1] == {
+        'row': 3, 'email': 'provisioned2@example.com', 'status': 'error',
+        'error': 'Password must be at least 6 characters long'
+    }
+    with app.app_context():
+        assert Company.query.filter_by(name='CLI Co').count() == 1
@@ -0,0 +1,110 @@
+﻿"""Query-plan regression tests.
+
+Every case requests a route against the seeded database, records the
+statements it runs and ``EXPLAIN``s each one. A case fails when any plan
+reads one of the large tables with a full sequential scan, which means a
+predicate, join or sort key lost its index. On PostgreSQL sequential
+scans are disabled for the ``EXPLAIN``, so a small seed cannot hide a
+missing index behind a cheaper scan. Listing pages must also come
+straight off an index in sort order rather than sorting every match.
+"""
+import json
+import re
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import db
+from benchmarks.data import BENCHMARK_PASSWORD
+
+LARGE_TABLES = {'users', 'companies', 'profiles', 'vacancies', 'applications'}
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)$')
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+INDEX_ORDERED = {'vacancies', 'vacancies_cursor', 'companies'}
+
+CASES = [
+    ('vacancies', 'GET', '/vacancies/', None, None),
+    ('vacancies_cursor', 'GET', '/vacancies/?cursor=', None, None),
+    ('vacancies_filtered', 'GET', '/vacancies/?employment_type=full&experience_level=senior&min_salary=100000', None, None),
+    ('vacancies_location', 'GET', '/vacancies/?location=Moscow', None, None),
+    ('vacancies_search', 'GET', '/vacancies/?search=python', None, None),
+    ('vacancy', 'GET', '/vacancies/{vacancy_id}', None, None),
+    ('companies', 'GET', '/companies/', None, None),
+    ('company', 'GET', '/companies/{company_id}', None, None),
+    ('my_profile', 'GET', '/profile/my-profile', 'seeker', None),
+    ('my_applications', 'GET', '/profile/my-applications', 'seeker', None),
+    ('company_applications', 'GET', '/companies/my-company/applications', 'employer', None),
+    ('apply', 'POST', '/vacancies/{vacancy_id}/apply', 'seeker', {'cover_letter': ''}),
+    ('login', 'POST', '/auth/login', None, {'email': '{seeker_email}', 'password': BENCHMARK_PASSWORD}),
+    ('stats', 'GET', '/api/v1/stats', None, None),
+]
+
+@contextmanager
+def recorded_statements():
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINED):
+            statements.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+def sqlite_scans(connection, statement, parameters):
+    plan = [row[3] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+    scanned = []
+    sorted_ = 'USE TEMP B-TREE FOR ORDER BY' in plan
+    for detail in plan:
+        match = SQLITE_SCAN.match(detail)
+        if match and re.sub(r'_\d+$', '', match.group(1)) in LARGE_TABLES:
+            scanned.append(match.group(1))
+    return scanned, sorted_, '\n'.join(plan)
+
+def postgresql_scans(connection, statement, parameters):
+    transaction = connection.begin()
+    try:
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+    finally:
+        transaction.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scanned, sorted_, nodes = [], False, [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        sorted_ = sorted_ or node['Node Type'] in ('Sort', 'Incremental Sort')
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in LARGE_TABLES:
+            scanned.append(node['Relation Name'])
+        nodes.extend(node.get('Plans', []))
+    return scanned, sorted_, json.dumps(plan, indent=2)
+
+def explain(statement, parameters):
+    scans = postgresql_scans if db.engine.dialect.name == 'postgresql' else sqlite_scans
+    with db.engine.connect() as connection:
+        return scans(connection, statement, parameters)
+
+def fill(value, seeded):
+    if isinstance(value, dict):
+        return {key: fill(item, seeded) for key, item in value.items()}
+    return value.format(**seeded) if isinstance(value, str) else value
+
+@pytest.mark.parametrize('name,method,path,token,body', CASES, ids=[case[0] for case in CASES])
+def test_route_queries_use_indexes(app, seeded, name, method, path, token, body):
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {seeded[token]}'} if token else None
+    with app.app_context():
+        with recorded_statements() as statements:
+            response = client.open(fill(path, seeded), method=method, json=fill(body, seeded), headers=headers)
+        assert response.status_code in (200, 201), response.get_data(as_text=True)
+        assert statements, f'{name} ran no queries to check'
+
+        for statement, parameters in statements:
+            scanned, sorted_, plan = explain(statement, parameters)
+            assert not scanned, (
+                f'{name}: full scan of {", ".join(scanned)}\n\n{statement}\n\n{plan}'
+            )
+            if name in INDEX_ORDERED and 'ORDER BY' in statement:
+                assert not sorted_, f'{name}: page is sorted after reading\n\n{statement}\n\n{plan}'
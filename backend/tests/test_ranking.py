@@ -0,0 +1,76 @@
+﻿"""Applicant ranking on top of the recommendation engine."""
+import pytest
+from app import db
+from app.models.application import Application
+from app.models.profile import Profile
+from app.models.user import User
+from app.models.vacancy import Vacancy
+from app.services.ranking_service import RankingService
+from app.services.recommendation_service import RecommendationService
+from app.services.search_index import vacancy_document
+
+@pytest.fixture
+def vacancy(app):
+    """An unlisted vacancy with two applicants, written after the engine build."""
+    with app.app_context():
+        RecommendationService.engine()
+        owner = Vacancy.query.order_by(Vacancy.id).first()
+        vacancy = Vacancy(
+            title='Quarkscript developer', description='Quarkscript services',
+            requirements='quarkscript, fluxcapacitance', is_active=False,
+            employer_id=owner.employer_id, company_id=owner.company_id
+        )
+        users = [
+            User(username=f'ranking{number}', email=f'ranking{number}@example.com', user_type='job_seeker')
+            for number in range(2)
+        ]
+        db.session.add_all([vacancy, *users])
+        db.session.flush()
+        profiles = [
+            Profile(user_id=users[0].id, skills='quarkscript fluxcapacitance'),
+            Profile(user_id=users[1].id, skills='gardening')
+        ]
+        db.session.add_all(profiles)
+        db.session.flush()
+        db.session.add_all(Application(vacancy_id=vacancy.id, applicant_id=profile.id) for profile in profiles)
+        db.session.commit()
+        ids = {'vacancy': vacancy.id, 'matching': profiles[0].id, 'other': profiles[1].id}
+    yield ids
+    with app.app_context():
+        # ORM deletes, so the platform counters follow.
+        profile_ids = [ids['matching'], ids['other']]
+        rows = [
+            *Application.query.filter_by(vacancy_id=ids['vacancy']),
+            *Profile.query.filter(Profile.id.in_(profile_ids)),
+            *User.query.filter(User.username.like('ranking%')),
+            db.session.get(Vacancy, ids['vacancy'])
+        ]
+        for row in rows:
+            db.session.delete(row)
+            db.session.flush()
+        db.session.commit()
+        app.extensions.pop('applicant_scores', None)
+
+def test_scores_terms_the_engine_has_not_seen(app, vacancy):
+    with app.app_context():
+        assert 'quarkscript' not in RecommendationService.engine().vocabulary
+        ranked = RankingService.rank(db.session.get(Vacancy, vacancy['vacancy']))
+
+    assert ranked.total == 2
+    best, other = ranked.items
+    assert best['application']['applicant_id'] == vacancy['matching']
+    assert best['score'] > 0.5
+    assert other['score'] == 0
+
+def test_cached_scores_follow_the_engine_version(app, vacancy):
+    with app.app_context():
+        engine = RecommendationService.engine()
+        RankingService.scores(db.session.get(Vacancy, vacancy['vacancy']))
+        cached = RankingService.cache().get(vacancy['vacancy'])['version']
+
+        listed = Vacancy.query.filter_by(is_active=True).order_by(Vacancy.id).first()
+        engine.upsert(vacancy_document(listed))
+        RankingService.scores(db.session.get(Vacancy, vacancy['vacancy']))
+
+        assert cached[1] != engine.version
+        assert RankingService.cache().get(vacancy['vacancy'])['version'][1] == engine.version
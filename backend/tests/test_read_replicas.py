@@ -0,0 +1,97 @@
+﻿"""Routing of read-only endpoints to read replicas."""
+import shutil
+from datetime import timedelta
+import pytest
+from flask import g
+from sqlalchemy import event
+from app import create_app, db
+from app.services.read_replicas import STICKY_HEADER
+from app.services.recommendation_service import RecommendationService
+from app.services.response_cache import MemoryCacheBackend
+from benchmarks.data import generate
+from tests.conftest import PlanTestingConfig
+
+@pytest.fixture(scope='module')
+def replicated(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('replicas')
+
+    class ReplicaTestingConfig(PlanTestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{directory / "primary.db"}'
+        READ_REPLICA_URLS = [f'sqlite:///{directory / "replica.db"}']
+        READ_REPLICA_STICKY_SECONDS = 30
+    app = create_app(ReplicaTestingConfig)
+    with app.app_context():
+        db.create_all()
+        generate(vacancies=50, seed=5, log=lambda message: None)
+        db.engine.dispose()
+    shutil.copy(directory / 'primary.db', directory / 'replica.db')
+    yield app
+    app.extensions['read_replicas'].stop()
+
+@pytest.fixture
+def reads(replicated):
+    """Statements run on the primary and on the replica during a test."""
+    counts = {'primary': 0, 'replica': 0}
+    replica = replicated.extensions['read_replicas'].replicas[0].engine
+    with replicated.app_context():
+        primary = db.engine
+
+    def counter(name):
+        def count(*args):
+            counts[name] += 1
+        return count
+    listeners = [(primary, counter('primary')), (replica, counter('replica'))]
+    for engine, listener in listeners:
+        event.listen(engine, 'before_cursor_execute', listener)
+    yield counts
+    for engine, listener in listeners:
+        event.remove(engine, 'before_cursor_execute', listener)
+
+def get(app, reads, path, **headers):
+    before = dict(reads)
+    response = app.test_client(use_cookies=False).get(path, headers=headers)
+    assert response.status_code == 200
+    return response, {name: reads[name] - before[name] for name in reads}
+
+def test_reads_go_to_the_replica(replicated, reads):
+    _, used = get(replicated, reads, '/companies/')
+    assert used['replica'] > 0 and used['primary'] == 0
+
+def test_token_clients_read_their_own_writes(replicated, reads):
+    response = replicated.test_client(use_cookies=False).post('/auth/register', json={
+        'email': 'writer@example.com', 'username': 'replica_writer', 'password': 'secret1'
+    })
+    assert response.status_code == 201
+    until = response.headers[STICKY_HEADER]
+
+    _, used = get(replicated, reads, '/companies/', **{STICKY_HEADER: until})
+    assert used['primary'] > 0 and used['replica'] == 0
+
+def test_clients_cannot_pin_themselves_for_longer(replicated, reads):
+    _, used = get(replicated, reads, '/companies/', **{STICKY_HEADER: '99999999999'})
+    assert used['replica'] > 0 and used['primary'] == 0
+
+def test_replica_responses_are_not_cached(replicated, reads):
+    replicated.extensions['response_cache'] = cache = MemoryCacheBackend()
+    try:
+        get(replicated, reads, '/companies/?page=2')
+        assert len(cache.entries) == 0
+    finally:
+        del replicated.extensions['response_cache']
+
+def test_recommendation_sync_reads_the_primary(replicated, reads):
+    replica = replicated.extensions['read_replicas'].replicas[0]
+    with replicated.test_request_context('/profiles/recommendations'):
+        g.replica_engine = replica.engine
+        engine = RecommendationService.engine()
+        assert g.replica_engine is replica.engine
+        engine.synced_at -= timedelta(hours=1)
+        before = dict(reads)
+        RecommendationService.engine()
+    assert reads['primary'] > before['primary'] and reads['replica'] == before['replica']
+
+def test_health_is_probed_off_the_request_thread(replicated):
+    replicas = replicated.extensions['read_replicas']
+    with replicated.test_request_context('/companies/'):
+        assert replicas.choose() is replicas.replicas[0]
+    assert replicas.thread is not None and replicas.thread.is_alive()
@@ -0,0 +1,25 @@
+﻿"""Response cache keys and tag invalidation of the public listings."""
+from flask import request
+from app.services.response_cache import ResponseCache
+
+def test_parameter_names_are_case_sensitive(app, response_cache):
+    client = app.test_client()
+    unfiltered = client.get('/vacancies/?Search=zzzqx').get_json()
+    assert unfiltered['total'] > 0
+
+    filtered = client.get('/vacancies/?search=zzzqx').get_json()
+    assert filtered['total'] == 0
+
+def test_values_cannot_pass_for_other_parameters(app, response_cache):
+    client = app.test_client()
+    smuggled = client.get('/vacancies/?search=a%26per_page%3D5').get_json()
+    assert smuggled['total'] == 0
+
+    paged = client.get('/vacancies/?search=a&per_page=5').get_json()
+    assert paged != smuggled
+    assert len(paged['vacancies']) <= 5
+
+def test_key_ignores_parameters_the_view_does_not_read(app):
+    with app.test_request_context('/vacancies/?search=python&utm_source=mail&page=2'):
+        key = ResponseCache.key('vacancies', request.args, ('page', 'search'))
+    assert key == 'vacancies?page=2&search=python'
@@ -0,0 +1,33 @@
+﻿"""The in-memory BM25 vacancy index."""
+from datetime import datetime
+import pytest
+from app.models.vacancy import Vacancy
+from app.services.search_index import InvertedIndex
+from app.services.search_service import SearchService
+
+def document(vacancy_id, title, **fields):
+    return {
+        'id': vacancy_id, 'is_active': True, 'created_at': datetime(2024, 1, 1), 'title': title,
+        'description': '', 'requirements': '', 'employment_type': None, 'experience_level': None,
+        'location_id': None, 'salary_from': None, 'salary_to': None,
+        'salary_min_base': None, 'salary_max_base': None, **fields
+    }
+
+def test_prefix_expands_to_every_matching_term():
+    index = InvertedIndex()
+    for number in range(120):
+        index.upsert(document(number, f'developer{number:03d}'))
+    index.upsert(document(500, 'devops'))
+    index.upsert(document(501, 'dew'))
+
+    assert set(index.search('develop')) == set(range(120))
+    assert set(index.search('dev')) == set(range(120)) | {500}
+    assert index.search('developer007') == [7]
+
+@pytest.mark.parametrize('query', ['python', 'dev', 'ma', 'senior engineer'])
+def test_matches_the_database_backend(app, query):
+    with app.app_context():
+        index = InvertedIndex()
+        index.load(Vacancy.query.filter_by(is_active=True), datetime.utcnow())
+        expected = {vacancy.id for vacancy in SearchService.filter_vacancies(query=query, ranked=False)}
+    assert set(index.search(query)) == expected
@@ -0,0 +1,31 @@
+﻿"""Page serialization with a fixed number of queries."""
+import pytest
+from app import db
+from app.models.application import Application
+from app.models.company import Company
+from app.models.vacancy import Vacancy
+from app.services.serialization_service import SerializationService
+from tests.test_query_plans import recorded_statements
+
+def statement_count(app, path, headers=None):
+    with app.app_context():
+        with recorded_statements() as statements:
+            response = app.test_client().get(path, headers=headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements)
+
+@pytest.mark.parametrize('path', ['/vacancies/', '/companies/'])
+def test_listing_queries_do_not_grow_with_the_page(app, path):
+    assert statement_count(app, f'{path}?per_page=2') == statement_count(app, f'{path}?per_page=100')
+
+def test_batches_match_per_row_serialization(app):
+    with app.app_context():
+        vacancies = Vacancy.query.order_by(Vacancy.id).limit(20).all()
+        companies = Company.query.order_by(Company.id).limit(20).all()
+        applications = Application.query.order_by(Application.id).limit(20).all()
+        assert SerializationService.serialize_vacancies(vacancies) == [vacancy.to_dict() for vacancy in vacancies]
+        assert SerializationService.serialize_companies(companies) == [company.to_dict() for company in companies]
+        assert SerializationService.serialize_applications(applications) == [
+            application.to_dict() for application in applications
+        ]
+        db.session.rollback()
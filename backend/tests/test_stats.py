@@ -0,0 +1,32 @@
+﻿"""Platform statistics counters."""
+import importlib.util
+from pathlib import Path
+from app import db
+from app.models.platform_stat import PlatformStat
+from app.services.stats_service import ACTIVE_VACANCIES, INITIALIZED, StatsService
+
+MIGRATION = Path(__file__).parents[1] / 'migrations' / 'versions' / 'e67b399f6d41_seed_platform_stats.py'
+
+def test_counters_match_the_source_tables(app):
+    with app.app_context():
+        assert StatsService.drift() == {}
+        body = app.test_client().get('/api/v1/stats').get_json()
+        assert body['total_vacancies'] == StatsService.actual_counts()[ACTIVE_VACANCIES]
+
+def test_unseeded_counters_fail_loudly(app):
+    with app.app_context():
+        db.session.query(PlatformStat).filter(PlatformStat.key == INITIALIZED).delete()
+        db.session.commit()
+        try:
+            assert app.test_client().get('/api/v1/stats').status_code == 503
+        finally:
+            assert StatsService.reconcile() == {INITIALIZED: 1}
+        assert app.test_client().get('/api/v1/stats').status_code == 200
+
+def test_seed_migration_counts_like_the_service(app):
+    spec = importlib.util.spec_from_file_location('seed_platform_stats', MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with app.app_context():
+        with db.engine.connect() as connection:
+            assert migration.actual_counts(connection) == dict(StatsService.actual_counts())
@@ -0,0 +1,37 @@
+﻿"""ETag / Last-Modified validators and 304 responses."""
+from app import db
+from app.models.vacancy import Vacancy
+from tests.test_query_plans import recorded_statements
+
+def test_listing_revalidates_until_a_change(app, response_cache, seeded):
+    client = app.test_client()
+    etag = client.get('/companies/').headers['ETag']
+    assert client.get('/companies/', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        vacancy = db.session.get(Vacancy, seeded['vacancy_id'])
+        vacancy.title = f'{vacancy.title} '
+        db.session.commit()
+
+    response = client.get('/companies/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_listing_validators_run_no_queries(app, response_cache):
+    client = app.test_client()
+    with app.app_context():
+        with recorded_statements() as statements:
+            response = client.get('/vacancies/?cursor=')
+    assert response.status_code == 200 and response.headers['ETag']
+    # Only the per-page counts of the serializer, never whole tables.
+    whole_table = [
+        statement for statement, _ in statements
+        if 'count(' in statement.lower() and 'where' not in statement.lower()
+    ]
+    assert not whole_table
+
+def test_detail_not_modified(app, seeded):
+    client = app.test_client()
+    path = f'/vacancies/{seeded["vacancy_id"]}'
+    etag = client.get(path).headers['ETag']
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
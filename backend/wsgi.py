@@ -1,7 +1,11 @@
 ﻿from app import create_app
 from app.config import ProductionConfig
+from app.services.password_hasher import start_password_hasher
+from app.services.recommendation_service import warm_recommendations
 
 app = create_app(ProductionConfig)
+start_password_hasher(app)
+warm_recommendations(app)
 
 if __name__ == '__main__':
     app.run()